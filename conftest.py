@@ -0,0 +1,86 @@
+import difflib
+from typing import Callable, Iterable
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from notes.metrics import METRICS_BUFFER
+from notes.slow_queries import normalize_sql
+
+QUERY_BUDGET_SIZES = (1, 10, 100)
+
+
+@pytest.fixture
+def assert_query_budget(db):
+    """
+    Checks the SQL run by a request as the data behind it grows.
+
+        assert_query_budget(
+            lambda: client.get(url),
+            grow=lambda size: make_notes(size - Note.objects.count()),
+            exact=4,
+        )
+
+    For each size (1, 10 and 100 by default), grow(size) brings the data to that size,
+    then request() runs and its queries are recorded. The check fails if a run
+    doesn't meet the budget (exactly `exact` or at most `maximum` queries) or,
+    unless constant=False, runs different queries than at the smallest size
+    (an N+1). The failure shows a diff of the normalized queries against
+    the run at the smallest size.
+    """
+
+    def check(
+        request: Callable[[], object],
+        grow: Callable[[int], object] | None = None,
+        exact: int | None = None,
+        maximum: int | None = None,
+        sizes: Iterable[int] = QUERY_BUDGET_SIZES,
+        constant: bool = True,
+    ) -> None:
+        baseline_size, baseline = None, []
+
+        for size in sizes:
+            if grow is not None:
+                grow(size)
+            with CaptureQueriesContext(connection) as captured:
+                request()
+            queries = [normalize_sql(query["sql"]) for query in captured]
+
+            problems = []
+            if exact is not None and len(queries) != exact:
+                problems.append(f"expected {exact} queries, got {len(queries)}")
+            if maximum is not None and len(queries) > maximum:
+                problems.append(
+                    f"expected at most {maximum} queries, got {len(queries)}"
+                )
+            if constant and baseline_size is not None and queries != baseline:
+                problems.append(f"queries differ from the run at size {baseline_size}")
+
+            if problems:
+                diff = difflib.unified_diff(
+                    baseline,
+                    queries,
+                    fromfile=f"size {baseline_size}" if baseline_size else "no queries",
+                    tofile=f"size {size}",
+                    lineterm="",
+                )
+                pytest.fail(
+                    f"Query budget exceeded at size {size}: {'; '.join(problems)}\n"
+                    + "\n".join(diff),
+                    pytrace=False,
+                )
+
+            if baseline_size is None:
+                baseline_size, baseline = size, queries
+
+    return check
+
+
+@pytest.fixture(autouse=True)
+def metrics_db(settings, tmp_path_factory):
+    """Keeps the metrics recorded by test requests out of the project directory."""
+    settings.METRICS_DB = tmp_path_factory.getbasetemp() / "metrics.sqlite3"
+    # Values left by earlier tests are flushed here, not into a test's own file.
+    METRICS_BUFFER.flush(force=True)
+    return settings.METRICS_DB
@@ -6,3 +6,6 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "notes.settings")
 app = Celery("notes")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+# Connects the task signals that log slow queries.
+from . import slow_queries  # noqa: E402, F401
@@ -0,0 +1,387 @@
+import atexit
+import logging
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+import redis
+from celery.signals import task_postrun
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+
+from .profiling import QueryTimer
+
+if TYPE_CHECKING:
+    from .slow_queries import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+Sample = tuple[str, str, float]
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS metric_values ("
+    "name TEXT, labels TEXT, value REAL, PRIMARY KEY (name, labels)"
+    ") WITHOUT ROWID",
+    # Slow queries by fingerprint, see notes.slow_queries.
+    "CREATE TABLE IF NOT EXISTS slow_queries ("
+    "fingerprint TEXT PRIMARY KEY, count INTEGER, total_ms REAL, max_ms REAL, "
+    "sample TEXT)",
+    "CREATE TABLE IF NOT EXISTS slow_query_sites ("
+    "fingerprint TEXT, site TEXT, count INTEGER, PRIMARY KEY (fingerprint, site)"
+    ") WITHOUT ROWID",
+)
+
+
+class MetricsStore:
+    """
+    Metric values shared by every process through one SQLite file.
+
+    Each write adds to the stored values in a single transaction, so the
+    gunicorn workers and the Celery worker can record concurrently and a
+    scrape sees the sum over all of them. Each process and thread opens its
+    own connection lazily, so the store survives gunicorn's fork.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "connection", None)
+        if db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=OFF")
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._local.connection = db
+        return db
+
+    def add(self, samples: Iterable[Sample]) -> bool:
+        """
+        Adds the values to the stored ones and returns whether they were written.
+        Errors are logged, never raised, so a locked or missing file can't break
+        the request being measured.
+        """
+        try:
+            db = self._connection()
+            with db:
+                db.execute("BEGIN IMMEDIATE")
+                db.executemany(
+                    "INSERT INTO metric_values VALUES (?, ?, ?) "
+                    "ON CONFLICT (name, labels) DO UPDATE "
+                    "SET value = value + excluded.value",
+                    samples,
+                )
+            return True
+        except sqlite3.Error as error:
+            logger.warning(f"Failed to record metrics: {error}")
+            return False
+
+    def add_slow_queries(self, queries: Iterable["SlowQuery"]) -> None:
+        """Adds slow query counts and times to the stored ones, keeping the slowest sample."""
+        queries = list(queries)
+        try:
+            db = self._connection()
+            with db:
+                db.execute("BEGIN IMMEDIATE")
+                db.executemany(
+                    "INSERT INTO slow_queries VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (fingerprint) DO UPDATE SET "
+                    "count = count + excluded.count, "
+                    "total_ms = total_ms + excluded.total_ms, "
+                    "sample = iif(excluded.max_ms > max_ms, excluded.sample, sample), "
+                    "max_ms = max(max_ms, excluded.max_ms)",
+                    (
+                        (q.fingerprint, q.count, q.total_ms, q.max_ms, q.sample)
+                        for q in queries
+                    ),
+                )
+                db.executemany(
+                    "INSERT INTO slow_query_sites VALUES (?, ?, ?) "
+                    "ON CONFLICT (fingerprint, site) DO UPDATE "
+                    "SET count = count + excluded.count",
+                    (
+                        (q.fingerprint, site, count)
+                        for q in queries
+                        for site, count in q.sites.items()
+                    ),
+                )
+        except sqlite3.Error as error:
+            logger.warning(f"Failed to record slow queries: {error}")
+
+    def slow_queries(self, order_by: str = "total_ms", limit: int = 20) -> list[dict]:
+        """
+        The stored slow queries with the highest `order_by` (total_ms, max_ms
+        or count), each with its call sites, most frequent first.
+        """
+        if order_by not in ("total_ms", "max_ms", "count"):
+            raise ValueError(f"Can't order slow queries by {order_by}")
+        db = self._connection()
+        db.row_factory = sqlite3.Row
+        try:
+            queries = [
+                dict(row)
+                for row in db.execute(
+                    f"SELECT * FROM slow_queries ORDER BY {order_by} DESC LIMIT ?",
+                    (limit,),
+                )
+            ]
+            for query in queries:
+                query["sites"] = [
+                    tuple(row)
+                    for row in db.execute(
+                        "SELECT site, count FROM slow_query_sites "
+                        "WHERE fingerprint = ? ORDER BY count DESC",
+                        (query["fingerprint"],),
+                    )
+                ]
+        finally:
+            db.row_factory = None
+        return queries
+
+    def clear_slow_queries(self) -> None:
+        db = self._connection()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("DELETE FROM slow_queries")
+            db.execute("DELETE FROM slow_query_sites")
+
+    def values(self) -> dict[str, dict[str, float]]:
+        """Returns {name: {labels: value}} of every stored value."""
+        result: dict[str, dict[str, float]] = {}
+        rows = self._connection().execute(
+            "SELECT name, labels, value FROM metric_values ORDER BY name, labels"
+        )
+        for name, labels, value in rows:
+            result.setdefault(name, {})[labels] = value
+        return result
+
+
+_stores: dict[str, MetricsStore] = {}
+
+
+def get_store() -> MetricsStore:
+    """Returns the store at settings.METRICS_DB."""
+    path = str(settings.METRICS_DB)
+    if path not in _stores:
+        _stores[path] = MetricsStore(path)
+    return _stores[path]
+
+
+class MetricsBuffer:
+    """
+    Metric values recorded by this process since the last flush.
+
+    add() only sums the samples in memory, so recording costs no I/O and no
+    lock shared with other processes. flush() adds the sums to the store in one
+    transaction, at most once per settings.METRICS_FLUSH_INTERVAL seconds unless
+    forced; values that fail to be written are kept for the next flush.
+    """
+
+    def __init__(self):
+        self.values: dict[tuple[str, str], float] = {}
+        self.flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, samples: Iterable[Sample]) -> None:
+        with self._lock:
+            for name, labels, value in samples:
+                key = (name, labels)
+                self.values[key] = self.values.get(key, 0) + value
+
+    def flush(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self.flushed_at < settings.METRICS_FLUSH_INTERVAL:
+            return
+        with self._lock:
+            values, self.values = self.values, {}
+            self.flushed_at = now
+        if values and not get_store().add(
+            (name, labels, value) for (name, labels), value in values.items()
+        ):
+            self.add((name, labels, value) for (name, labels), value in values.items())
+
+
+METRICS_BUFFER = MetricsBuffer()
+# Values recorded after the last flush of a process that exits.
+atexit.register(METRICS_BUFFER.flush, force=True)
+
+
+def format_labels(**labels: object) -> str:
+    return ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in sorted(labels.items())
+    )
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _series(name: str, labels: str, value: float) -> str:
+    return f"{name}{{{labels}}} {value:g}" if labels else f"{name} {value:g}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels: object) -> None:
+        METRICS_BUFFER.add([(self.name, format_labels(**labels), amount)])
+
+    def expose(self, values: dict[str, dict[str, float]]) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in values.get(self.name, {}).items():
+            yield _series(self.name, labels, value)
+
+
+class Histogram:
+    """
+    Stores one count per bucket, the count and the sum of the observations.
+    Buckets are made cumulative when exposed, so an observation is 3 writes.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = (*buckets, math.inf)
+        REGISTRY.append(self)
+
+    def samples(self, value: float, **labels: object) -> list[Sample]:
+        bucket = next(bound for bound in self.buckets if value <= bound)
+        key = format_labels(**labels)
+        return [
+            (f"{self.name}_bucket", f"{key}\t{bucket:g}", 1),
+            (f"{self.name}_count", key, 1),
+            (f"{self.name}_sum", key, value),
+        ]
+
+    def observe(self, value: float, **labels: object) -> None:
+        METRICS_BUFFER.add(self.samples(value, **labels))
+
+    def expose(self, values: dict[str, dict[str, float]]) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        bucket_counts = values.get(f"{self.name}_bucket", {})
+        for key, count in values.get(f"{self.name}_count", {}).items():
+            prefix = f"{key}," if key else ""
+            cumulative = 0.0
+            for bound in self.buckets:
+                cumulative += bucket_counts.get(f"{key}\t{bound:g}", 0)
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                yield f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative:g}'
+            yield _series(f"{self.name}_count", key, count)
+            yield _series(f"{self.name}_sum", key, values[f"{self.name}_sum"][key])
+
+
+REGISTRY: list[Counter | Histogram] = []
+
+REQUEST_LATENCY = Histogram(
+    "notes_request_duration_seconds",
+    "Time to respond to a request, by URL name, method and status.",
+    LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "notes_request_queries",
+    "SQL queries run by a request, by URL name.",
+    QUERY_BUCKETS,
+)
+EMAILS = Counter(
+    "notes_emails_total",
+    "Emails sent by Celery tasks, by kind and outcome (sent or failed).",
+)
+
+
+def database_connections() -> Iterator[str]:
+    """Connections to the application's database by state, from pg_stat_activity."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+            "WHERE datname = current_database() GROUP BY 1 ORDER BY 1"
+        )
+        rows = cursor.fetchall()
+    yield "# HELP notes_db_connections Open connections to the database by state."
+    yield "# TYPE notes_db_connections gauge"
+    for state, count in rows:
+        yield f"notes_db_connections{{{format_labels(state=state)}}} {count}"
+
+
+def celery_queue_length() -> Iterator[str]:
+    """Tasks waiting in the Celery queues, read from the Redis broker."""
+    broker = settings.CELERY_BROKER_URL
+    if not broker or not broker.startswith(("redis://", "rediss://")):
+        return
+    try:
+        client = redis.Redis.from_url(broker, socket_timeout=1)
+        lengths = {queue: client.llen(queue) for queue in settings.METRICS_QUEUES}
+    except redis.RedisError as error:
+        logger.warning(f"Failed to read the Celery queue length: {error}")
+        return
+    yield "# HELP notes_celery_queue_length Tasks waiting in a Celery queue."
+    yield "# TYPE notes_celery_queue_length gauge"
+    for queue, length in lengths.items():
+        yield f"notes_celery_queue_length{{{format_labels(queue=queue)}}} {length}"
+
+
+def render_metrics() -> str:
+    """
+    All metrics in the Prometheus text exposition format. Other processes'
+    values are as of their last flush.
+    """
+    METRICS_BUFFER.flush(force=True)
+    values = get_store().values()
+    lines = [line for metric in REGISTRY for line in metric.expose(values)]
+    lines.extend(database_connections())
+    lines.extend(celery_queue_length())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Records the latency and the number of SQL queries of every request
+    under the name of the URL pattern that served it.
+
+    Both histograms are added to the process's buffer after the response is
+    built, and the buffer is flushed to the shared store once the flush interval
+    has passed. Removed from the stack when settings.METRICS_ENABLED is False.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        METRICS_BUFFER.add(
+            REQUEST_LATENCY.samples(
+                elapsed, view=view, method=request.method, status=response.status_code
+            )
+            + REQUEST_QUERIES.samples(timer.count, view=view)
+        )
+        METRICS_BUFFER.flush()
+        return response
+
+
+@task_postrun.connect
+def _flush_after_task(**kwargs):
+    METRICS_BUFFER.flush()
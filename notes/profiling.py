@@ -0,0 +1,199 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import CodeType
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_PARAM = "profile"
+TOP_FRAMES = 20
+
+Frame = tuple[str, str, int]
+
+
+class Sampler:
+    """
+    Samples the call stack of one thread from a background thread.
+
+    Every `interval` seconds the target thread's current frame is read with
+    sys._current_frames() and its stack recorded, weighted by the time since
+    the previous sample. The profiled thread itself runs uninstrumented.
+    Frames above `root` (server and middleware code) are left out.
+    """
+
+    def __init__(self, thread_id: int, interval: float, root: CodeType | None = None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root = root
+        self.samples: list[tuple[tuple[Frame, ...], float]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None and frame.f_code is not self.root:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.samples.append((tuple(reversed(stack)), now - last))
+            last = now
+
+    def speedscope(self, name: str) -> dict:
+        """The samples in speedscope's sampled profile format (milliseconds)."""
+        frames: dict[Frame, int] = {}
+        stacks = []
+        for stack, _ in self.samples:
+            stacks.append([frames.setdefault(frame, len(frames)) for frame in stack])
+        weights = [round(seconds * 1000, 3) for _, seconds in self.samples]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "notes.profiling",
+            "shared": {
+                "frames": [
+                    {"name": function, "file": filename, "line": line}
+                    for function, filename, line in frames
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": round(sum(weights), 3),
+                    "samples": stacks,
+                    "weights": weights,
+                }
+            ],
+        }
+
+    def top_frames(self, limit: int = TOP_FRAMES) -> list[dict]:
+        """
+        Functions with the most time on top of the stack (self) and anywhere
+        in it (total), in milliseconds, sorted by self time.
+        """
+        own, total = Counter(), Counter()
+        for stack, seconds in self.samples:
+            own[_label(stack[-1])] += seconds
+            for label in {_label(frame) for frame in stack}:
+                total[label] += seconds
+        return [
+            {
+                "frame": label,
+                "self_ms": round(seconds * 1000, 1),
+                "total_ms": round(total[label] * 1000, 1),
+            }
+            for label, seconds in own.most_common(limit)
+        ]
+
+
+def _label(frame: Frame) -> str:
+    function, filename, _ = frame
+    return f"{function} ({os.path.relpath(filename, settings.BASE_DIR)})"
+
+
+class QueryTimer:
+    """connection.execute_wrapper() that counts queries and sums their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class SamplingProfilerMiddleware:
+    """
+    Profiles a single request on demand, for staff only.
+
+    A request is profiled when it has the X-Profile header or ?profile=1 and
+    comes from a staff user. The view (including template rendering) then
+    runs under a Sampler and a QueryTimer, and two files are written to
+    settings.PROFILING_DIR: <id>.speedscope.json (open at speedscope.app)
+    and <id>.summary.json (top frames and SQL time). The response gets
+    an X-Profile header with the id.
+
+    Other requests only pay for a header and a query string lookup.
+    Removed from the stack when settings.PROFILING_ENABLED is False.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if (
+            not (
+                PROFILE_HEADER in request.headers
+                or request.GET.get(PROFILE_PARAM) == "1"
+            )
+            or not request.user.is_staff
+        ):
+            return self.get_response(request)
+        return self._profile(request)
+
+    def _profile(self, request: HttpRequest) -> HttpResponse:
+        timer = QueryTimer()
+        sampler = Sampler(
+            threading.get_ident(),
+            settings.PROFILING_INTERVAL,
+            root=self._profile.__code__,
+        )
+        start = time.perf_counter()
+        with sampler, connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        profile_id = (
+            f"{timezone.now():%Y%m%d-%H%M%S-%f}-{request.user.pk}-"
+            f"{request.resolver_match.url_name if request.resolver_match else 'none'}"
+        )
+        summary = {
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "total_ms": round(elapsed * 1000, 1),
+            "samples": len(sampler.samples),
+            "sql": {"queries": timer.count, "ms": round(timer.seconds * 1000, 1)},
+            "top_frames": sampler.top_frames(),
+        }
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{profile_id}.speedscope.json").write_text(
+            json.dumps(sampler.speedscope(request.path))
+        )
+        (directory / f"{profile_id}.summary.json").write_text(
+            json.dumps(summary, indent=2)
+        )
+
+        response[PROFILE_HEADER] = profile_id
+        return response
@@ -42,17 +42,22 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "notes_app",
     "users_app",
 ]
 
 MIDDLEWARE = [
+    "notes.metrics.MetricsMiddleware",
+    "notes.timing.ServerTimingMiddleware",
+    "notes.slow_queries.SlowQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "notes.profiling.SamplingProfilerMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -61,7 +66,7 @@ ROOT_URLCONF = "notes.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "notes.timing.TimedDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -146,6 +151,51 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS") == "True"
 EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL") == "True"
+# Deadline reminders sent over one SMTP connection by a send_reminders_task.
+REMINDER_EMAIL_BATCH_SIZE = int(os.getenv("REMINDER_EMAIL_BATCH_SIZE", 100))
+
+# Cache configuration
+# Redis is shared by all gunicorn workers, so cache invalidation reaches every process.
+# Without CACHE_URL a per-process local memory cache is used (development only).
+if os.getenv("CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("CACHE_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Profiling
+# Staff can profile a request with the X-Profile header or ?profile=1,
+# see notes.profiling. Results are written next to the logs.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "True") == "True"
+PROFILING_DIR = BASE_DIR / "logs" / "profiles"
+PROFILING_INTERVAL = 0.001
+
+# Every response gets a Server-Timing header with its SQL, template, cache
+# and view time, see notes.timing.
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "True") == "True"
+
+# Metrics
+# Summed in memory by every process, flushed into one SQLite file every
+# METRICS_FLUSH_INTERVAL seconds and served at /metrics/, see notes.metrics. The web and Celery containers share its directory.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_DB = Path(os.getenv("METRICS_DB", BASE_DIR / "metrics" / "metrics.sqlite3"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_QUEUES = ("celery",)
+METRICS_FLUSH_INTERVAL = 10
+
+# Queries slower than the threshold are logged by fingerprint in every web and
+# Celery process, flushed to the metrics file and reported by `slow_queries`.
+SLOW_QUERY_ENABLED = os.getenv("SLOW_QUERY_ENABLED", "True") == "True"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 100))
+SLOW_QUERY_FLUSH_INTERVAL = 10
 
 # Celery configuration
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
@@ -199,6 +249,21 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute=0, hour=6),
         "args": (),
     },
+    "scan_reminders_every_minute": {
+        "task": "notes_app.tasks.scan_reminders_task",
+        "schedule": crontab(),
+        "args": (),
+    },
+    "schedule_digests_every_hour": {
+        "task": "notes_app.tasks.schedule_digests_task",
+        "schedule": crontab(minute=0),
+        "args": (),
+    },
+    "reconcile_user_stats_daily_at_3am_utc": {
+        "task": "notes_app.tasks.reconcile_user_stats_task",
+        "schedule": crontab(minute=0, hour=3),
+        "args": (),
+    },
 }
 
 STORAGES = {
@@ -206,7 +271,14 @@ STORAGES = {
         "BACKEND": "django.core.files.storage.FileSystemStorage",
         "OPTIONS": {
             "location": MEDIA_ROOT,
-        }
+        },
+    },
+    # Account exports built by Celery, served only through a login-protected view.
+    "exports": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": BASE_DIR / "exports",
+        },
     },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
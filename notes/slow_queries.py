@@ -0,0 +1,204 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+from django.template.base import Node
+
+from .metrics import get_store
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"IN \(\?(?:, \?)*\)")
+_ARRAYS = re.compile(r"ARRAY\[\?(?:,\?)*\]")
+# Multi-row inserts, which Django runs as VALUES or, for many rows, UNNEST.
+_ROWS = re.compile(
+    r"VALUES \(\?(?:, \?)*\)(?:, \(\?(?:, \?)*\))*"
+    r"|SELECT \* FROM UNNEST\(\(ARRAY\[\.\.\.\]\)::\w+\[\](?:, \(ARRAY\[\.\.\.\]\)::\w+\[\])*\)"
+)
+# Generated names of savepoints and server-side cursors.
+_GENERATED_NAMES = re.compile(r'"(?:s\d+_x\d+|_django_curs_\w+)"')
+
+# Call sites kept per fingerprint, the most frequent ones.
+SITES_PER_QUERY = 5
+# Modules wrapping query execution, never the call site of a query.
+_INSTRUMENTATION = {
+    os.path.join(os.path.dirname(__file__), f"{module}.py")
+    for module in ("metrics", "profiling", "slow_queries", "timing")
+}
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Replaces literals, parameters, IN lists, arrays, inserted rows and generated
+    names with placeholders, so queries that differ only in their parameters
+    have the same shape (fingerprint).
+    """
+    sql = _GENERATED_NAMES.sub('"?"', sql.replace("%s", "?"))
+    sql = _LITERALS.sub("?", sql)
+    sql = _ARRAYS.sub("ARRAY[...]", _IN_LISTS.sub("IN (...)", sql))
+    return _ROWS.sub("VALUES (...)", sql)
+
+
+def redact_sql(sql: str) -> str:
+    """The query with its parameters and literals as placeholders."""
+    return _LITERALS.sub("?", sql.replace("%s", "?"))
+
+
+@dataclass
+class SlowQuery:
+    fingerprint: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    # The SQL of the slowest instance, without its parameters and literals,
+    # which may hold note text, emails or token hashes.
+    sample: str = ""
+    sites: Counter = field(default_factory=Counter)
+
+
+class SlowQueryLog:
+    """
+    Slow queries of this process since the last flush, by fingerprint.
+
+    Holds at most `size` fingerprints: when full, a new one replaces the
+    fingerprint with the least total time, unless it took even less.
+    flush() adds the entries to the shared store and empties the log.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.queries: dict[str, SlowQuery] = {}
+        self.flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, sql: str, params, ms: float, site: str) -> None:
+        fingerprint = normalize_sql(sql)
+        with self._lock:
+            entry = self.queries.get(fingerprint)
+            if entry is None:
+                if len(self.queries) >= self.size:
+                    smallest = min(self.queries.values(), key=lambda q: q.total_ms)
+                    if smallest.total_ms >= ms:
+                        return
+                    del self.queries[smallest.fingerprint]
+                entry = self.queries[fingerprint] = SlowQuery(fingerprint)
+
+            entry.count += 1
+            entry.total_ms += ms
+            entry.sites[site] += 1
+            if ms >= entry.max_ms:
+                entry.max_ms = ms
+                entry.sample = redact_sql(sql)[:2000]
+
+    def flush(self, force: bool = False) -> None:
+        """
+        Adds the logged queries to the shared store, at most once per
+        settings.SLOW_QUERY_FLUSH_INTERVAL seconds unless forced.
+        """
+        now = time.monotonic()
+        if not force and now - self.flushed_at < settings.SLOW_QUERY_FLUSH_INTERVAL:
+            return
+        with self._lock:
+            queries, self.queries = list(self.queries.values()), {}
+            self.flushed_at = now
+        if queries:
+            for query in queries:
+                query.sites = Counter(dict(query.sites.most_common(SITES_PER_QUERY)))
+            get_store().add_slow_queries(queries)
+
+
+SLOW_QUERY_LOG = SlowQueryLog(size=200)
+
+# What the current thread is running: "view <url name>" or "task <task name>".
+_current_site: ContextVar[str] = ContextVar("slow_query_site", default="")
+
+
+def call_site() -> str:
+    """
+    Describes where the running query comes from: the view or task, the
+    innermost line of project code and, while rendering, the template line.
+    """
+    parts = [_current_site.get() or "unknown"]
+    code_line = template_line = None
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None and not (code_line and template_line):
+        filename = frame.f_code.co_filename
+        if (
+            code_line is None
+            and filename.startswith(base_dir)
+            and "site-packages" not in filename
+            and filename not in _INSTRUMENTATION
+        ):
+            code_line = f"{filename[len(base_dir) + 1:]}:{frame.f_lineno}"
+        if template_line is None and frame.f_code.co_name == "render_annotated":
+            node = frame.f_locals.get("self")
+            if isinstance(node, Node) and getattr(node, "token", None):
+                origin = node.origin.template_name or node.origin.name
+                template_line = f"{origin}:{node.token.lineno}"
+        frame = frame.f_back
+    return " | ".join(part for part in (*parts, code_line, template_line) if part)
+
+
+def record_slow_queries(execute, sql, params, many, context):
+    """
+    connection.execute_wrapper() that logs queries slower than
+    settings.SLOW_QUERY_THRESHOLD_MS with their fingerprint and call site.
+    """
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        if ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            SLOW_QUERY_LOG.add(sql, params, ms, call_site())
+
+
+class SlowQueryMiddleware:
+    """
+    Logs the slow queries of every request under its URL name and flushes
+    the log to the shared store once the flush interval has passed.
+    Removed from the stack when settings.SLOW_QUERY_ENABLED is False.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        token = _current_site.set("middleware")
+        try:
+            with connection.execute_wrapper(record_slow_queries):
+                response = self.get_response(request)
+        finally:
+            _current_site.reset(token)
+        SLOW_QUERY_LOG.flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _current_site.set(f"view {request.resolver_match.view_name}")
+
+
+@task_prerun.connect
+def _start_task(task, **kwargs):
+    if settings.SLOW_QUERY_ENABLED:
+        _current_site.set(f"task {task.name}")
+        connection.execute_wrappers.append(record_slow_queries)
+
+
+@task_postrun.connect
+def _finish_task(task, **kwargs):
+    if record_slow_queries in connection.execute_wrappers:
+        connection.execute_wrappers.remove(record_slow_queries)
+        _current_site.set("")
+        SLOW_QUERY_LOG.flush()
@@ -0,0 +1,139 @@
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as DjangoTemplate
+
+from .profiling import QueryTimer
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+_DURATION = re.compile(r"^\s*([\w-]+)\s*;.*?\bdur=([\d.]+)")
+
+
+@dataclass
+class RequestTimings:
+    """Time spent by one request in SQL, templates and the cache."""
+
+    queries: QueryTimer = field(default_factory=QueryTimer)
+    template_seconds: float = 0.0
+    template_depth: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def header(self, total: float) -> str:
+        """
+        The Server-Timing header value. SQL run while rendering a template
+        counts as SQL only, so sql, tpl and view add up to total.
+        """
+        sql = self.queries.seconds
+        view = max(total - sql - self.template_seconds, 0)
+        return ", ".join(
+            (
+                f'sql;dur={sql * 1000:.1f};desc="{self.queries.count} queries"',
+                f"tpl;dur={self.template_seconds * 1000:.1f}",
+                f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+                f"view;dur={view * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            )
+        )
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def record_cache(hits: int = 0, misses: int = 0) -> None:
+    """Adds cache lookups to the timings of the current request, if any."""
+    timings = _current.get()
+    if timings is not None:
+        timings.cache_hits += hits
+        timings.cache_misses += misses
+
+
+def parse_server_timing(value: str) -> dict[str, float]:
+    """Returns the duration in milliseconds of every metric of a Server-Timing header."""
+    return {
+        match[1]: float(match[2])
+        for metric in value.split(",")
+        if (match := _DURATION.match(metric))
+    }
+
+
+class TimedTemplate(DjangoTemplate):
+    """
+    Adds its render time to the timings of the current request.
+
+    Only the outermost render is timed, so templates rendered while
+    rendering another one aren't counted twice.
+    """
+
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None or timings.template_depth:
+            return super().render(context, request)
+
+        timings.template_depth += 1
+        start = time.perf_counter()
+        sql_before = timings.queries.seconds
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_depth -= 1
+            elapsed = time.perf_counter() - start
+            timings.template_seconds += elapsed - (timings.queries.seconds - sql_before)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates engine whose templates report their render time.
+
+    Django only sends the template_rendered signal under the test runner,
+    so the render is timed here instead.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header to every response, splitting the request's time into:
+        1. sql - time and number of queries, from a connection.execute_wrapper().
+        2. tpl - template rendering, excluding the SQL run from templates.
+        3. cache - hits and misses of the notes cache.
+        4. view - everything else done by the middleware below and the view.
+        5. total - the whole request as seen by this middleware.
+
+    The timings are kept in a context variable, so the template engine and the
+    cache helpers do nothing but one lookup when this middleware isn't running.
+    Removed from the stack when settings.SERVER_TIMING_ENABLED is False.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings.queries):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        response[SERVER_TIMING_HEADER] = timings.header(time.perf_counter() - start)
+        return response
@@ -10,6 +10,8 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("users/", include("users_app.urls")),
     path("notes/", include("notes_app.urls")),
+    path("api/v1/", include("notes_app.api_urls")),
+    path("metrics/", views.metrics_view, name="metrics"),
 ]
 
 if settings.DEBUG:
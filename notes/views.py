@@ -1,6 +1,11 @@
-from django.http import HttpRequest, HttpResponse
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse
 from django.shortcuts import redirect, render
 
+from .metrics import render_metrics
+
 
 def index_view(request: HttpRequest) -> HttpResponse:
     """
@@ -12,3 +17,23 @@ def index_view(request: HttpRequest) -> HttpResponse:
         return redirect(to="notes_app:note_list")
 
     return render(request, "welcome.html")
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Exposes the metrics of all processes in the Prometheus text format.
+
+    Internal: served to staff users and to scrapers sending
+    "Authorization: Bearer <METRICS_TOKEN>", a 404 for everyone else.
+    """
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if not (
+        (token and hmac.compare_digest(authorization, f"Bearer {token}"))
+        or request.user.is_staff
+    ):
+        raise Http404
+
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
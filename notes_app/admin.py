@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Note, Tag
+from .models import Note, Tag, UserStats
 
 admin.site.register(Tag)
 admin.site.register(Note)
+admin.site.register(UserStats)
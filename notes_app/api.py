@@ -0,0 +1,403 @@
+import json
+
+from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST
+
+from users_app.models import ApiToken, Profile
+
+from .bulk import bulk_update_notes, parse_bulk_request
+from .decorators import api_token_required
+from .filters import TAG_FILTER_MODES, filter_notes_by_tags, parse_tag_names
+from .forms import NoteForm, NoteTodoForm, TagForm
+from .models import Note, Tag
+from .pagination import paginate_by_cursor, parse_cursor
+from .reminders import reminder_time
+from .stats import apply_stats_delta, note_counters
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_BATCH_SIZE = 100
+
+# Public field name -> model field. 'tags' is read from the denormalized
+# Note.tag_names, so serializing notes never joins the M2M relation.
+NOTE_FIELDS = {
+    "id": "id",
+    "name": "name",
+    "description": "description",
+    "done": "done",
+    "is_todo": "is_todo",
+    "deadline": "deadline",
+    "created_at": "created_at",
+    "tags": "tag_names",
+}
+TAG_FIELDS = ("id", "name")
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int = 400, errors: dict | None = None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors
+
+
+def api_response(data: dict, status: int = 200) -> JsonResponse:
+    """JSON response without insignificant whitespace."""
+    return JsonResponse(
+        data, status=status, json_dumps_params={"separators": (",", ":")}
+    )
+
+
+def error_response(error: ApiError) -> JsonResponse:
+    data = {"error": str(error)}
+    if error.errors:
+        data["errors"] = error.errors
+    return api_response(data, status=error.status)
+
+
+def parse_fields(raw_fields: str | None) -> list[str]:
+    """
+    Converts the 'fields' query parameter into a list of public note fields.
+
+    'id' is always included. Missing parameter means all fields.
+    """
+    if not raw_fields:
+        return list(NOTE_FIELDS)
+
+    fields = [name.strip() for name in raw_fields.split(",") if name.strip()]
+    unknown = sorted(set(fields) - set(NOTE_FIELDS))
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}.")
+    return ["id", *(name for name in NOTE_FIELDS if name in fields and name != "id")]
+
+
+def parse_limit(raw_limit: str | None) -> int:
+    try:
+        limit = int(raw_limit)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def parse_ids(raw_ids: str) -> list[int]:
+    """Converts the 'ids' query parameter into a list of unique note IDs, in order."""
+    try:
+        ids = list(dict.fromkeys(int(value) for value in raw_ids.split(",") if value))
+    except ValueError:
+        raise ApiError("'ids' must be a comma-separated list of integers.")
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ApiError(f"At most {MAX_BATCH_SIZE} ids can be fetched at once.")
+    return ids
+
+
+def get_owned_or_404(queryset, request: HttpRequest, pk: int):
+    obj = queryset.filter(pk=pk, user=request.user).first()
+    if obj is None:
+        raise ApiError("Not found.", 404)
+    return obj
+
+
+def read_json(request: HttpRequest) -> dict:
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        raise ApiError("Request body must be valid JSON.")
+    if not isinstance(payload, dict):
+        raise ApiError("Request body must be a JSON object.")
+    return payload
+
+
+def serialize_note(note: Note, fields: list[str]) -> dict:
+    data = {}
+    for name in fields:
+        value = getattr(note, NOTE_FIELDS[name])
+        if name in ("deadline", "created_at") and value is not None:
+            value = value.isoformat()
+        data[name] = value
+    return data
+
+
+def serialize_tag(tag: Tag) -> dict:
+    return {"id": tag.pk, "name": tag.name}
+
+
+def _require_confirmed_profile(request: HttpRequest) -> None:
+    if not Profile.objects.filter(user=request.user, is_confirmed=True).exists():
+        raise ApiError("Your profile must be confirmed to create notes and tags.", 403)
+
+
+def _get_user_tags(request: HttpRequest, names) -> list[Tag]:
+    """Returns the current user's tags with the given names, all of which must exist."""
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        raise ApiError("'tags' must be a list of tag names.")
+
+    tags = list(Tag.objects.filter(user=request.user, name__in=names))
+    unknown = sorted(set(names) - {tag.name for tag in tags})
+    if unknown:
+        raise ApiError(f"Unknown tags: {', '.join(unknown)}.")
+    return tags
+
+
+# AUTH
+
+
+@csrf_exempt
+@require_POST
+def token_create(request: HttpRequest) -> JsonResponse:
+    """
+    Issues an API token for the user with the given credentials.
+
+    Expects a JSON body {"username": ..., "password": ...}.
+    The returned key is shown only once, only its hash is stored.
+    """
+    try:
+        payload = read_json(request)
+    except ApiError as error:
+        return error_response(error)
+
+    user = authenticate(
+        request, username=payload.get("username"), password=payload.get("password")
+    )
+    if user is None:
+        return error_response(ApiError("Invalid username or password.", 401))
+
+    return api_response({"token": ApiToken.issue(user)}, status=201)
+
+
+# NOTES
+
+
+@api_token_required
+@require_http_methods(["GET", "POST"])
+def note_collection(request: HttpRequest) -> JsonResponse:
+    """
+    GET: Lists the current user's notes, newest first.
+        - '?before=<id>&limit=<n>': keyset pagination, 'next' is the cursor of the next page.
+        - '?ids=1,2,3': batch fetch of up to 100 notes in the given order, no pagination.
+        - '?fields=name,tags': sparse fieldset, only these columns are loaded.
+        - '?tags=a,b&mode=all|any': filtering by tags.
+        Every response is a single query for notes, regardless of the page size.
+    POST: Creates a note from {"name", "description", "tags": [names]}.
+    """
+    try:
+        if request.method == "POST":
+            return _create_note(request)
+
+        fields = parse_fields(request.GET.get("fields"))
+        notes = Note.objects.filter(user=request.user).only(
+            *(NOTE_FIELDS[name] for name in fields)
+        )
+
+        if "ids" in request.GET:
+            ids = parse_ids(request.GET["ids"])
+            notes_by_id = {note.pk: note for note in notes.filter(pk__in=ids)}
+            results = [
+                serialize_note(notes_by_id[pk], fields)
+                for pk in ids
+                if pk in notes_by_id
+            ]
+            return api_response({"results": results})
+
+        mode = request.GET.get("mode")
+        if mode not in TAG_FILTER_MODES:
+            mode = "all"
+        notes = filter_notes_by_tags(
+            notes, parse_tag_names(request.GET.get("tags")), mode
+        )
+        page, next_cursor = paginate_by_cursor(
+            notes,
+            parse_cursor(request.GET.get("before")),
+            parse_limit(request.GET.get("limit")),
+        )
+        return api_response(
+            {
+                "results": [serialize_note(note, fields) for note in page],
+                "next": next_cursor,
+            }
+        )
+    except ApiError as error:
+        return error_response(error)
+
+
+def _create_note(request: HttpRequest) -> JsonResponse:
+    _require_confirmed_profile(request)
+    payload = read_json(request)
+    form = NoteForm(payload)
+    if not form.is_valid():
+        raise ApiError("Invalid note.", errors=form.errors.get_json_data())
+    tags = _get_user_tags(request, payload.get("tags", []))
+
+    note = form.save(commit=False)
+    note.user = request.user
+    with transaction.atomic():
+        note.save()
+        note.tags.set(tags)
+        apply_stats_delta(request.user.pk, note_counters(None), note_counters(note))
+    note.tag_names = sorted(tag.name for tag in tags)
+
+    return api_response(serialize_note(note, list(NOTE_FIELDS)), status=201)
+
+
+@api_token_required
+@require_http_methods(["GET", "PATCH", "DELETE"])
+def note_item(request: HttpRequest, note_id: int) -> HttpResponse:
+    """
+    GET: Returns a single note, supports '?fields='.
+    PATCH: Partially updates a note. Accepts "name", "description", "tags" (names),
+        "done" and "deadline". Like the HTML views, marking a note as done ends
+        its To-Do mode, and setting a future deadline turns it into an active To-Do;
+        a null deadline disables To-Do mode.
+    DELETE: Deletes the note.
+    """
+    try:
+        if request.method == "GET":
+            fields = parse_fields(request.GET.get("fields"))
+            note = get_owned_or_404(
+                Note.objects.only(*(NOTE_FIELDS[name] for name in fields)),
+                request,
+                note_id,
+            )
+            return api_response(serialize_note(note, fields))
+
+        note = get_owned_or_404(Note.objects.all(), request, note_id)
+        before = note_counters(note)
+
+        if request.method == "DELETE":
+            with transaction.atomic():
+                note.delete()
+                apply_stats_delta(request.user.pk, before, note_counters(None))
+            return HttpResponse(status=204)
+
+        return _update_note(request, note, before)
+    except ApiError as error:
+        return error_response(error)
+
+
+def _update_note(request: HttpRequest, note: Note, before: dict) -> JsonResponse:
+    payload = read_json(request)
+    if payload.get("done") and payload.get("deadline"):
+        raise ApiError("A note can't be done and have a deadline.")
+
+    form = NoteForm(
+        {
+            "name": payload.get("name", note.name),
+            "description": payload.get("description", note.description),
+        },
+        instance=note,
+    )
+    if not form.is_valid():
+        raise ApiError("Invalid note.", errors=form.errors.get_json_data())
+    tags = _get_user_tags(request, payload["tags"]) if "tags" in payload else None
+
+    if "deadline" in payload:
+        if payload["deadline"] is None:
+            note.is_todo, note.deadline = False, None
+        else:
+            todo_form = NoteTodoForm({"deadline": payload["deadline"]}, instance=note)
+            if not todo_form.is_valid():
+                raise ApiError(
+                    "Invalid deadline.", errors=todo_form.errors.get_json_data()
+                )
+            if todo_form.cleaned_data["deadline"] < timezone.now():
+                raise ApiError("Choose datetime in the future.")
+            note.is_todo, note.done = True, False
+            note.remind_at = reminder_time(note.deadline)
+
+    if "done" in payload:
+        if not isinstance(payload["done"], bool):
+            raise ApiError("'done' must be a boolean.")
+        note.done = payload["done"]
+        if note.done:
+            note.is_todo, note.deadline = False, None
+
+    with transaction.atomic():
+        note.save()
+        if tags is not None:
+            note.tags.set(tags)
+        apply_stats_delta(request.user.pk, before, note_counters(note))
+    if tags is not None:
+        note.tag_names = sorted(tag.name for tag in tags)
+
+    return api_response(serialize_note(note, list(NOTE_FIELDS)))
+
+
+@api_token_required
+@require_POST
+def note_bulk(request: HttpRequest) -> JsonResponse:
+    """
+    Applies one action to many notes: {"action": "delete" | "complete" | "tag" | "untag",
+    "ids": [...], "tag": name}. 'tag' is only needed for tagging actions.
+    Responds with the number of changed notes, IDs of other users' notes are ignored.
+    """
+    try:
+        payload = read_json(request)
+        ids = payload.get("ids")
+        if not isinstance(ids, list):
+            raise ApiError("'ids' must be a list of note IDs.")
+        note_ids, tag = parse_bulk_request(
+            request.user, payload.get("action"), ids, payload.get("tag")
+        )
+    except ApiError as error:
+        return error_response(error)
+    except ValueError as error:
+        return error_response(ApiError(str(error)))
+
+    count = bulk_update_notes(request.user, note_ids, payload["action"], tag)
+    return api_response({"action": payload["action"], "count": count})
+
+
+# TAGS
+
+
+@api_token_required
+@require_http_methods(["GET", "POST"])
+def tag_collection(request: HttpRequest) -> JsonResponse:
+    """
+    GET: Lists the current user's tags, newest first, paginated like notes.
+    POST: Creates a tag from {"name": ...}.
+    """
+    try:
+        if request.method == "GET":
+            tags, next_cursor = paginate_by_cursor(
+                Tag.objects.filter(user=request.user).only(*TAG_FIELDS),
+                parse_cursor(request.GET.get("before")),
+                parse_limit(request.GET.get("limit")),
+            )
+            return api_response(
+                {"results": [serialize_tag(tag) for tag in tags], "next": next_cursor}
+            )
+
+        _require_confirmed_profile(request)
+        form = TagForm(read_json(request))
+        if not form.is_valid():
+            raise ApiError("Invalid tag.", errors=form.errors.get_json_data())
+        tag = form.save(commit=False)
+        tag.user = request.user
+        try:
+            with transaction.atomic():
+                tag.save()
+        except IntegrityError:
+            raise ApiError("You already have a tag with this name.")
+        return api_response(serialize_tag(tag), status=201)
+    except ApiError as error:
+        return error_response(error)
+
+
+@api_token_required
+@require_http_methods(["DELETE"])
+def tag_item(request: HttpRequest, tag_id: int) -> HttpResponse:
+    """
+    DELETE: Deletes a tag, unless it's used by at least one note (409).
+    """
+    try:
+        tag = get_owned_or_404(Tag.objects.all(), request, tag_id)
+        if Note.objects.filter(tags=tag).exists():
+            raise ApiError("Cannot delete tag: it's used by at least one note.", 409)
+    except ApiError as error:
+        return error_response(error)
+
+    tag.delete()
+    return HttpResponse(status=204)
@@ -0,0 +1,14 @@
+from django.urls import path
+
+from . import api
+
+app_name = "notes_api"
+
+urlpatterns = [
+    path("token/", api.token_create, name="token_create"),
+    path("notes/", api.note_collection, name="note_collection"),
+    path("notes/bulk/", api.note_bulk, name="note_bulk"),
+    path("notes/<int:note_id>/", api.note_item, name="note_item"),
+    path("tags/", api.tag_collection, name="tag_collection"),
+    path("tags/<int:tag_id>/", api.tag_item, name="tag_item"),
+]
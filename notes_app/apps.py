@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class NotesAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "notes_app"
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,145 @@
+from typing import Iterable
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from .cache import bump_user_version
+from .models import Note, Tag
+from .search import update_search_vector
+from .stats import apply_stats_delta, note_counters, sum_note_counters
+from .tagging import update_tag_names
+
+BULK_ACTIONS = ("delete", "complete", "tag", "untag")
+MAX_BULK_SIZE = 1000
+
+
+def parse_bulk_request(
+    user: User, action: str | None, raw_ids: Iterable, tag_name: str | None = None
+) -> tuple[list[int], Tag | None]:
+    """
+    Validates a bulk action submitted by a form or the API.
+
+    Returns the note IDs and, for 'tag' and 'untag', the user's tag with the given
+    name. Raises ValueError with a user-facing message if the request is invalid.
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError("Choose a valid bulk action.")
+
+    try:
+        note_ids = list(dict.fromkeys(int(value) for value in raw_ids))
+    except (TypeError, ValueError):
+        raise ValueError("Note IDs must be integers.")
+    if not note_ids:
+        raise ValueError("Select at least one note.")
+    if len(note_ids) > MAX_BULK_SIZE:
+        raise ValueError(f"At most {MAX_BULK_SIZE} notes can be changed at once.")
+
+    tag = None
+    if action in ("tag", "untag"):
+        tag = Tag.objects.filter(user=user, name=(tag_name or "").strip()).first()
+        if tag is None:
+            raise ValueError("Choose one of your tags.")
+
+    return note_ids, tag
+
+
+def bulk_update_notes(
+    user: User, note_ids: list[int], action: str, tag: Tag | None = None
+) -> int:
+    """
+    Applies one action to many of the user's notes and returns how many were changed.
+
+    - delete: deletes the notes.
+    - complete: marks the notes as done, ending their To-Do mode (like note_toggle_status).
+    - tag / untag: adds or removes one of the user's tags.
+
+    Every action is a few set-based statements in one transaction. Ownership is part
+    of the WHERE clause, so IDs of other users' notes are silently ignored.
+    The statements bypass model signals (deletes skip Django's collector too), so
+    stats, denormalized tag names, search vectors and the user's cache version are
+    maintained here explicitly.
+    """
+    notes = Note.objects.filter(user=user, pk__in=note_ids)
+
+    with transaction.atomic():
+        if action == "delete":
+            count = _bulk_delete(user, notes, note_ids)
+        elif action == "complete":
+            count = _bulk_complete(user, notes)
+        elif action in ("tag", "untag"):
+            if tag is None or tag.user_id != user.pk:
+                raise ValueError("Tag must belong to the user.")
+            count = _bulk_set_tag(notes, tag, add=action == "tag")
+        else:
+            raise ValueError(f"Unknown bulk action: {action}")
+
+        if count:
+            transaction.on_commit(lambda: bump_user_version(user.pk))
+
+    return count
+
+
+def _bulk_delete(user: User, notes, note_ids: list[int]) -> int:
+    """
+    Deletes the notes and their tag rows with one DELETE each. QuerySet.delete()
+    would load every note to send post_delete, bumping the cache once per note.
+    Reminder ledger rows are left to the deadline sweep (see ReminderDelivery).
+    """
+    note_table = Note._meta.db_table
+    before = sum_note_counters(notes)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {Note.tags.through._meta.db_table} t USING {note_table} n "
+            f"WHERE t.note_id = n.id AND n.user_id = %s AND n.id = ANY(%s)",
+            [user.pk, note_ids],
+        )
+        cursor.execute(
+            f"DELETE FROM {note_table} WHERE user_id = %s AND id = ANY(%s)",
+            [user.pk, note_ids],
+        )
+        count = cursor.rowcount
+    apply_stats_delta(user.pk, before, note_counters(None))
+    return count
+
+
+def _bulk_complete(user: User, notes) -> int:
+    notes = notes.filter(done=False)
+    before = sum_note_counters(notes)
+    count = notes.update(done=True, is_todo=False, deadline=None)
+    after = {
+        "notes_count": count,
+        "active_todos_count": 0,
+        "completed_count": count,
+        "due_soon_count": 0,
+    }
+    apply_stats_delta(user.pk, before, after)
+    return count
+
+
+def _bulk_set_tag(notes, tag: Tag, add: bool) -> int:
+    """
+    Adds or removes the tag and returns the number of notes that changed:
+    notes that already had (or didn't have) the tag aren't counted nor re-synced.
+    """
+    through = Note.tags.through
+    note_ids = list(notes.values_list("pk", flat=True))
+
+    if add:
+        sql = (
+            f"INSERT INTO {through._meta.db_table} (note_id, tag_id) "
+            f"SELECT unnest(%s::bigint[]), %s "
+            f"ON CONFLICT (note_id, tag_id) DO NOTHING RETURNING note_id"
+        )
+    else:
+        sql = (
+            f"DELETE FROM {through._meta.db_table} "
+            f"WHERE note_id = ANY(%s) AND tag_id = %s RETURNING note_id"
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [note_ids, tag.pk])
+        changed = [note_id for (note_id,) in cursor.fetchall()]
+
+    if changed:
+        update_tag_names(changed)
+        update_search_vector(changed)
+    return len(changed)
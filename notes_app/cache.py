@@ -0,0 +1,125 @@
+import hashlib
+import time
+from typing import Callable, Iterable
+
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+
+from notes.timing import record_cache
+
+from .models import Note
+
+CACHE_TIMEOUT = 60 * 60
+LOCK_TIMEOUT = 10
+
+# Cached HTML must not contain the per-session CSRF token,
+# forms are rendered with this placeholder which is replaced on every request.
+CSRF_PLACEHOLDER = "__csrf_token_placeholder__"
+
+
+def _user_version_key(user_id: int) -> str:
+    return f"notes:user:{user_id}:version"
+
+
+def get_user_version(user_id: int) -> int:
+    """
+    Returns the current cache version of the user's notes.
+
+    A missing version (first visit or eviction) starts from the current time,
+    so entries cached under an older version can never be mistaken for fresh ones.
+    """
+    key = _user_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        record_cache(misses=1)
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    else:
+        record_cache(hits=1)
+    return version
+
+
+def bump_user_version(user_id: int) -> None:
+    """
+    Invalidates every cached page and detail view of the user's notes.
+    """
+    try:
+        cache.incr(_user_version_key(user_id))
+    except ValueError:
+        cache.set(_user_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def get_or_render(key: str, version: int, render: Callable[[], object]) -> object:
+    """
+    Returns the value cached under key if it was stored for the given version,
+    otherwise renders, caches and returns a fresh one.
+
+    Protects from stampedes: when the cached value is outdated, only the request
+    that takes the lock re-renders it, concurrent requests get the previous
+    version meanwhile instead of all rendering at once.
+    """
+    cached = cache.get(key)
+    if cached is not None and cached[0] == version:
+        record_cache(hits=1)
+        return cached[1]
+
+    lock_key = f"{key}:lock"
+    locked = cache.add(lock_key, 1, timeout=LOCK_TIMEOUT)
+    if not locked and cached is not None:
+        record_cache(hits=1)
+        return cached[1]
+
+    record_cache(misses=1)
+    try:
+        value = render()
+        cache.set(key, (version, value), timeout=CACHE_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
+
+
+def note_card_version(note: Note) -> str:
+    """
+    Version of a note card derived from everything the card displays.
+    """
+    fields = (note.name, note.description, note.done, note.is_todo, note.tag_names)
+    return hashlib.md5(repr(fields).encode()).hexdigest()
+
+
+def render_note_cards(notes: Iterable[Note]) -> str:
+    """
+    Renders the dashboard cards of the given notes.
+
+    Each card is cached under a key that contains its version, all cards of
+    the page are fetched from the cache at once and only missing ones are rendered.
+    """
+    keys = {
+        note.pk: f"notes:card:{note.pk}:{note_card_version(note)}" for note in notes
+    }
+    cached = cache.get_many(keys.values())
+
+    cards, missing = [], {}
+    for note in notes:
+        html = cached.get(keys[note.pk])
+        if html is None:
+            html = render_to_string(
+                "notes_app/note_card.html",
+                {"note": note, "csrf_token": CSRF_PLACEHOLDER},
+            )
+            missing[keys[note.pk]] = html
+        cards.append(html)
+
+    record_cache(hits=len(cached), misses=len(missing))
+    if missing:
+        cache.set_many(missing, timeout=CACHE_TIMEOUT)
+    return "".join(cards)
+
+
+def insert_csrf_token(html: str, request: HttpRequest) -> str:
+    """Replaces CSRF placeholders in cached HTML with the token of the current request."""
+    if CSRF_PLACEHOLDER not in html:
+        return html
+    return html.replace(CSRF_PLACEHOLDER, get_token(request))
@@ -2,9 +2,11 @@ from functools import wraps
 from typing import Callable
 
 from django.contrib import messages
+from django.http import JsonResponse
 from django.shortcuts import redirect
+from django.views.decorators.csrf import csrf_exempt
 
-from users_app.models import Profile
+from users_app.models import ApiToken, Profile
 
 
 def profile_confirmed_required(func: Callable) -> Callable:
@@ -28,3 +30,37 @@ def profile_confirmed_required(func: Callable) -> Callable:
         return redirect(to="users_app:profile")
 
     return wrapper
+
+
+def api_token_required(func: Callable) -> Callable:
+    """
+    Authenticates a JSON API request by its 'Authorization: Bearer <key>' header.
+
+    - If the key belongs to an active user: sets request.user and proceeds to the view.
+    - Otherwise: responds with 401 and a JSON error.
+
+    API views don't use sessions, so they are exempt from CSRF checks.
+    """
+
+    @csrf_exempt
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        scheme, _, key = request.headers.get("Authorization", "").partition(" ")
+        token = None
+        if scheme.lower() == "bearer" and key.strip():
+            token = (
+                ApiToken.objects.select_related("user")
+                .filter(key_hash=ApiToken.hash_key(key.strip()), user__is_active=True)
+                .first()
+            )
+        if token is None:
+            return JsonResponse(
+                {"error": "Invalid or missing API token."},
+                status=401,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        request.user = token.user
+        return func(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,149 @@
+import csv
+import json
+import tempfile
+import time
+import zipfile
+from itertools import islice
+from typing import Iterator
+
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.storage import storages
+
+from .models import Note, Tag
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+EXPORT_FIELDS = ("name", "description", "tags", "done", "deadline", "created_at")
+EXPORT_CHUNK_SIZE = 2000
+# Accounts with more notes are exported in the background as a ZIP archive,
+# streaming them would outlive the web worker's timeout.
+EXPORT_STREAM_LIMIT = 100_000
+
+
+def iter_notes(user: User) -> Iterator[dict]:
+    """
+    Yields the user's notes as export records, oldest first.
+
+    Notes are read through a server-side cursor in chunks, so memory use
+    doesn't depend on the number of notes. Tags come from Note.tag_names.
+    """
+    rows = (
+        Note.objects.filter(user=user)
+        .order_by("pk")
+        .values_list(
+            "name", "description", "tag_names", "done", "deadline", "created_at"
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for name, description, tag_names, done, deadline, created_at in rows:
+        yield {
+            "name": name,
+            "description": description,
+            "tags": tag_names,
+            "done": done,
+            "deadline": deadline.isoformat() if deadline else None,
+            "created_at": created_at.isoformat(),
+        }
+
+
+def iter_ndjson(records: Iterator[dict]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, separators=(",", ":")) + "\n"
+
+
+class _Echo:
+    """File-like object that returns what is written, for csv.writer."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(records: Iterator[dict]) -> Iterator[str]:
+    """
+    CSV in the format accepted by the importer, tags are comma-separated.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for record in records:
+        yield writer.writerow(
+            [
+                ",".join(record["tags"]) if name == "tags" else record[name]
+                for name in EXPORT_FIELDS
+            ]
+        )
+
+
+def export_notes(user: User, fmt: str) -> Iterator[str]:
+    """
+    Returns the user's notes serialized as NDJSON or CSV, lazily.
+
+    Lines are joined into chunks, so the response is written in a few
+    large writes instead of one write per note.
+    """
+    serialize = iter_csv if fmt == "csv" else iter_ndjson
+    lines = serialize(iter_notes(user))
+    while chunk := "".join(islice(lines, EXPORT_CHUNK_SIZE)):
+        yield chunk
+
+
+def _export_archives(user_id: int) -> list[str]:
+    """
+    Names of the user's archives in the "exports" storage, oldest first. Each
+    build saves a new archive named after its time, "notes.zip" predates that.
+    """
+    try:
+        _, files = storages["exports"].listdir(str(user_id))
+    except FileNotFoundError:
+        return []
+    archives = [f for f in files if f.startswith("notes") and f.endswith(".zip")]
+    return [
+        f"{user_id}/{f}" for f in sorted(archives, key=lambda f: (f != "notes.zip", f))
+    ]
+
+
+def latest_export_archive(user_id: int) -> str | None:
+    """Returns the name of the user's latest export archive, None if there is none."""
+    archives = _export_archives(user_id)
+    return archives[-1] if archives else None
+
+
+def build_export_archive(user: User) -> str:
+    """
+    Writes a ZIP archive with the user's notes (NDJSON and CSV) and tags
+    to the "exports" storage and returns its name.
+
+    The archive is built in a temporary file, so only one chunk of notes
+    is in memory at a time. It is saved under a new name and older archives
+    are deleted afterwards, so there is always an archive to download, and
+    of overlapping builds the one saved last is kept.
+    """
+    with tempfile.TemporaryFile() as tmp:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for filename, fmt in (("notes.ndjson", "ndjson"), ("notes.csv", "csv")):
+                with archive.open(filename, "w") as entry:
+                    for chunk in export_notes(user, fmt):
+                        entry.write(chunk.encode())
+
+            with archive.open("tags.ndjson", "w") as entry:
+                tags = (
+                    Tag.objects.filter(user=user)
+                    .order_by("name")
+                    .values_list("name", flat=True)
+                    .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+                )
+                for line in iter_ndjson({"name": name} for name in tags):
+                    entry.write(line.encode())
+
+        tmp.seek(0)
+        storage = storages["exports"]
+        name = storage.save(f"{user.pk}/notes-{time.time_ns()}.zip", File(tmp))
+
+    # A later build may have replaced this archive already.
+    archives = _export_archives(user.pk)
+    if name in archives:
+        for old in archives[: archives.index(name)]:
+            storage.delete(old)
+    return name
@@ -0,0 +1,33 @@
+from django.db.models import QuerySet
+
+TAG_FILTER_MODES = ("all", "any")
+
+
+def parse_tag_names(raw_tags: str | None) -> list[str]:
+    """
+    Splits the comma-separated 'tags' query parameter into unique, non-empty names.
+    """
+    if not raw_tags:
+        return []
+    return sorted({name.strip() for name in raw_tags.split(",") if name.strip()})
+
+
+def filter_notes_by_tags(
+    notes: QuerySet, tag_names: list[str], mode: str = "all"
+) -> QuerySet:
+    """
+    Narrows a Note queryset to notes tagged with the given tag names.
+
+    - mode="all": notes that have every one of the tags.
+    - mode="any": notes that have at least one of the tags.
+
+    Both modes are a single condition on the denormalized Note.tag_names array
+    answered from its GIN index, regardless of the number of tags:
+    "all" is array containment (@>), "any" is array overlap (&&).
+    """
+    if not tag_names:
+        return notes
+
+    if mode == "all":
+        return notes.filter(tag_names__contains=tag_names)
+    return notes.filter(tag_names__overlap=tag_names)
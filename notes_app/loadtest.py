@@ -0,0 +1,359 @@
+import html
+import io
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import timedelta
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urlsplit
+from urllib.request import (
+    HTTPCookieProcessor,
+    HTTPRedirectHandler,
+    Request,
+    build_opener,
+)
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+
+from notes.timing import SERVER_TIMING_HEADER, parse_server_timing
+from users_app.models import Profile
+
+from .importer import import_notes
+from .models import Tag
+
+LOADTEST_USERNAME = "loadtest-{}@example.com"
+LOADTEST_PASSWORD = "LoadTest786"
+LOADTEST_TAGS = ("work", "home", "ideas", "errands", "reading")
+
+# Relative frequency of each journey in a session.
+JOURNEY_WEIGHTS = {"browse": 6, "write": 2, "todo": 2}
+SESSION_JOURNEYS = (3, 8)
+SEARCH_WORDS = ("note", "report", "milk", "plan", "idea")
+
+_LINKS = re.compile(r'(?:href|action)="([^"]+)"')
+_NEXT_PAGE = re.compile(r'data-fragment-url="([^"]+)"')
+
+
+@dataclass
+class Sample:
+    name: str
+    status: int
+    seconds: float
+    # Durations from the Server-Timing header, in milliseconds.
+    server_timing: dict[str, float] = field(default_factory=dict)
+
+
+def prepare_users(count: int, notes_per_user: int = 0) -> list[str]:
+    """
+    Returns the usernames of `count` confirmed load-test users, creating
+    the missing ones with their tags and `notes_per_user` notes.
+
+    The password is hashed once for all users, and the notes are loaded
+    with the importer, so preparing a few hundred users takes seconds.
+    """
+    usernames = [LOADTEST_USERNAME.format(i) for i in range(count)]
+    existing = set(
+        User.objects.filter(username__in=usernames).values_list("username", flat=True)
+    )
+    password = make_password(LOADTEST_PASSWORD)
+    rng = random.Random(0)
+
+    for username in usernames:
+        if username in existing:
+            continue
+        user = User.objects.create(username=username, email=username, password=password)
+        Profile.objects.filter(user=user).update(is_confirmed=True)
+        Tag.objects.bulk_create(Tag(name=name, user=user) for name in LOADTEST_TAGS)
+        rows = (
+            {
+                "name": f"{rng.choice(SEARCH_WORDS).title()} {i}",
+                "description": f"Load-test note {i} of {username}",
+                "tags": rng.sample(LOADTEST_TAGS, rng.randint(0, 3)),
+                "done": rng.random() < 0.3,
+            }
+            for i in range(notes_per_user)
+        )
+        stream = io.BytesIO("\n".join(json.dumps(row) for row in rows).encode())
+        import_notes(user, stream, "ndjson")
+
+    return usernames
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    """Returns redirects as responses, so each view is timed on its own."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class VirtualUser:
+    """
+    One simulated user with its own session, running journeys through the site.
+
+    Every request is timed and recorded under the name of the URL pattern
+    that served it, e.g. "notes_app:note_edit".
+    """
+
+    def __init__(self, base_url: str, username: str, rng: random.Random, record):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.rng = rng
+        self.record = record
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), _NoRedirect)
+        self.note_ids: list[int] = []
+
+    def request(self, method: str, path: str, data: dict | None = None) -> str:
+        headers = {}
+        body = None
+        if method == "POST":
+            headers["X-CSRFToken"] = self._csrf_token()
+            headers["Referer"] = self.base_url + path
+            body = urlencode(data or {}, doseq=True).encode()
+
+        start = time.perf_counter()
+        try:
+            response = self.opener.open(
+                Request(self.base_url + path, body, headers, method=method),
+                timeout=30,
+            )
+            status, content = response.status, response.read()
+            timing = response.headers.get(SERVER_TIMING_HEADER)
+        except HTTPError as error:
+            status, content = error.code, error.read()
+            timing = error.headers.get(SERVER_TIMING_HEADER)
+        except (URLError, OSError):
+            status, content, timing = 0, b"", None
+        self.record(
+            Sample(
+                url_name(path),
+                status,
+                time.perf_counter() - start,
+                parse_server_timing(timing) if timing else {},
+            )
+        )
+
+        text = content.decode(errors="replace")
+        self._collect_note_ids(text)
+        return text
+
+    def _csrf_token(self) -> str:
+        return next(
+            (cookie.value for cookie in self.cookies if cookie.name == "csrftoken"), ""
+        )
+
+    def _collect_note_ids(self, text: str) -> None:
+        for link in _LINKS.findall(text):
+            try:
+                match = resolve(urlsplit(html.unescape(link)).path)
+            except Resolver404:
+                continue
+            note_id = match.kwargs.get("note_id")
+            if note_id is not None and note_id not in self.note_ids:
+                self.note_ids.append(note_id)
+
+    def _random_note(self) -> int | None:
+        return self.rng.choice(self.note_ids) if self.note_ids else None
+
+    # SESSION
+
+    def run_session(self) -> None:
+        """Logs in, runs a few weighted journeys and logs out."""
+        self.login()
+        for _ in range(self.rng.randint(*SESSION_JOURNEYS)):
+            journey = self.rng.choices(
+                list(JOURNEY_WEIGHTS), weights=list(JOURNEY_WEIGHTS.values())
+            )[0]
+            getattr(self, journey)()
+        self.request("POST", reverse("users_app:logout"))
+        self.cookies.clear()
+        self.note_ids.clear()
+
+    def login(self) -> None:
+        url = reverse("users_app:login")
+        self.request("GET", url)
+        self.request(
+            "POST", url, {"username": self.username, "password": LOADTEST_PASSWORD}
+        )
+
+    # JOURNEYS
+
+    def browse(self) -> None:
+        """Dashboard, a few more pages, one note, a search and the tags."""
+        page = self.request("GET", reverse("notes_app:note_list"))
+        for _ in range(self.rng.randint(0, 3)):
+            next_page = _NEXT_PAGE.search(page)
+            if not next_page:
+                break
+            page = self.request("GET", html.unescape(next_page.group(1)))
+
+        if note_id := self._random_note():
+            self.request("GET", reverse("notes_app:note_detail", args=[note_id]))
+        search_url = reverse("notes_app:note_search")
+        self.request("GET", f"{search_url}?q={self.rng.choice(SEARCH_WORDS)}")
+        self.request("GET", reverse("notes_app:tag_list"))
+
+    def write(self) -> None:
+        """Creates a note, then edits and completes an existing one."""
+        create_url = reverse("notes_app:note_create")
+        self.request("GET", create_url)
+        self.request(
+            "POST",
+            create_url,
+            {
+                "name": f"Load test {self.rng.randrange(10**6)}",
+                "description": "Created by the load test",
+                "tags": ", ".join(self.rng.sample(LOADTEST_TAGS, 2)),
+            },
+        )
+        self.request("GET", reverse("notes_app:note_list"))
+
+        if note_id := self._random_note():
+            edit_url = reverse("notes_app:note_edit", args=[note_id])
+            self.request("GET", edit_url)
+            self.request(
+                "POST",
+                edit_url,
+                {
+                    "name": f"Edited {self.rng.randrange(10**6)}",
+                    "description": "Edited by the load test",
+                    "tags": self.rng.choice(LOADTEST_TAGS),
+                },
+            )
+            self.request(
+                "POST", reverse("notes_app:note_toggle_status", args=[note_id])
+            )
+
+    def todo(self) -> None:
+        """Sets a deadline on a note, then turns its To-Do mode off again."""
+        self.request("GET", reverse("notes_app:note_list"))
+        note_id = self._random_note()
+        if note_id is None:
+            return
+
+        deadline_url = reverse("notes_app:note_set_deadline", args=[note_id])
+        deadline = timezone.localtime() + timedelta(hours=self.rng.randint(1, 72))
+        self.request("GET", deadline_url)
+        self.request(
+            "POST", deadline_url, {"deadline": deadline.strftime("%Y-%m-%dT%H:%M")}
+        )
+        self.request("GET", reverse("notes_app:note_list"))
+        self.request("POST", reverse("notes_app:note_toggle_todo", args=[note_id]))
+
+
+def url_name(path: str) -> str:
+    """Returns the namespaced name of the URL pattern serving the path."""
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return "unresolved"
+    return match.view_name
+
+
+def run_load_test(
+    base_url: str,
+    usernames: list[str],
+    concurrency: int,
+    duration: float | None = None,
+    sessions: int | None = None,
+    seed: int = 0,
+) -> tuple[list[Sample], float]:
+    """
+    Runs `concurrency` virtual users in threads until `duration` seconds pass
+    or each has run `sessions` sessions. Returns the samples and the elapsed time.
+
+    Virtual user i logs in as usernames[i % len(usernames)] and draws its
+    journeys from random.Random(f"{seed}:{i}"), so runs with the same seed
+    send the same sequence of requests.
+    """
+    samples: list[Sample] = []
+    deadline = time.monotonic() + duration if duration else None
+
+    def run(i: int) -> None:
+        user = VirtualUser(
+            base_url,
+            usernames[i % len(usernames)],
+            random.Random(f"{seed}:{i}"),
+            samples.append,
+        )
+        done = 0
+        while (sessions is None or done < sessions) and (
+            deadline is None or time.monotonic() < deadline
+        ):
+            user.run_session()
+            done += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict:
+    """
+    Aggregates samples per URL name: request count, errors (status 0 or >= 400),
+    count per status, throughput and p50/p95/p99/max latency in milliseconds.
+    When the server sent Server-Timing headers, the mean of each of their
+    durations is added as server_ms.
+    """
+    by_name: dict[str, list[Sample]] = {}
+    for sample in samples:
+        by_name.setdefault(sample.name, []).append(sample)
+
+    views = {}
+    for name, group in sorted(by_name.items()):
+        latencies = sorted(sample.seconds * 1000 for sample in group)
+        views[name] = {
+            "requests": len(group),
+            "errors": sum(1 for sample in group if not 0 < sample.status < 400),
+            "statuses": dict(Counter(str(sample.status) for sample in group)),
+            "rps": round(len(group) / elapsed, 2),
+            **{f"p{p}_ms": round(percentile(latencies, p), 1) for p in (50, 95, 99)},
+            "max_ms": round(latencies[-1], 1),
+        }
+        timings = [sample.server_timing for sample in group if sample.server_timing]
+        if timings:
+            views[name]["server_ms"] = {
+                metric: round(statistics.fmean(t.get(metric, 0) for t in timings), 1)
+                for metric in timings[0]
+            }
+
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": len(samples),
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0,
+        "views": views,
+    }
+
+
+def percentile(sorted_values: list[float], p: int) -> float:
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method="inclusive")[p - 1]
+
+
+def compare(previous: dict, current: dict) -> list[tuple[str, str, float, float]]:
+    """
+    Returns (URL name, metric, previous, current) for the p50/p95/p99 latency
+    of every URL name present in both results.
+    """
+    rows = []
+    for name, stats in current["views"].items():
+        before = previous["views"].get(name)
+        if before is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            rows.append((name, metric, before[metric], stats[metric]))
+    return rows
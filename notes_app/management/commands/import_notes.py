@@ -0,0 +1,47 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from notes_app.importer import (
+    IMPORT_CHUNK_SIZE,
+    IMPORT_FORMATS,
+    detect_format,
+    import_notes,
+)
+
+
+class Command(BaseCommand):
+    help = "Imports notes of one user from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to a .csv or .ndjson file.")
+        parser.add_argument(
+            "--user", required=True, help="Username of the owner of the notes."
+        )
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="File format (default: detected from the file extension).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help=f"Number of rows loaded per transaction (default: {IMPORT_CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+
+        fmt = options["format"] or detect_format(options["path"])
+        if fmt is None:
+            raise CommandError("Can't detect the file format, pass --format.")
+
+        with open(options["path"], "rb") as stream:
+            report = import_notes(user, stream, fmt, options["chunk_size"])
+
+        for error in report.errors:
+            self.stdout.write(self.style.WARNING(error))
+        self.stdout.write(self.style.SUCCESS(str(report)))
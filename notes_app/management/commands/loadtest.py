@@ -0,0 +1,154 @@
+import json
+import subprocess
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from notes_app.loadtest import compare, prepare_users, run_load_test, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs scripted user journeys against a running server and reports "
+        "latency percentiles and throughput per URL name."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            default="http://localhost:8000",
+            help="Server under test (default: http://localhost:8000).",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=20,
+            help="Number of load-test accounts, created if missing (default: 20).",
+        )
+        parser.add_argument(
+            "--notes-per-user",
+            type=int,
+            default=200,
+            help="Notes given to each new load-test account (default: 200).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Number of simultaneous virtual users (default: 20).",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=60,
+            help="Seconds to run for (default: 60).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed of the journeys, equal seeds send equal requests (default: 0).",
+        )
+        parser.add_argument(
+            "--output",
+            default="loadtest.json",
+            help="File the JSON results are written to (default: loadtest.json).",
+        )
+        parser.add_argument(
+            "--compare",
+            metavar="PATH",
+            help="Results of an earlier run to compare the percentiles with.",
+        )
+
+    def handle(self, *args, **options):
+        previous = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as file:
+                    previous = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Can't read {options['compare']}: {error}")
+
+        try:
+            urlopen(options["base_url"], timeout=10)
+        except (URLError, OSError) as error:
+            raise CommandError(f"{options['base_url']} is not reachable: {error}")
+
+        usernames = prepare_users(options["users"], options["notes_per_user"])
+        self.stdout.write(
+            f"Running {options['concurrency']} virtual users against "
+            f"{options['base_url']} for {options['duration']:g}s..."
+        )
+        samples, elapsed = run_load_test(
+            options["base_url"],
+            usernames,
+            options["concurrency"],
+            duration=options["duration"],
+            seed=options["seed"],
+        )
+        if not samples:
+            raise CommandError("No requests were made.")
+
+        results = {
+            "started_at": timezone.now().isoformat(),
+            "revision": _git_revision(),
+            "options": {
+                name: options[name]
+                for name in (
+                    "base_url",
+                    "users",
+                    "notes_per_user",
+                    "concurrency",
+                    "duration",
+                    "seed",
+                )
+            },
+            **summarize(samples, elapsed),
+        }
+        with open(options["output"], "w") as file:
+            json.dump(results, file, indent=2)
+
+        self._write_table(results)
+        if previous:
+            self._write_comparison(previous, results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _write_table(self, results: dict) -> None:
+        self.stdout.write(
+            f"{'URL name':<40} {'reqs':>6} {'errs':>5} {'rps':>7} "
+            f"{'p50':>8} {'p95':>8} {'p99':>8}"
+        )
+        for name, stats in results["views"].items():
+            line = (
+                f"{name:<40} {stats['requests']:>6} {stats['errors']:>5} "
+                f"{stats['rps']:>7} {stats['p50_ms']:>8} {stats['p95_ms']:>8} "
+                f"{stats['p99_ms']:>8}"
+            )
+            self.stdout.write(self.style.ERROR(line) if stats["errors"] else line)
+        self.stdout.write(
+            f"{results['requests']} requests in {results['elapsed_s']}s, "
+            f"{results['rps']} requests/s"
+        )
+
+    def _write_comparison(self, previous: dict, results: dict) -> None:
+        self.stdout.write(
+            f"\nCompared with {previous.get('revision') or 'previous run'}:"
+        )
+        for name, metric, before, after in compare(previous, results):
+            change = (after - before) / before * 100 if before else 0
+            line = f"{name:<40} {metric:<7} {before:>8} -> {after:>8} ({change:+.0f}%)"
+            self.stdout.write(self.style.WARNING(line) if change > 10 else line)
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notes_app.models import Note
+from notes_app.search import update_search_vector
+
+
+class Command(BaseCommand):
+    help = "Backfills or rebuilds the full-text search vectors of notes in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of notes updated per statement (default: 1000).",
+        )
+        parser.add_argument(
+            "--only-missing",
+            action="store_true",
+            help="Index only notes that don't have a search vector yet.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Walks the notes table in primary key order and updates one batch per statement,
+        so each transaction stays short and locks only the rows of the current batch.
+        """
+        batch_size = options["batch_size"]
+        notes = Note.objects.order_by("pk")
+        if options["only_missing"]:
+            notes = notes.filter(search_vector__isnull=True)
+
+        started = time.monotonic()
+        last_pk, total = 0, 0
+
+        while True:
+            batch = list(
+                notes.filter(pk__gt=last_pk).values_list("pk", flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+
+            total += update_search_vector(batch)
+            last_pk = batch[-1]
+            self.stdout.write(f"Indexed {total} notes (last ID {last_pk})")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {total} notes in {elapsed:.1f} seconds.")
+        )
@@ -0,0 +1,94 @@
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from notes_app.seeding import (
+    SEED_BATCH_SIZE,
+    SEED_PASSWORD,
+    SeedOptions,
+    seed_notes,
+    seed_username,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates users with profiles, tags and notes shaped like production data, "
+        "for benchmarks and load tests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=1000, help="Number of users (default: 1000)."
+        )
+        parser.add_argument(
+            "--mean-notes",
+            type=int,
+            default=50,
+            help="Mean number of notes per user, the distribution is skewed "
+            "(default: 50).",
+        )
+        parser.add_argument(
+            "--confirmed-ratio",
+            type=float,
+            default=0.85,
+            help="Share of users with a confirmed profile (default: 0.85).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed, equal seeds generate equal data (default: 0).",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Usernames are <prefix>-<n>@example.com (default: seed).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of parallel processes (default: number of CPUs).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SEED_BATCH_SIZE,
+            help=f"Users loaded per transaction (default: {SEED_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["mean_notes"] < 1:
+            raise CommandError("--users and --mean-notes must be positive.")
+        if User.objects.filter(username=seed_username(options["prefix"], 0)).exists():
+            raise CommandError(
+                f"Users with the prefix '{options['prefix']}' already exist, "
+                f"pass another --prefix."
+            )
+
+        report = seed_notes(
+            options["users"],
+            SeedOptions(
+                seed=options["seed"],
+                prefix=options["prefix"],
+                mean_notes=options["mean_notes"],
+                confirmed_ratio=options["confirmed_ratio"],
+            ),
+            workers=max(options["workers"], 1),
+            batch_size=options["batch_size"],
+            progress=lambda totals: self.stdout.write(
+                f"{totals['users']}/{options['users']} users, "
+                f"{totals['notes']} notes"
+            ),
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {report['users']} users, {report['tags']} tags and "
+                f"{report['notes']} notes in {report['seconds']:.1f}s, "
+                f"{int(report['notes'] / report['seconds'])} notes/s. "
+                f"The password of every user is '{SEED_PASSWORD}'."
+            )
+        )
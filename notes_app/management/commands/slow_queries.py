@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from notes.metrics import get_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports the slowest queries of all web and Celery processes, "
+        "grouped by fingerprint, with the views, tasks and lines running them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Number of fingerprints to show (default: 20).",
+        )
+        parser.add_argument(
+            "--order-by",
+            choices=("total_ms", "max_ms", "count"),
+            default="total_ms",
+            help="What the report is sorted by (default: total_ms).",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the report as JSON.",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Delete the recorded slow queries after reporting them.",
+        )
+
+    def handle(self, *args, **options):
+        store = get_store()
+        queries = store.slow_queries(options["order_by"], options["limit"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(queries, indent=2))
+        elif queries:
+            self._write_report(queries)
+        else:
+            self.stdout.write("No slow queries recorded.")
+
+        if options["reset"]:
+            store.clear_slow_queries()
+            self.stderr.write(self.style.SUCCESS("Slow queries reset."))
+
+    def _write_report(self, queries: list[dict]) -> None:
+        for rank, query in enumerate(queries, start=1):
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"#{rank}  total {query['total_ms']:.0f} ms  "
+                    f"count {query['count']}  "
+                    f"avg {query['total_ms'] / query['count']:.1f} ms  "
+                    f"max {query['max_ms']:.1f} ms"
+                )
+            )
+            self.stdout.write(query["fingerprint"])
+            for site, count in query["sites"]:
+                self.stdout.write(f"  {count:>6}  {site}")
+            self.stdout.write(f"  slowest: {query['sample']}\n")
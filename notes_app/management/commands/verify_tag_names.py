@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+
+from notes_app.cache import bump_user_version
+from notes_app.models import Note
+from notes_app.search import update_search_vector
+from notes_app.tagging import notes_with_tag_names_drift, update_tag_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Finds notes whose denormalized tag_names array doesn't match their tags "
+        "and optionally repairs them in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rewrite tag_names (and search vectors) of notes that drifted.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of notes checked per query (default: 5000).",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Walks the notes table in primary key ranges, so every check is an index
+        range scan and every repair is one short UPDATE of the drifted rows.
+        """
+        batch_size = options["batch_size"]
+        max_pk = Note.objects.order_by("-pk").values_list("pk", flat=True).first()
+        drifted_total = 0
+
+        for start in range(0, max_pk or 0, batch_size):
+            batch = Note.objects.filter(pk__gt=start, pk__lte=start + batch_size)
+            drifted = list(
+                notes_with_tag_names_drift(batch).values_list("pk", flat=True)
+            )
+            if not drifted:
+                continue
+
+            drifted_total += len(drifted)
+            if options["repair"]:
+                update_tag_names(drifted)
+                update_search_vector(drifted)
+                for user_id in set(
+                    Note.objects.filter(pk__in=drifted).values_list(
+                        "user_id", flat=True
+                    )
+                ):
+                    bump_user_version(user_id)
+
+        if not drifted_total:
+            self.stdout.write(self.style.SUCCESS("All notes are in sync."))
+        elif options["repair"]:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {drifted_total} notes."))
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Found {drifted_total} notes out of sync, "
+                    f"run with --repair to fix them."
+                )
+            )
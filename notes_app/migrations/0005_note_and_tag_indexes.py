@@ -0,0 +1,33 @@
+# Indexes are built CONCURRENTLY so they can be applied to a live table
+# without blocking writes. Concurrent index builds can't run inside a transaction.
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("notes_app", "0004_remove_note_is_expired"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="note",
+            index=models.Index(fields=["user", "-id"], name="note_user_id_desc_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="note",
+            index=models.Index(
+                condition=models.Q(is_todo=True),
+                fields=["deadline"],
+                name="note_todo_deadline_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="tag",
+            index=models.Index(fields=["user", "name"], name="tag_user_name_idx"),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# The GIN index is built CONCURRENTLY, so this migration can't run inside a transaction.
+# Existing notes are indexed with `manage.py rebuild_search_index --only-missing`.
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("notes_app", "0005_note_and_tag_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="note",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="note",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="note_search_vector_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Non-atomic: the backfill commits batch by batch and the GIN index is built CONCURRENTLY,
+# so the migration can run against a live table without long locks.
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+BACKFILL_SQL = """
+    UPDATE notes_app_note AS note
+    SET tag_names = ARRAY(
+        SELECT tag.name
+        FROM notes_app_tag AS tag
+        JOIN notes_app_note_tags AS note_tag ON note_tag.tag_id = tag.id
+        WHERE note_tag.note_id = note.id
+        ORDER BY tag.name
+    )
+    WHERE note.id > %s AND note.id <= %s
+"""
+
+
+def backfill_tag_names(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM notes_app_note")
+        (max_id,) = cursor.fetchone()
+        for start in range(0, max_id, BATCH_SIZE):
+            cursor.execute(BACKFILL_SQL, [start, start + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("notes_app", "0006_note_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="note",
+            name="tag_names",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(max_length=25),
+                blank=True,
+                default=list,
+                editable=False,
+                size=None,
+            ),
+        ),
+        migrations.RunPython(backfill_tag_names, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name="note",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["tag_names"], name="note_tag_names_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Non-atomic: the backfill commits batch by batch and the index is built CONCURRENTLY,
+# so the migration can run against a live table without long locks.
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+# Same as notes_app.reminders.set_reminder_times(): a day before the deadline,
+# or now if that has already passed.
+BACKFILL_SQL = """
+    UPDATE notes_app_note
+    SET remind_at = GREATEST(deadline - INTERVAL '1 day', NOW())
+    WHERE is_todo AND deadline IS NOT NULL AND id > %s AND id <= %s
+"""
+
+
+def backfill_remind_at(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM notes_app_note")
+        (max_id,) = cursor.fetchone()
+        for start in range(0, max_id, BATCH_SIZE):
+            cursor.execute(BACKFILL_SQL, [start, start + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("notes_app", "0008_userstats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Watermark",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("value", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="note",
+            name="remind_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_remind_at, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name="note",
+            index=models.Index(
+                condition=models.Q(("is_todo", True)),
+                fields=["remind_at"],
+                name="note_todo_remind_at_idx",
+            ),
+        ),
+    ]
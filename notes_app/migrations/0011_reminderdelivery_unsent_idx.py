@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes_app", "0010_reminderdelivery"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reminderdelivery",
+            index=models.Index(
+                condition=models.Q(("sent_at__isnull", True)),
+                fields=["claimed_at"],
+                name="reminder_delivery_unsent_idx",
+            ),
+        ),
+    ]
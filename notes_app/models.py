@@ -1,3 +1,6 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from users_app.models import User
@@ -16,6 +19,9 @@ class Tag(models.Model):
                 fields=["name", "user"], name="unique tag for username"
             )
         ]
+        indexes = [
+            models.Index(fields=["user", "name"], name="tag_user_name_idx"),
+        ]
 
 
 class Note(models.Model):
@@ -24,9 +30,117 @@ class Note(models.Model):
     done = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     tags = models.ManyToManyField(Tag)
+    # Sorted names of `tags`, kept in sync by signals (see notes_app.tagging).
+    tag_names = ArrayField(
+        models.CharField(max_length=25), default=list, blank=True, editable=False
+    )
     user = models.ForeignKey(User, on_delete=models.CASCADE, default=1)
     is_todo = models.BooleanField(default=False)
     deadline = models.DateTimeField(null=True, blank=True)
+    # When the deadline reminder is due, set together with the deadline
+    # (see notes_app.reminders.reminder_time).
+    remind_at = models.DateTimeField(null=True, blank=True, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.name
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-id"], name="note_user_id_desc_idx"),
+            models.Index(
+                fields=["deadline"],
+                condition=models.Q(is_todo=True),
+                name="note_todo_deadline_idx",
+            ),
+            models.Index(
+                fields=["remind_at"],
+                condition=models.Q(is_todo=True),
+                name="note_todo_remind_at_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="note_search_vector_idx"),
+            GinIndex(fields=["tag_names"], name="note_tag_names_idx"),
+        ]
+
+
+class UserStats(models.Model):
+    """
+    Per-user dashboard counters, updated together with every note mutation.
+
+    expired_count is cumulative (to-dos archived by the deadline sweep), due_soon_count
+    is a snapshot of to-dos due within 24 hours refreshed every minute. Everything
+    except expired_count is periodically recomputed from notes to correct drift.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="note_stats"
+    )
+    notes_count = models.PositiveIntegerField(default=0)
+    active_todos_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    expired_count = models.PositiveIntegerField(default=0)
+    due_soon_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats of {self.user}"
+
+
+class Watermark(models.Model):
+    """
+    How far a periodic scan has got, so the next run only looks at newer rows.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} at {self.value}"
+
+
+class ReminderDelivery(models.Model):
+    """
+    Ledger of deadline reminders: one row per note, deadline and kind.
+
+    A row is claimed before its reminder is scheduled and marked sent right before
+    the email goes out (see notes_app.reminders), so overlapping scans and task
+    retries can't send the same reminder twice. A new deadline is a new reminder.
+    """
+
+    class Kind(models.TextChoices):
+        NOTE = "note", "Reminder"
+        DIGEST = "digest", "Digest"
+
+    # No constraint nor cascade, so deleting notes costs no extra query: rows of
+    # deleted notes are removed with the others once their deadline has passed.
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        # The unique constraint below starts with the note.
+        db_index=False,
+        related_name="reminder_deliveries",
+    )
+    deadline = models.DateTimeField()
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    claimed_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} of {self.note_id} for {self.deadline}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["note", "deadline", "kind"], name="unique reminder delivery"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["deadline"], name="reminder_delivery_deadline_idx"),
+            # Claims left unsent, see notes_app.reminders.reclaim_stale_reminders.
+            models.Index(
+                fields=["claimed_at"],
+                condition=models.Q(sent_at__isnull=True),
+                name="reminder_delivery_unsent_idx",
+            ),
+        ]
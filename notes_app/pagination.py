@@ -0,0 +1,35 @@
+from django.db.models import QuerySet
+
+
+def parse_cursor(raw_cursor: str | None) -> int | None:
+    """
+    Converts the 'before' query parameter into a note ID.
+
+    Missing or malformed cursors are treated as the first page.
+    """
+    try:
+        cursor = int(raw_cursor)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor > 0 else None
+
+
+def paginate_by_cursor(
+    queryset: QuerySet, cursor: int | None, per_page: int
+) -> tuple[list, int | None]:
+    """
+    Returns one page of objects ordered by ID (newest first) and the cursor of the next page.
+
+    Keyset pagination filters by 'id < cursor' instead of using OFFSET, so every page
+    is an index range scan of the same cost and no COUNT(*) is needed. One extra row
+    is fetched to find out whether a next page exists.
+    """
+    if cursor is not None:
+        queryset = queryset.filter(id__lt=cursor)
+
+    objects = list(queryset.order_by("-id")[: per_page + 1])
+    if len(objects) > per_page:
+        objects = objects[:per_page]
+        return objects, objects[-1].id
+
+    return objects, None
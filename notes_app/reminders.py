@@ -0,0 +1,305 @@
+import logging
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable
+
+from django.db import connection, transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Greatest, Now
+from django.utils import timezone
+
+from users_app.models import Profile
+
+from .models import Note, ReminderDelivery, Watermark
+
+logger = logging.getLogger(__name__)
+
+REMINDER_CHUNK_SIZE = 2000
+REMINDER_BATCH_SIZE = 100
+# Reminders are sent this long before the deadline.
+REMINDER_LEAD = timedelta(days=1)
+# Reminders due within the last REMINDER_SCAN_LAG, or since the start of the
+# oldest transaction still running, are left to the next scan (see scan_horizon).
+REMINDER_SCAN_LAG = timedelta(seconds=30)
+# Transactions running for longer don't hold the scan back (see scan_horizon),
+# and a scan whose range ends longer ago than REMINDER_SCAN_WARNING logs a warning.
+REMINDER_MAX_TRANSACTION_AGE = timedelta(minutes=10)
+REMINDER_SCAN_WARNING = timedelta(minutes=2)
+REMINDER_WATERMARK = "reminders"
+# Claimed reminders still unsent after this long are scheduled again: the task
+# sending them was lost (broker down, worker killed) or ran out of retries.
+REMINDER_CLAIM_TIMEOUT = timedelta(minutes=15)
+# Local hour at which the digest of a user in digest mode is sent.
+REMINDER_DIGEST_HOUR = 8
+
+
+def archive_expired_todos(now: datetime) -> dict[int, int]:
+    """
+    Turns off To-Do mode of every note whose deadline has passed and returns
+    the number of archived notes per user.
+
+    A single UPDATE ... RETURNING answered from the partial index on
+    Note.deadline, the IDs of the archived notes never reach Python.
+    Doesn't touch stats or caches.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH expired AS ("
+            f"UPDATE {Note._meta.db_table} SET is_todo = false, deadline = NULL "
+            f"WHERE is_todo AND deadline <= %s RETURNING user_id) "
+            f"SELECT user_id, count(*) FROM expired GROUP BY user_id",
+            [now],
+        )
+        return dict(cursor.fetchall())
+
+
+def reminder_time(deadline: datetime) -> Greatest:
+    """
+    When the reminder of a deadline is due: REMINDER_LEAD before it, or right
+    away for deadlines closer than that. An expression to assign to
+    Note.remind_at before saving: "right away" is read from the database clock,
+    the one scan_due_reminders() runs on, not from this host's.
+    """
+    return Greatest(
+        Value(deadline - REMINDER_LEAD, output_field=DateTimeField()), Now()
+    )
+
+
+def set_reminder_times(note_ids: list[int]) -> int:
+    """Sets remind_at of the given to-dos from their deadlines in one UPDATE."""
+    return Note.objects.filter(
+        pk__in=note_ids, is_todo=True, deadline__isnull=False
+    ).update(remind_at=Greatest(F("deadline") - REMINDER_LEAD, Now()))
+
+
+def scan_horizon(now: datetime | None = None) -> tuple[datetime, datetime]:
+    """
+    Returns the current time by the database clock (or `now`) and the end of the
+    range of reminder times a scan can pick.
+
+    remind_at is never earlier than the start of the transaction that sets it,
+    so rows still uncommitted are all after the start of the oldest running
+    transaction: the range ends there, or REMINDER_SCAN_LAG ago if that's earlier.
+    Only transactions of this database that have written or are running a
+    statement count, idle read-only sessions can't write remind_at in the past.
+    Transactions older than REMINDER_MAX_TRANSACTION_AGE are ignored, so a stuck
+    session delays reminders by that much at most instead of stalling them.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT t.now, LEAST(t.now - %s, ("
+            "SELECT min(xact_start) FROM pg_stat_activity "
+            "WHERE datname = current_database() AND backend_type = 'client backend' "
+            "AND pid <> pg_backend_pid() AND xact_start > t.now - %s "
+            "AND (backend_xid IS NOT NULL OR state = 'active'))) "
+            "FROM (SELECT coalesce(%s, statement_timestamp()) AS now) t",
+            [REMINDER_SCAN_LAG, REMINDER_MAX_TRANSACTION_AGE, now],
+        )
+        now, until = cursor.fetchone()
+
+    if now - until > REMINDER_SCAN_WARNING:
+        logger.warning(
+            f"Reminder scan is {now - until} behind, "
+            f"held back by a transaction started at {until}."
+        )
+    return now, until
+
+
+def scan_due_reminders(
+    schedule: Callable[[list[int]], object],
+    now: datetime | None = None,
+    batch_size: int = REMINDER_BATCH_SIZE,
+    chunk_size: int = REMINDER_CHUNK_SIZE,
+) -> int:
+    """
+    Calls schedule(note_ids) with batches of up to `batch_size` to-dos whose
+    reminder became due since the previous scan and returns their number. The
+    batches are scheduled once the scan is committed, together with its claims
+    and watermark.
+
+    The scan covers remind_at in (watermark, end of scan_horizon()], a range
+    scan of the partial index on Note.remind_at streamed through a server-side
+    cursor, then moves the watermark to its end. Times are read from the
+    database clock unless `now` is given. The watermark row stays locked
+    meanwhile, so overlapping scans run one after another and each reminder
+    time is picked once. The first scan looks back REMINDER_LEAD.
+    Notes of users in digest mode are left to due_digests(), unless they are
+    due before the next digest after their reminder time. Every batch is
+    claimed in the ledger first, so reminders already claimed by an earlier run
+    (after the watermark was reset, say) aren't scheduled again, except those
+    left unsent for REMINDER_CLAIM_TIMEOUT (see reclaim_stale_reminders()).
+    """
+    now, until = scan_horizon(now)
+    count = 0
+
+    with transaction.atomic():
+        watermark, _ = Watermark.objects.select_for_update().get_or_create(
+            name=REMINDER_WATERMARK, defaults={"value": until - REMINDER_LEAD}
+        )
+        stale = reclaim_stale_reminders(ReminderDelivery.Kind.NOTE, now)
+        stale_ids = [note_id for note_ids in stale.values() for note_id in note_ids]
+        for start in range(0, len(stale_ids), batch_size):
+            transaction.on_commit(
+                partial(schedule, stale_ids[start : start + batch_size])
+            )
+        count += len(stale_ids)
+
+        if watermark.value >= until:
+            return count
+
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(
+                f"SELECT n.id FROM {Note._meta.db_table} n "
+                f"JOIN {Profile._meta.db_table} p ON p.user_id = n.user_id "
+                f"WHERE n.is_todo AND n.remind_at > %s AND n.remind_at <= %s "
+                f"AND n.deadline > %s AND (p.reminder_mode = %s "
+                f"OR n.deadline <= {_next_digest_sql('n.remind_at', 'p.timezone')}) "
+                f"ORDER BY n.remind_at",
+                [
+                    watermark.value,
+                    until,
+                    now,
+                    Profile.ReminderMode.PER_NOTE,
+                    REMINDER_DIGEST_HOUR,
+                    REMINDER_DIGEST_HOUR,
+                ],
+            )
+            batch = []
+            while rows := cursor.fetchmany(chunk_size):
+                for (note_id,) in rows:
+                    batch.append(note_id)
+                    if len(batch) == batch_size:
+                        count += _schedule_claimed(batch, schedule)
+                        batch = []
+            if batch:
+                count += _schedule_claimed(batch, schedule)
+
+        watermark.value = until
+        watermark.save(update_fields=["value"])
+
+    return count
+
+
+def _schedule_claimed(
+    note_ids: list[int], schedule: Callable[[list[int]], object]
+) -> int:
+    claimed = claim_reminders(note_ids, ReminderDelivery.Kind.NOTE)
+    if claimed:
+        transaction.on_commit(partial(schedule, claimed))
+    return len(claimed)
+
+
+def _next_digest_sql(at: str, tz: str) -> str:
+    """
+    SQL for the first digest time, REMINDER_DIGEST_HOUR o'clock in the time
+    zone `tz`, at or after the timestamp `at`. Takes the hour twice as a query
+    parameter.
+    """
+    local = f"({at} AT TIME ZONE {tz})"
+    digest = f"(date_trunc('day', {local}) + make_interval(hours => %s))"
+    return (
+        f"(({digest} + CASE WHEN {digest} < {local} THEN INTERVAL '1 day' "
+        f"ELSE INTERVAL '0' END) AT TIME ZONE {tz})"
+    )
+
+
+def due_digests(now: datetime) -> dict[int, list[int]]:
+    """
+    Returns {user_id: note_ids} of the users in digest mode whose local time
+    is REMINDER_DIGEST_HOUR o'clock, with their to-dos due within REMINDER_LEAD,
+    earliest deadline first.
+
+    Run once an hour, this picks every user once a day. The notes are grouped
+    per user in the query, a range scan of the partial index on Note.deadline.
+    To-dos given a deadline after a digest and due before the next one are
+    reminded one by one by scan_due_reminders().
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT n.user_id, array_agg(n.id ORDER BY n.deadline, n.id) "
+            f"FROM {Note._meta.db_table} n "
+            f"JOIN {Profile._meta.db_table} p ON p.user_id = n.user_id "
+            f"WHERE n.is_todo AND n.deadline > %s AND n.deadline <= %s "
+            f"AND p.reminder_mode = %s "
+            f"AND extract(hour FROM %s::timestamptz AT TIME ZONE p.timezone) = %s "
+            f"GROUP BY n.user_id",
+            [
+                now,
+                now + REMINDER_LEAD,
+                Profile.ReminderMode.DIGEST,
+                now,
+                REMINDER_DIGEST_HOUR,
+            ],
+        )
+        return dict(cursor.fetchall())
+
+
+def claim_reminders(note_ids: list[int], kind: str) -> list[int]:
+    """
+    Adds the reminders of the notes' current deadlines to the ledger and returns
+    the IDs of the notes claimed by this call, those already claimed are left out.
+
+    One INSERT ... ON CONFLICT DO NOTHING, answered from the unique index.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {ReminderDelivery._meta.db_table} "
+            f"(note_id, deadline, kind, claimed_at) "
+            f"SELECT id, deadline, %s, %s FROM {Note._meta.db_table} "
+            f"WHERE id = ANY(%s) AND is_todo AND deadline IS NOT NULL "
+            f"ON CONFLICT (note_id, deadline, kind) DO NOTHING RETURNING note_id",
+            [str(kind), timezone.now(), list(note_ids)],
+        )
+        return [note_id for (note_id,) in cursor.fetchall()]
+
+
+def reclaim_stale_reminders(kind: str, now: datetime) -> dict[int, list[int]]:
+    """
+    Claims again the reminders of current deadlines claimed more than
+    REMINDER_CLAIM_TIMEOUT before `now` and still unsent, and returns them as
+    {user_id: note_ids}, earliest deadline first, for the caller to schedule.
+
+    One UPDATE ... RETURNING answered from the partial index on unsent rows.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH r AS (UPDATE {ReminderDelivery._meta.db_table} d "
+            f"SET claimed_at = %s FROM {Note._meta.db_table} n "
+            f"WHERE d.sent_at IS NULL AND d.claimed_at < %s AND d.kind = %s "
+            f"AND d.deadline > %s AND n.id = d.note_id AND n.deadline = d.deadline "
+            f"AND n.is_todo RETURNING n.user_id, d.note_id, d.deadline) "
+            f"SELECT user_id, note_id FROM r ORDER BY deadline, note_id",
+            [now, now - REMINDER_CLAIM_TIMEOUT, str(kind), now],
+        )
+        stale: dict[int, list[int]] = {}
+        for user_id, note_id in cursor.fetchall():
+            stale.setdefault(user_id, []).append(note_id)
+        return stale
+
+
+def start_sending(note_ids: list[int], kind: str) -> list[int]:
+    """
+    Marks the reminders of the notes' current deadlines as sent and returns the
+    IDs of the notes to send them for now: those not sent before, nor being sent.
+
+    Claims reminders missing from the ledger first, so a reminder can be sent
+    without being scheduled by a scan. Call right before sending, and
+    release_reminders() if sending fails.
+    """
+    claim_reminders(note_ids, kind)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {ReminderDelivery._meta.db_table} d SET sent_at = %s "
+            f"FROM {Note._meta.db_table} n "
+            f"WHERE n.id = ANY(%s) AND d.note_id = n.id AND d.deadline = n.deadline "
+            f"AND d.kind = %s AND d.sent_at IS NULL RETURNING d.note_id",
+            [timezone.now(), list(note_ids), str(kind)],
+        )
+        return [note_id for (note_id,) in cursor.fetchall()]
+
+
+def release_reminders(note_ids: list[int], kind: str) -> None:
+    """Marks reminders that failed to send as unsent, so a retry can send them."""
+    ReminderDelivery.objects.filter(
+        note_id__in=note_ids, kind=kind, deadline=F("note__deadline")
+    ).update(sent_at=None)
@@ -0,0 +1,53 @@
+from typing import Iterable
+
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Func, QuerySet, TextField, Value
+
+from .models import Note
+
+SEARCH_CONFIG = "english"
+
+
+def note_search_vector() -> SearchVector:
+    """
+    Weighted search document of a note: name (A), tag names (B), description (C).
+    Tag names are read from the denormalized Note.tag_names array.
+    """
+    tag_names = Func(
+        F("tag_names"),
+        Value(" "),
+        function="array_to_string",
+        output_field=TextField(),
+    )
+    return (
+        SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(tag_names, weight="B", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(note_ids: Iterable[int]) -> int:
+    """
+    Recomputes the stored search vector of the given notes in a single UPDATE.
+
+    Returns the number of updated rows.
+    """
+    return Note.objects.filter(pk__in=list(note_ids)).update(
+        search_vector=note_search_vector()
+    )
+
+
+def search_notes(user: User, query_text: str) -> QuerySet:
+    """
+    Returns the user's notes matching the query, best matches first.
+
+    The query uses web search syntax ("quoted phrases", OR, -excluded words)
+    and is answered from the GIN index on Note.search_vector.
+    """
+    query = SearchQuery(query_text, search_type="websearch", config=SEARCH_CONFIG)
+    return (
+        Note.objects.filter(user=user, search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-id")
+    )
@@ -0,0 +1,200 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+from typing import Callable
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.utils import timezone
+
+from users_app.models import Profile
+
+from .importer import copy_notes
+from .models import Tag
+from .stats import recompute_user_stats
+
+SEED_PASSWORD = "Seeded786"
+SEED_BATCH_SIZE = 500
+MAX_NOTES_PER_USER = 20_000
+# Spread of the log-normal notes-per-user distribution: most users have
+# a few notes, a long tail has thousands.
+NOTES_SIGMA = 1.5
+
+WORDS = (
+    "report budget meeting groceries milk plan trip idea book review call "
+    "invoice garden recipe workout doctor birthday gift project release "
+    "bug design draft email follow-up car insurance rent lesson homework "
+    "movie podcast article backup server cleanup payment tax renovation"
+).split()
+TAG_VOCABULARY = (
+    "work home ideas errands reading health finance travel family shopping "
+    "urgent later study music fitness cooking kids garden car taxes "
+    "projects friends hobby learning movies events"
+).split()
+# Probability of a note having 0, 1, 2, 3 or 4 tags.
+TAGS_PER_NOTE_WEIGHTS = (25, 35, 25, 10, 5)
+DONE_RATIO = 0.3
+TODO_RATIO = 0.25
+OVERDUE_RATIO = 0.1
+
+
+@dataclass(frozen=True)
+class SeedOptions:
+    seed: int = 0
+    prefix: str = "seed"
+    mean_notes: int = 50
+    confirmed_ratio: float = 0.85
+    password_hash: str = ""
+
+
+def seed_username(prefix: str, index: int) -> str:
+    return f"{prefix}-{index}@example.com"
+
+
+def generate_user(options: SeedOptions, index: int, now: datetime) -> dict:
+    """
+    Generates user number `index`: its profile state, tags and notes.
+
+    Everything is drawn from random.Random(f"{seed}:{index}"), so a user's data
+    doesn't depend on the batch or process generating it. Dates are relative
+    to `now`.
+    """
+    rng = random.Random(f"{options.seed}:{index}")
+    mu = math.log(options.mean_notes) - NOTES_SIGMA**2 / 2
+    notes_count = min(int(rng.lognormvariate(mu, NOTES_SIGMA)), MAX_NOTES_PER_USER)
+    tags = sorted(rng.sample(TAG_VOCABULARY, rng.randint(2, 15)))
+    # Earlier tags are used more often.
+    tag_weights = [1 / (rank + 1) for rank in range(len(tags))]
+
+    created = sorted(
+        now - timedelta(seconds=rng.uniform(0, 730 * 86400)) for _ in range(notes_count)
+    )
+    notes = []
+    for created_at in created:
+        tag_count = rng.choices(range(5), weights=TAGS_PER_NOTE_WEIGHTS)[0]
+        done = rng.random() < DONE_RATIO
+        deadline = None
+        if not done and rng.random() < TODO_RATIO:
+            if rng.random() < OVERDUE_RATIO:
+                deadline = now - timedelta(minutes=rng.randint(1, 3 * 1440))
+            else:
+                deadline = now + timedelta(minutes=rng.randint(10, 30 * 1440))
+        notes.append(
+            {
+                "name": " ".join(rng.sample(WORDS, rng.randint(1, 4))).capitalize(),
+                "description": " ".join(rng.choices(WORDS, k=rng.randint(3, 18)))[:150],
+                "tag_names": sorted(
+                    set(rng.choices(tags, weights=tag_weights, k=tag_count))
+                ),
+                "done": done,
+                "is_todo": deadline is not None,
+                "deadline": deadline,
+                "created_at": created_at,
+            }
+        )
+
+    return {
+        "username": seed_username(options.prefix, index),
+        "is_confirmed": rng.random() < options.confirmed_ratio,
+        "date_joined": created[0] if created else now,
+        "tags": tags,
+        "notes": notes,
+    }
+
+
+def seed_batch(options: SeedOptions, indexes: range, now: datetime) -> dict:
+    """
+    Creates the users with the given indexes in one transaction and returns
+    the number of users, tags and notes created.
+
+    Users, profiles and tags are inserted with bulk_create, which sends no
+    post_save signals, so the profile of each user is created here explicitly
+    instead of one at a time by users_app.signals. Notes are loaded with COPY
+    and the users' stats are computed once for the whole batch.
+    """
+    users = [generate_user(options, index, now) for index in indexes]
+
+    with transaction.atomic():
+        created_users = User.objects.bulk_create(
+            User(
+                username=user["username"],
+                email=user["username"],
+                password=options.password_hash,
+                date_joined=user["date_joined"],
+            )
+            for user in users
+        )
+        Profile.objects.bulk_create(
+            Profile(user_id=created.pk, is_confirmed=user["is_confirmed"])
+            for created, user in zip(created_users, users)
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(user_id=created.pk, name=name)
+            for created, user in zip(created_users, users)
+            for name in user["tags"]
+        )
+        tag_ids = {(tag.user_id, tag.name): tag.pk for tag in tags}
+
+        note_ids = copy_notes(
+            {
+                **note,
+                "user_id": created.pk,
+                "tag_ids": [tag_ids[created.pk, name] for name in note["tag_names"]],
+            }
+            for created, user in zip(created_users, users)
+            for note in user["notes"]
+        )
+        recompute_user_stats(created.pk for created in created_users)
+
+    return {"users": len(users), "tags": len(tags), "notes": len(note_ids)}
+
+
+def seed_notes(
+    users: int,
+    options: SeedOptions,
+    workers: int = 1,
+    batch_size: int = SEED_BATCH_SIZE,
+    progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """
+    Generates `users` users with their profiles, tags and notes, split into
+    batches of `batch_size` users loaded by `workers` processes in parallel.
+
+    Returns the total counts and the elapsed seconds. `progress` is called
+    with the running totals after every batch.
+    """
+    started = time.monotonic()
+    now = timezone.now()
+    if not options.password_hash:
+        options = replace(options, password_hash=make_password(SEED_PASSWORD))
+    batches = [
+        range(start, min(start + batch_size, users))
+        for start in range(0, users, batch_size)
+    ]
+    totals = {"users": 0, "tags": 0, "notes": 0}
+
+    def add(counts: dict) -> None:
+        for name, value in counts.items():
+            totals[name] += value
+        if progress:
+            progress(totals)
+
+    if workers == 1:
+        for batch in batches:
+            add(seed_batch(options, batch, now))
+    else:
+        # Forked workers must open their own database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(workers, mp_context=get_context("fork")) as pool:
+            futures = [
+                pool.submit(seed_batch, options, batch, now) for batch in batches
+            ]
+            for future in as_completed(futures):
+                add(future.result())
+
+    return {**totals, "seconds": time.monotonic() - started}
@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import bump_user_version
+from .models import Note, Tag
+from .search import update_search_vector
+from .tagging import update_tag_names
+
+SYNCED_FIELDS = {"name", "description", "tag_names"}
+
+
+@receiver(post_save, sender=Note)
+def sync_note_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keeps the search vector and tag names in sync when a note is saved.
+
+    A full save writes the in-memory tag_names back, which may be stale if tags
+    were changed meanwhile, so it is re-synced from the M2M relation.
+    Saves limited to other fields (e.g. status toggles) are skipped.
+    """
+    if update_fields is not None and not SYNCED_FIELDS & set(update_fields):
+        return
+
+    if created:
+        update_search_vector([instance.pk])
+    else:
+        _sync_note_tags([instance.pk])
+
+
+def _sync_note_tags(note_ids) -> None:
+    """
+    Refreshes the denormalized tag names and then the search vectors built from them.
+    """
+    note_ids = list(note_ids)
+    update_tag_names(note_ids)
+    update_search_vector(note_ids)
+
+
+@receiver(m2m_changed, sender=Note.tags.through)
+def sync_note_tags_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Re-syncs notes whose tags were added, removed or cleared.
+
+    Runs inside the transaction of the M2M change, so Note.tag_names
+    is never out of sync with the relation for other readers.
+    Clearing the notes of a tag doesn't report which notes were affected,
+    so their IDs are remembered on the tag before the clear.
+    """
+    if reverse and action == "pre_clear":
+        instance._cleared_note_ids = list(
+            instance.note_set.values_list("pk", flat=True)
+        )
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        _sync_note_tags([instance.pk])
+    elif action == "post_clear":
+        _sync_note_tags(getattr(instance, "_cleared_note_ids", []))
+    else:
+        _sync_note_tags(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+def sync_note_tags_on_tag_rename(sender, instance, created, **kwargs):
+    """Re-syncs the notes of a tag whose name may have changed."""
+    if not created:
+        _sync_note_tags(instance.note_set.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_notes_of_deleted_tag(sender, instance, **kwargs):
+    """
+    Deleting a tag removes its M2M rows without m2m_changed signals,
+    so the affected notes are remembered before the delete.
+    """
+    instance._deleted_from_note_ids = list(
+        instance.note_set.values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+def sync_note_tags_on_tag_delete(sender, instance, **kwargs):
+    _sync_note_tags(getattr(instance, "_deleted_from_note_ids", []))
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_user_notes_cache(sender, instance, **kwargs):
+    """
+    Bumps the owner's cache version whenever one of their notes or tags changes.
+
+    The bump waits for the commit: a request rendering in the meantime still
+    reads the old rows, and would cache them under the new version otherwise.
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_user_version(user_id))
+
+
+@receiver(m2m_changed, sender=Note.tags.through)
+def invalidate_user_notes_cache_on_tags_change(sender, instance, action, **kwargs):
+    """
+    Bumps the owner's cache version when tags of a note change.
+    Both sides of the relation (Note and Tag) belong to the same user.
+    """
+    if action in ("post_add", "post_remove", "post_clear"):
+        user_id = instance.user_id
+        transaction.on_commit(lambda: bump_user_version(user_id))
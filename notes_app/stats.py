@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count, F, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Note, UserStats
+
+DUE_SOON_WINDOW = timedelta(days=1)
+
+# Counters that can be derived from the current state of a note.
+NOTE_COUNTERS = (
+    "notes_count",
+    "active_todos_count",
+    "completed_count",
+    "due_soon_count",
+)
+
+
+def note_counters(note: Note | None, now: datetime | None = None) -> dict[str, int]:
+    """
+    Returns how much a note contributes to each counter (0 or 1).
+
+    Pass None for a note that doesn't exist (before creation, after deletion).
+    """
+    if note is None:
+        return dict.fromkeys(NOTE_COUNTERS, 0)
+
+    now = now or timezone.now()
+    due_soon = (
+        note.is_todo
+        and note.deadline is not None
+        and now < note.deadline <= now + DUE_SOON_WINDOW
+    )
+    return {
+        "notes_count": 1,
+        "active_todos_count": int(note.is_todo),
+        "completed_count": int(note.done),
+        "due_soon_count": int(due_soon),
+    }
+
+
+def _counter_aggregates(now: datetime) -> dict[str, Count]:
+    """note_counters() as aggregates over a set of notes."""
+    due_soon = Q(is_todo=True, deadline__gt=now, deadline__lte=now + DUE_SOON_WINDOW)
+    return {
+        "notes_count": Count("id"),
+        "active_todos_count": Count("id", filter=Q(is_todo=True)),
+        "completed_count": Count("id", filter=Q(done=True)),
+        "due_soon_count": Count("id", filter=due_soon),
+    }
+
+
+def sum_note_counters(notes: QuerySet, now: datetime | None = None) -> dict[str, int]:
+    """
+    Returns the sum of note_counters() of all notes in the queryset in one query.
+
+    Used to account for set-based changes of many notes with apply_stats_delta().
+    """
+    return notes.aggregate(**_counter_aggregates(now or timezone.now()))
+
+
+def apply_stats_delta(user_id: int, before: dict, after: dict) -> None:
+    """
+    Applies the difference between two note_counters() (or sum_note_counters())
+    results to the user's stats in a single atomic UPDATE.
+    Missing stats are computed from scratch instead.
+
+    Should run in the same transaction as the note change it accounts for.
+    """
+    delta = {name: after[name] - before[name] for name in NOTE_COUNTERS}
+    changes = {
+        name: Greatest(F(name) + value, 0) for name, value in delta.items() if value
+    }
+    if not changes:
+        return
+
+    if not UserStats.objects.filter(user_id=user_id).update(**changes):
+        recompute_user_stats([user_id])
+
+
+def recompute_user_stats(user_ids: Iterable[int]) -> None:
+    """
+    Recomputes the counters of the given users from their notes.
+
+    One aggregate query over the users' notes and one upsert for all of them.
+    expired_count is cumulative and can't be derived from notes, so it is kept.
+    """
+    user_ids = list(user_ids)
+    counts = {
+        row["user_id"]: row
+        for row in Note.objects.filter(user_id__in=user_ids)
+        .values("user_id")
+        .annotate(**_counter_aggregates(timezone.now()))
+        .order_by()
+    }
+
+    UserStats.objects.bulk_create(
+        [
+            UserStats(
+                user_id=user_id,
+                **{
+                    name: counts.get(user_id, {}).get(name, 0) for name in NOTE_COUNTERS
+                },
+            )
+            for user_id in user_ids
+        ],
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=[*NOTE_COUNTERS, "updated_at"],
+    )
+
+
+def refresh_due_soon_counts(now: datetime | None = None) -> None:
+    """
+    Refreshes due_soon_count of all users from the to-dos due within the window.
+    Runs every minute with the reminder scan, so the counter is at most a minute old.
+
+    Only counters that changed are written, both statements are answered from
+    the partial index on Note.deadline.
+    """
+    now = now or timezone.now()
+    due_notes = Note.objects.filter(
+        is_todo=True, deadline__gt=now, deadline__lte=now + DUE_SOON_WINDOW
+    )
+    due_counts = (
+        due_notes.filter(user_id=OuterRef("user_id"))
+        .values("user_id")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+
+    UserStats.objects.filter(due_soon_count__gt=0).exclude(
+        user_id__in=due_notes.values("user_id")
+    ).update(due_soon_count=0)
+    UserStats.objects.filter(user_id__in=due_notes.values("user_id")).exclude(
+        due_soon_count=Subquery(due_counts)
+    ).update(due_soon_count=Subquery(due_counts))
+
+
+def record_expired_todos(expired_per_user: dict[int, int]) -> None:
+    """
+    Moves to-dos archived by the deadline sweep from active to expired counters,
+    in one UPDATE for all users.
+    """
+    if not expired_per_user:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {UserStats._meta.db_table} AS stats SET "
+            f"active_todos_count = greatest(stats.active_todos_count - expired.count, 0), "
+            f"expired_count = stats.expired_count + expired.count "
+            f"FROM unnest(%s::bigint[], %s::integer[]) AS expired(user_id, count) "
+            f"WHERE stats.user_id = expired.user_id",
+            [list(expired_per_user), list(expired_per_user.values())],
+        )
+
+
+def get_user_stats(user: User) -> UserStats:
+    """Returns the user's stats, computing them on first access."""
+    try:
+        return UserStats.objects.get(user=user)
+    except UserStats.DoesNotExist:
+        recompute_user_stats([user.pk])
+        return UserStats.objects.get(user=user)
@@ -0,0 +1,58 @@
+from typing import Iterable
+
+from django.contrib.auth.models import User
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import F, OuterRef, QuerySet
+
+from .models import Note, Tag
+
+
+def tag_names_subquery() -> ArraySubquery:
+    """Sorted names of all tags of the outer note, read from the M2M relation."""
+    return ArraySubquery(
+        Tag.objects.filter(note=OuterRef("pk")).order_by("name").values("name")
+    )
+
+
+def update_tag_names(note_ids: Iterable[int]) -> int:
+    """
+    Copies the tag names of the given notes from the M2M relation into
+    the denormalized Note.tag_names array in a single UPDATE.
+
+    Called from the same transaction that changes the relation, so readers
+    never see the array and the M2M disagree. Returns the number of updated rows.
+    """
+    return Note.objects.filter(pk__in=list(note_ids)).update(
+        tag_names=tag_names_subquery()
+    )
+
+
+def notes_with_tag_names_drift(notes: QuerySet) -> QuerySet:
+    """
+    Narrows a Note queryset to notes whose tag_names array doesn't match their tags.
+    """
+    return notes.annotate(expected_tag_names=tag_names_subquery()).exclude(
+        tag_names=F("expected_tag_names")
+    )
+
+
+def tag_names_page(
+    user: User, prefix: str = "", after: str | None = None, limit: int = 20
+) -> tuple[list[str], str | None]:
+    """
+    Returns one page of the user's tag names starting with the prefix, in name order,
+    and the name to continue after for the next page (or None).
+
+    Pages are addressed by the last name shown instead of an OFFSET. The lower bound
+    on the name lets the scan start at the prefix in the (user, name) index,
+    so a page costs the same however many tags the user has.
+    """
+    start = max(prefix, after or "")
+    tags = Tag.objects.filter(user=user, name__startswith=prefix)
+    tags = tags.filter(name__gt=start) if after else tags.filter(name__gte=start)
+
+    names = list(tags.order_by("name").values_list("name", flat=True)[: limit + 1])
+    if len(names) > limit:
+        names = names[:limit]
+        return names, names[-1]
+    return names, None
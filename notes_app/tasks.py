@@ -1,51 +1,76 @@
 import logging
-from datetime import timedelta
+import zoneinfo
+from functools import partial
+from typing import TypeVar
 
 from celery import shared_task
 from django.conf import settings
-from django.core.mail import send_mail
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
+from django.urls import reverse
 from django.utils import timezone
 
-from .models import Note
+from notes.metrics import EMAILS
+
+from .cache import bump_user_version
+from .exporter import build_export_archive
+from .models import Note, ReminderDelivery
+from .reminders import (
+    archive_expired_todos,
+    claim_reminders,
+    due_digests,
+    reclaim_stale_reminders,
+    release_reminders,
+    scan_due_reminders,
+    start_sending,
+)
+from .stats import recompute_user_stats, record_expired_todos, refresh_due_soon_counts
 
 logger = logging.getLogger("email_tasks")
 
+Key = TypeVar("Key")
+
 
 @shared_task
 def check_deadlines_task():
     """
-    Checks all notes and performs two actions:
+    Sweeps the to-dos with deadlines:
 
-    1. Finds notes with a deadline within 24 hours and schedules email reminders.
-    2. Archives notes whose deadlines have already passed.
+    Archives the notes whose deadline has passed in one UPDATE and moves them
+    from the active to the expired counters of their owners. A range scan of the
+    partial index on Note.deadline, so time depends on the number of expired
+    notes, not on all to-dos.
+    Reminders are scheduled by scan_reminders_task, their ledger rows are
+    deleted here once the deadline has passed.
     """
-    curr_time = timezone.now()
-    day_from_curr_time = curr_time + timedelta(days=1)
+    now = timezone.now()
 
-    notes = Note.objects.filter(is_todo=True, deadline__isnull=False).select_related(
-        "user"
-    )
+    with transaction.atomic():
+        archived_per_user = archive_expired_todos(now)
+        record_expired_todos(archived_per_user)
+    for user_id in archived_per_user:
+        bump_user_version(user_id)
+    if archived_per_user:
+        logger.info(f"Archived {sum(archived_per_user.values())} expired to-do notes.")
 
-    if not notes:
-        logger.info("No notes with deadlines found.")
-        return
-
-    to_notify, to_archive = [], []
-
-    for note in notes:
-        if note.deadline <= curr_time:
-            to_archive.append(note.pk)
-        elif note.deadline <= day_from_curr_time:
-            to_notify.append(note)
+    ReminderDelivery.objects.filter(deadline__lte=now).delete()
 
-    if to_archive:
-        Note.objects.filter(pk__in=to_archive).update(is_todo=False, deadline=None)
-        logger.info(f"Archived {len(to_archive)} expired to-do notes.")
 
-    if to_notify:
-        logger.info(f"Found {len(to_notify)} to-do notes to process")
-        for note in to_notify:
-            send_notification_task.delay(note.pk)
+@shared_task
+def scan_reminders_task():
+    """
+    Schedules the deadline reminders that became due since the previous run
+    and refreshes the due soon counters. Runs every minute, each run only reads
+    the reminders of that minute.
+    """
+    refresh_due_soon_counts()
+    scheduled = scan_due_reminders(
+        send_reminders_task.delay,
+        batch_size=settings.REMINDER_EMAIL_BATCH_SIZE,
+    )
+    if scheduled:
+        logger.info(f"Scheduled reminders for {scheduled} to-do notes.")
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=120)
@@ -64,29 +89,299 @@ def send_notification_task(self, note_id: int) -> None:
         logger.warning(f"Skipping note {note_id}: missing user or email.")
         return
 
+    if not start_sending([note_id], ReminderDelivery.Kind.NOTE):
+        logger.info(f"Skipping note {note_id}: reminder already sent or not due.")
+        return
+
+    recipient = note.user.email
+    try:
+        _reminder_email(note).send(fail_silently=False)
+        EMAILS.inc(kind="deadline_reminder", outcome="sent")
+        logger.info(f"Deadline notification successfully sent to user {recipient}.")
+    except Exception as e:
+        release_reminders([note_id], ReminderDelivery.Kind.NOTE)
+        EMAILS.inc(kind="deadline_reminder", outcome="failed")
+        logger.error(f"Failed to send deadline email for user {recipient}. Retrying...")
+        raise self.retry(exc=e)
+
+
+@shared_task
+def send_reminders_task(note_ids: list[int]) -> None:
+    """
+    Sends the deadline reminders of a batch of notes over one SMTP connection.
+    Only the reminders not sent yet are sent, a message that fails is
+    retried on its own by send_notification_task.
+    """
+    notes = (
+        Note.objects.filter(
+            pk__in=start_sending(note_ids, ReminderDelivery.Kind.NOTE),
+            is_todo=True,
+            deadline__isnull=False,
+        )
+        .exclude(user__email="")
+        .select_related("user")
+    )
+    failed = _send_batch(
+        [(note.pk, _reminder_email(note)) for note in notes], kind="deadline_reminder"
+    )
+    release_reminders(failed, ReminderDelivery.Kind.NOTE)
+    for note_id in failed:
+        send_notification_task.apply_async(
+            (note_id,), countdown=send_notification_task.default_retry_delay
+        )
+
+
+@shared_task
+def schedule_digests_task():
+    """
+    Schedules the digests of the users in digest mode for whom it is
+    REMINDER_DIGEST_HOUR o'clock, REMINDER_EMAIL_BATCH_SIZE digests per task.
+    Runs every hour. Notes already claimed for a digest are left out, unless
+    they were left unsent (see reclaim_stale_reminders). The tasks are sent
+    once the claims are committed, and not at all if claiming fails.
+    """
+    now = timezone.now()
+    due = due_digests(now)
+    with transaction.atomic():
+        claimed = set(
+            claim_reminders(
+                [note_id for note_ids in due.values() for note_id in note_ids],
+                ReminderDelivery.Kind.DIGEST,
+            )
+        )
+        per_user = {
+            user_id: digest
+            for user_id, note_ids in due.items()
+            if (digest := [note_id for note_id in note_ids if note_id in claimed])
+        }
+        stale = reclaim_stale_reminders(ReminderDelivery.Kind.DIGEST, now)
+        for user_id, note_ids in stale.items():
+            per_user[user_id] = per_user.get(user_id, []) + note_ids
+        digests = list(per_user.values())
+        batch_size = settings.REMINDER_EMAIL_BATCH_SIZE
+        for start in range(0, len(digests), batch_size):
+            transaction.on_commit(
+                partial(send_digests_task.delay, digests[start : start + batch_size])
+            )
+    if digests:
+        logger.info(f"Scheduled {len(digests)} reminder digests.")
+
+
+@shared_task
+def send_digests_task(digests: list[list[int]]) -> None:
+    """
+    Sends a batch of digests, each given by the note IDs of one user, over one
+    SMTP connection. Only notes not sent yet are listed, a digest that fails is
+    retried on its own by send_digest_task.
+    """
+    notes_per_user = _digest_notes(
+        start_sending(
+            [note_id for digest in digests for note_id in digest],
+            ReminderDelivery.Kind.DIGEST,
+        )
+    )
+    failed = _send_batch(
+        [
+            ([note.pk for note in notes], _digest_email(notes))
+            for notes in notes_per_user.values()
+        ],
+        kind="deadline_digest",
+    )
+    release_reminders(
+        [note_id for note_ids in failed for note_id in note_ids],
+        ReminderDelivery.Kind.DIGEST,
+    )
+    for note_ids in failed:
+        send_digest_task.apply_async(
+            (note_ids,), countdown=send_digest_task.default_retry_delay
+        )
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=120)
+def send_digest_task(self, note_ids: list[int]) -> None:
+    """
+    Sends the digest of one user's notes.
+    Retries up to 3 times if sending fails.
+    """
+    note_ids = start_sending(note_ids, ReminderDelivery.Kind.DIGEST)
+    for notes in _digest_notes(note_ids).values():
+        recipient = notes[0].user.email
+        try:
+            _digest_email(notes).send(fail_silently=False)
+            EMAILS.inc(kind="deadline_digest", outcome="sent")
+            logger.info(f"Reminder digest successfully sent to user {recipient}.")
+        except Exception as e:
+            release_reminders(note_ids, ReminderDelivery.Kind.DIGEST)
+            EMAILS.inc(kind="deadline_digest", outcome="failed")
+            logger.error(f"Failed to send reminder digest to {recipient}. Retrying...")
+            raise self.retry(exc=e)
+
+
+def _send_batch(messages: list[tuple[Key, EmailMessage]], kind: str) -> list[Key]:
+    """
+    Sends the messages one by one over one SMTP connection, so the connection
+    and TLS setup is paid once per batch, and returns the keys of the messages
+    that failed, for the caller to retry them on their own.
+
+    The connection is reopened after a failure for the rest of the batch,
+    nothing already sent is sent again.
+    """
+    if not messages:
+        return []
+
+    failed = []
+    connection = get_connection(fail_silently=False)
+    try:
+        for key, message in messages:
+            try:
+                connection.open()
+                connection.send_messages([message])
+            except Exception as e:
+                EMAILS.inc(kind=kind, outcome="failed")
+                logger.error(
+                    f"Failed to send {kind} email to {message.to[0]}: {e}. "
+                    f"Retrying it separately..."
+                )
+                failed.append(key)
+                connection.close()
+            else:
+                EMAILS.inc(kind=kind, outcome="sent")
+    finally:
+        connection.close()
+    logger.info(f"Sent {len(messages) - len(failed)} of {len(messages)} {kind} emails.")
+    return failed
+
+
+def _reminder_email(note: Note) -> EmailMessage:
     user = note.user
-    recipient = user.email
-    mail_subject = "Reminder: Don't forget about your note"
+    return EmailMessage(
+        "Reminder: Don't forget about your note",
+        (
+            f"Hello {user.username},\n\n"
+            f"You have a note that is due soon:\n\n"
+            f"Title: {note.name}\n"
+            f"Deadline: {note.deadline.strftime('%Y-%m-%d %H:%M')}\n\n"
+            f"Don't forget to complete it on time!\n\n"
+            f"Best regards,\n"
+            f"Your Notes App"
+        ),
+        settings.EMAIL_HOST_USER,
+        [user.email],
+    )
+
+
+def _digest_notes(note_ids: list[int]) -> dict[int, list[Note]]:
+    """The notes that are still due, with their owners, per user, earliest deadline first."""
+    notes = (
+        Note.objects.filter(pk__in=note_ids, is_todo=True, deadline__gt=timezone.now())
+        .exclude(user__email="")
+        .select_related("user__profile")
+        .order_by("deadline", "pk")
+    )
+    notes_per_user: dict[int, list[Note]] = {}
+    for note in notes:
+        notes_per_user.setdefault(note.user_id, []).append(note)
+    return notes_per_user
+
+
+def _digest_email(notes: list[Note]) -> EmailMessage:
+    """One email listing the notes of a user, deadlines in the user's time zone."""
+    user = notes[0].user
+    tz = zoneinfo.ZoneInfo(user.profile.timezone)
+    due = "\n".join(
+        f"- {note.name} (deadline: {note.deadline.astimezone(tz):%Y-%m-%d %H:%M})"
+        for note in notes
+    )
+    return EmailMessage(
+        f"Reminder: {len(notes)} note{'s' if len(notes) > 1 else ''} due soon",
+        (
+            f"Hello {user.username},\n\n"
+            f"These notes are due within a day:\n\n"
+            f"{due}\n\n"
+            f"Don't forget to complete them on time!\n\n"
+            f"Best regards,\n"
+            f"Your Notes App"
+        ),
+        settings.EMAIL_HOST_USER,
+        [user.email],
+    )
+
+
+@shared_task
+def reconcile_user_stats_task(batch_size: int = 1000) -> None:
+    """
+    Recomputes the dashboard counters of all users from their notes to correct drift.
+
+    Users are processed in primary key batches, each batch is one aggregate query
+    and one upsert, so no long transaction is held.
+    """
+    last_pk, total = 0, 0
+
+    while True:
+        user_ids = list(
+            User.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not user_ids:
+            break
+
+        recompute_user_stats(user_ids)
+        total += len(user_ids)
+        last_pk = user_ids[-1]
+
+    logger.info(f"Reconciled note stats of {total} users.")
+
+
+@shared_task
+def build_export_archive_task(user_id: int, domain: str) -> None:
+    """
+    Builds a ZIP export of all the user's notes and tags for large accounts
+    and schedules the email with a link to download it. The email is sent
+    and retried by its own task, so a failed send doesn't rebuild the archive.
+    """
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        logger.warning(f"Task skipped. User with ID {user_id} not found.")
+        return
+
+    build_export_archive(user)
+    logger.info(f"Export archive of user {user_id} is ready.")
+
+    if user.email:
+        send_export_ready_email_task.delay(user_id, domain)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=120)
+def send_export_ready_email_task(self, user_id: int, domain: str) -> None:
+    """
+    Emails the user a link to download their latest export archive.
+    Retries up to 3 times if sending fails.
+    """
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        logger.warning(f"Task skipped. User with ID {user_id} not found.")
+        return
+
     message = (
         f"Hello {user.username},\n\n"
-        f"You have a note that is due soon:\n\n"
-        f"Title: {note.name}\n"
-        f"Deadline: {note.deadline.strftime('%Y-%m-%d %H:%M')}\n\n"
-        f"Don't forget to complete it on time!\n\n"
+        f"The export of your notes is ready. You can download it here:\n"
+        f"http://{domain}{reverse('notes_app:note_export_archive_download')}\n\n"
         f"Best regards,\n"
         f"Your Notes App"
     )
     try:
         send_mail(
-            mail_subject,
+            "Your notes export is ready",
             message,
             settings.EMAIL_HOST_USER,
-            [
-                recipient,
-            ],
+            [user.email],
             fail_silently=False,
         )
-        logger.info(f"Deadline notification successfully sent to user {recipient}.")
+        EMAILS.inc(kind="export_ready", outcome="sent")
     except Exception as e:
-        logger.error(f"Failed to send deadline email for user {recipient}. Retrying...")
+        EMAILS.inc(kind="export_ready", outcome="failed")
+        logger.error(f"Failed to send export email for user {user.email}. Retrying...")
         raise self.retry(exc=e)
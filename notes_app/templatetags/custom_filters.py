@@ -3,12 +3,13 @@ from django import template
 register = template.Library()
 
 
-def extract_tags(note_tags, limit: int = 5) -> list[str]:
+def extract_tags(tag_names: list[str], limit: int = 5) -> list[str]:
     """
     Extracts, sorts and filters a list of unique tag names.
 
+    Expects the denormalized Note.tag_names array, so no queries are made.
     """
-    unique_tags: list[str] = sorted(set(tag.name for tag in note_tags.all()))
+    unique_tags: list[str] = sorted(set(tag_names))
     if limit == -1:
         return list(unique_tags)
     else:
@@ -0,0 +1,49 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from notes_app.models import Note, Tag
+from notes_app.stats import recompute_user_stats
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def confirmed_user(db):
+    user = User.objects.create_user(
+        username="pradivliany@example.com",
+        email="pradivliany@example.com",
+        password="Super786",
+    )
+    user.profile.is_confirmed = True
+    user.profile.save()
+    return user
+
+
+@pytest.fixture
+def tags(confirmed_user):
+    return [
+        Tag.objects.create(name=name, user=confirmed_user)
+        for name in ("work", "home", "ideas")
+    ]
+
+
+@pytest.fixture
+def make_notes(confirmed_user, tags, django_capture_on_commit_callbacks):
+    def _make_notes(count: int, user: User = confirmed_user) -> list[Note]:
+        with django_capture_on_commit_callbacks(execute=True):
+            notes = Note.objects.bulk_create(
+                Note(name=f"Note {i}", description=f"Description {i}", user=user)
+                for i in range(count)
+            )
+            for note in notes:
+                note.tags.set(tags)
+        recompute_user_stats([user.pk])
+        return notes
+
+    return _make_notes
@@ -0,0 +1,261 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from notes_app.models import Note, Tag, UserStats
+from users_app.models import ApiToken
+
+
+@pytest.fixture
+def api_client(confirmed_user) -> Client:
+    return Client(HTTP_AUTHORIZATION=f"Bearer {ApiToken.issue(confirmed_user)}")
+
+
+def _send(client: Client, method: str, url: str, data: dict):
+    return getattr(client, method)(
+        url, data=json.dumps(data), content_type="application/json"
+    )
+
+
+@pytest.mark.django_db
+class TestApiAuth:
+    def test_token_is_issued_for_valid_credentials(
+        self, client: Client, confirmed_user
+    ):
+        response = _send(
+            client,
+            "post",
+            reverse("notes_api:token_create"),
+            {"username": confirmed_user.username, "password": "Super786"},
+        )
+        assert response.status_code == 201
+        key = response.json()["token"]
+        assert ApiToken.objects.get(user=confirmed_user).key_hash == ApiToken.hash_key(
+            key
+        )
+
+    def test_token_is_not_issued_for_wrong_password(
+        self, client: Client, confirmed_user
+    ):
+        response = _send(
+            client,
+            "post",
+            reverse("notes_api:token_create"),
+            {"username": confirmed_user.username, "password": "wrong"},
+        )
+        assert response.status_code == 401
+
+    @pytest.mark.parametrize("header", [None, "Bearer invalid", "Token abc"])
+    def test_requests_without_valid_token_are_rejected(self, header):
+        client = Client(HTTP_AUTHORIZATION=header) if header else Client()
+        response = client.get(reverse("notes_api:note_collection"))
+        assert response.status_code == 401
+        assert response.json() == {"error": "Invalid or missing API token."}
+
+    def test_writes_do_not_require_csrf_token(self, confirmed_user, tags):
+        client = Client(
+            enforce_csrf_checks=True,
+            HTTP_AUTHORIZATION=f"Bearer {ApiToken.issue(confirmed_user)}",
+        )
+        response = _send(
+            client, "post", reverse("notes_api:tag_collection"), {"name": "travel"}
+        )
+        assert response.status_code == 201
+
+
+@pytest.mark.django_db
+class TestNoteListApi:
+    url = reverse("notes_api:note_collection")
+
+    def test_pages_are_linked_by_cursor(self, api_client: Client, make_notes):
+        notes = make_notes(5)
+
+        first = api_client.get(self.url, {"limit": 3}).json()
+        second = api_client.get(self.url, {"limit": 3, "before": first["next"]}).json()
+
+        ids = [note["id"] for note in first["results"] + second["results"]]
+        assert ids == sorted((note.pk for note in notes), reverse=True)
+        assert second["next"] is None
+
+    def test_sparse_fields(self, api_client: Client, make_notes):
+        make_notes(1)
+
+        response = api_client.get(self.url, {"fields": "name,tags"})
+
+        assert response.json()["results"][0] == {
+            "id": response.json()["results"][0]["id"],
+            "name": "Note 0",
+            "tags": ["home", "ideas", "work"],
+        }
+
+    def test_unknown_field_is_rejected(self, api_client: Client):
+        response = api_client.get(self.url, {"fields": "name,password"})
+        assert response.status_code == 400
+
+    def test_batch_fetch_keeps_order_and_skips_foreign_notes(
+        self, api_client: Client, make_notes, django_user_model
+    ):
+        first, second = make_notes(2)
+        other_user = django_user_model.objects.create_user(username="other")
+        foreign = Note.objects.create(
+            name="Foreign", description="Not mine", user=other_user
+        )
+
+        response = api_client.get(
+            self.url, {"ids": f"{second.pk},{foreign.pk},{first.pk}", "fields": "name"}
+        )
+
+        assert [note["id"] for note in response.json()["results"]] == [
+            second.pk,
+            first.pk,
+        ]
+
+    def test_filter_by_tags(self, api_client: Client, make_notes, confirmed_user):
+        make_notes(2)
+        Note.objects.create(name="Untagged", description="No tags", user=confirmed_user)
+
+        response = api_client.get(self.url, {"tags": "work", "fields": "name"})
+
+        assert len(response.json()["results"]) == 2
+
+    @pytest.mark.parametrize("count", [1, 20])
+    def test_query_count_does_not_depend_on_page_size(
+        self, api_client: Client, make_notes, django_assert_num_queries, count
+    ):
+        make_notes(count)
+        # Token with its user, notes.
+        with django_assert_num_queries(2):
+            response = api_client.get(self.url)
+        assert len(response.json()["results"]) == count
+
+
+@pytest.mark.django_db
+class TestNoteWriteApi:
+    def test_create_note(self, api_client: Client, confirmed_user, tags):
+        response = _send(
+            api_client,
+            "post",
+            reverse("notes_api:note_collection"),
+            {"name": "New note", "description": "Description", "tags": ["work"]},
+        )
+
+        assert response.status_code == 201
+        assert response.json()["tags"] == ["work"]
+        note = Note.objects.get(user=confirmed_user)
+        assert note.tag_names == ["work"]
+        assert UserStats.objects.get(user=confirmed_user).notes_count == 1
+
+    def test_create_note_with_unknown_tag_fails(self, api_client: Client, tags):
+        response = _send(
+            api_client,
+            "post",
+            reverse("notes_api:note_collection"),
+            {"name": "New note", "description": "Description", "tags": ["missing"]},
+        )
+        assert response.status_code == 400
+        assert not Note.objects.exists()
+
+    def test_create_requires_confirmed_profile(
+        self, api_client: Client, confirmed_user
+    ):
+        confirmed_user.profile.is_confirmed = False
+        confirmed_user.profile.save()
+
+        response = _send(
+            api_client,
+            "post",
+            reverse("notes_api:note_collection"),
+            {"name": "New note", "description": "Description"},
+        )
+        assert response.status_code == 403
+
+    def test_patch_deadline_and_done(
+        self, api_client: Client, make_notes, confirmed_user
+    ):
+        note = make_notes(1)[0]
+        url = reverse("notes_api:note_item", args=[note.pk])
+        deadline = timezone.now() + timedelta(hours=5)
+
+        response = _send(api_client, "patch", url, {"deadline": deadline.isoformat()})
+        assert response.json()["is_todo"] is True
+        assert UserStats.objects.get(user=confirmed_user).active_todos_count == 1
+
+        response = _send(api_client, "patch", url, {"done": True})
+        assert response.json()["is_todo"] is False
+        assert response.json()["deadline"] is None
+        stats = UserStats.objects.get(user=confirmed_user)
+        assert (stats.active_todos_count, stats.completed_count) == (0, 1)
+
+    def test_patch_rejects_past_deadline(self, api_client: Client, make_notes):
+        note = make_notes(1)[0]
+        deadline = timezone.now() - timedelta(hours=1)
+
+        response = _send(
+            api_client,
+            "patch",
+            reverse("notes_api:note_item", args=[note.pk]),
+            {"deadline": deadline.isoformat()},
+        )
+        assert response.status_code == 400
+
+    def test_patch_tags(self, api_client: Client, make_notes):
+        note = make_notes(1)[0]
+
+        response = _send(
+            api_client,
+            "patch",
+            reverse("notes_api:note_item", args=[note.pk]),
+            {"tags": ["home"]},
+        )
+
+        assert response.json()["tags"] == ["home"]
+        note.refresh_from_db()
+        assert note.tag_names == ["home"]
+
+    def test_delete_note(self, api_client: Client, make_notes, confirmed_user):
+        note = make_notes(1)[0]
+
+        response = api_client.delete(reverse("notes_api:note_item", args=[note.pk]))
+
+        assert response.status_code == 204
+        assert UserStats.objects.get(user=confirmed_user).notes_count == 0
+
+    def test_foreign_note_is_not_found(self, api_client: Client, django_user_model):
+        other_user = django_user_model.objects.create_user(username="other")
+        note = Note.objects.create(
+            name="Foreign", description="Not mine", user=other_user
+        )
+
+        response = api_client.delete(reverse("notes_api:note_item", args=[note.pk]))
+
+        assert response.status_code == 404
+        assert Note.objects.filter(pk=note.pk).exists()
+
+
+@pytest.mark.django_db
+class TestTagApi:
+    def test_list_tags(self, api_client: Client, tags):
+        response = api_client.get(reverse("notes_api:tag_collection"))
+        assert [tag["name"] for tag in response.json()["results"]] == [
+            "ideas",
+            "home",
+            "work",
+        ]
+
+    def test_duplicate_tag_is_rejected(self, api_client: Client, tags):
+        response = _send(
+            api_client, "post", reverse("notes_api:tag_collection"), {"name": "work"}
+        )
+        assert response.status_code == 400
+
+    def test_used_tag_cannot_be_deleted(self, api_client: Client, tags, make_notes):
+        make_notes(1)
+
+        response = api_client.delete(reverse("notes_api:tag_item", args=[tags[0].pk]))
+
+        assert response.status_code == 409
+        assert Tag.objects.filter(pk=tags[0].pk).exists()
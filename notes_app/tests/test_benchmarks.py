@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from notes_app.filters import filter_notes_by_tags
+from notes_app.models import Note, Tag
+from notes_app.pagination import paginate_by_cursor
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+NOTES_COUNT = 50_000
+TAGS_COUNT = 500
+TAGS_PER_NOTE = 5
+LATENCY_BUDGET_MS = 50
+
+
+@pytest.fixture
+def heavy_user(db):
+    """
+    A user with many tags and notes, each note tagged with a few random tags.
+    """
+    rng = random.Random(42)
+    user = User.objects.create_user(username="heavy", password="Super786")
+    tags = Tag.objects.bulk_create(
+        Tag(name=f"tag-{i}", user=user) for i in range(TAGS_COUNT)
+    )
+    note_tags = [
+        sorted(rng.sample(tags, TAGS_PER_NOTE), key=lambda tag: tag.name)
+        for _ in range(NOTES_COUNT)
+    ]
+    notes = Note.objects.bulk_create(
+        (
+            Note(
+                name=f"Note {i}",
+                description="Description",
+                user=user,
+                tag_names=[tag.name for tag in note_tags[i]],
+            )
+            for i in range(NOTES_COUNT)
+        ),
+        batch_size=5000,
+    )
+    Note.tags.through.objects.bulk_create(
+        (
+            Note.tags.through(note_id=note.pk, tag_id=tag.pk)
+            for note, tags_of_note in zip(notes, note_tags)
+            for tag in tags_of_note
+        ),
+        batch_size=10_000,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE notes_app_note, notes_app_note_tags, notes_app_tag")
+    return user
+
+
+def _median_latency_ms(func, runs: int = 20) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+@pytest.mark.parametrize(
+    "tag_names, mode",
+    [
+        (["tag-1"], "all"),
+        (["tag-1", "tag-2"], "any"),
+        ([f"tag-{i}" for i in range(10)], "any"),
+        (["tag-1", "tag-2"], "all"),
+    ],
+)
+def test_tag_filter_first_page_latency(heavy_user, tag_names, mode):
+    """
+    The first dashboard page filtered by tags is a single query that stays
+    within the latency budget for a user with many notes and tags.
+    """
+    notes = Note.objects.filter(user=heavy_user)
+
+    def first_page():
+        filtered = filter_notes_by_tags(notes, tag_names, mode)
+        return paginate_by_cursor(filtered, None, 9)
+
+    with CaptureQueriesContext(connection) as queries:
+        first_page()
+    assert len(queries) == 1
+
+    latency = _median_latency_ms(first_page)
+    print(f"tags={tag_names} mode={mode}: median {latency:.1f} ms")
+    assert latency < LATENCY_BUDGET_MS
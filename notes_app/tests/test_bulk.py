@@ -0,0 +1,181 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from notes_app.bulk import bulk_update_notes, parse_bulk_request
+from notes_app.models import Note, Tag, UserStats
+from notes_app.search import search_notes
+from users_app.models import ApiToken
+
+
+@pytest.fixture
+def other_note(django_user_model):
+    other_user = django_user_model.objects.create_user(username="other")
+    return Note.objects.create(name="Foreign", description="Not mine", user=other_user)
+
+
+@pytest.mark.django_db
+class TestBulkUpdateNotes:
+    def test_delete_ignores_other_users_notes(
+        self, confirmed_user, make_notes, other_note
+    ):
+        notes = make_notes(3)
+
+        count = bulk_update_notes(
+            confirmed_user, [notes[0].pk, notes[1].pk, other_note.pk], "delete"
+        )
+
+        assert count == 2
+        assert list(Note.objects.filter(user=confirmed_user)) == [notes[2]]
+        assert Note.objects.filter(pk=other_note.pk).exists()
+        assert UserStats.objects.get(user=confirmed_user).notes_count == 1
+
+    def test_delete_skips_per_note_signals(
+        self, mocker, confirmed_user, make_notes, django_capture_on_commit_callbacks
+    ):
+        notes = make_notes(3)
+        signal_bump = mocker.patch("notes_app.signals.bump_user_version")
+        bump = mocker.patch("notes_app.bulk.bump_user_version")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            bulk_update_notes(confirmed_user, [note.pk for note in notes], "delete")
+
+        signal_bump.assert_not_called()
+        bump.assert_called_once_with(confirmed_user.pk)
+        assert not Note.tags.through.objects.exists()
+
+    def test_complete_ends_todo_mode(self, confirmed_user, make_notes):
+        todo, plain, done = make_notes(3)
+        Note.objects.filter(pk=todo.pk).update(
+            is_todo=True, deadline=timezone.now() + timedelta(hours=2)
+        )
+        Note.objects.filter(pk=done.pk).update(done=True)
+        UserStats.objects.filter(user=confirmed_user).update(
+            active_todos_count=1, due_soon_count=1, completed_count=1
+        )
+
+        count = bulk_update_notes(
+            confirmed_user, [todo.pk, plain.pk, done.pk], "complete"
+        )
+
+        assert count == 2
+        assert not Note.objects.filter(done=False).exists()
+        assert not Note.objects.filter(is_todo=True).exists()
+        stats = UserStats.objects.get(user=confirmed_user)
+        assert (stats.active_todos_count, stats.due_soon_count) == (0, 0)
+        assert stats.completed_count == 3
+
+    def test_tag_and_untag_keep_tag_names_and_search_in_sync(
+        self, confirmed_user, make_notes
+    ):
+        notes = make_notes(2)
+        travel = Tag.objects.create(name="travel", user=confirmed_user)
+        note_ids = [note.pk for note in notes]
+
+        assert bulk_update_notes(confirmed_user, note_ids, "tag", travel) == 2
+        # Tagging again changes nothing.
+        assert bulk_update_notes(confirmed_user, note_ids, "tag", travel) == 0
+        assert all(
+            note.tag_names == ["home", "ideas", "travel", "work"]
+            for note in Note.objects.all()
+        )
+        assert search_notes(confirmed_user, "travel").count() == 2
+
+        assert bulk_update_notes(confirmed_user, note_ids, "untag", travel) == 2
+        assert all(
+            note.tag_names == ["home", "ideas", "work"] for note in Note.objects.all()
+        )
+        assert not search_notes(confirmed_user, "travel").exists()
+
+    def test_tag_runs_a_constant_number_of_queries(
+        self, confirmed_user, make_notes, django_assert_max_num_queries
+    ):
+        notes = make_notes(50)
+        travel = Tag.objects.create(name="travel", user=confirmed_user)
+
+        with django_assert_max_num_queries(6):
+            bulk_update_notes(
+                confirmed_user, [note.pk for note in notes], "tag", travel
+            )
+
+    def test_tag_of_other_user_is_rejected(self, confirmed_user, django_user_model):
+        other_user = django_user_model.objects.create_user(username="other")
+        Tag.objects.create(name="foreign", user=other_user)
+
+        with pytest.raises(ValueError):
+            parse_bulk_request(confirmed_user, "tag", ["1"], "foreign")
+
+
+@pytest.mark.django_db
+class TestNoteBulkView:
+    url = reverse("notes_app:note_bulk")
+
+    def test_complete_selected_notes(self, client: Client, confirmed_user, make_notes):
+        notes = make_notes(3)
+        client.force_login(confirmed_user)
+
+        response = client.post(
+            self.url,
+            data={"action": "complete", "note_ids": [notes[0].pk, notes[1].pk]},
+            follow=True,
+        )
+
+        assert Note.objects.filter(done=True).count() == 2
+        assert "2 note(s) marked as completed." in response.content.decode()
+
+    def test_missing_selection_shows_error(self, client: Client, confirmed_user):
+        client.force_login(confirmed_user)
+
+        response = client.post(self.url, data={"action": "delete"}, follow=True)
+
+        assert "Select at least one note." in response.content.decode()
+
+    def test_dashboard_shows_changes_after_bulk_action(
+        self,
+        client: Client,
+        confirmed_user,
+        make_notes,
+        django_capture_on_commit_callbacks,
+    ):
+        note = make_notes(1)[0]
+        client.force_login(confirmed_user)
+        client.get(reverse("notes_app:note_list"))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(self.url, data={"action": "delete", "note_ids": [note.pk]})
+
+        response = client.get(reverse("notes_app:note_list"))
+        assert response.context["note_ids"] == []
+
+
+@pytest.mark.django_db
+class TestNoteBulkApi:
+    def test_untag_selected_notes(self, confirmed_user, make_notes):
+        notes = make_notes(2)
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {ApiToken.issue(confirmed_user)}")
+
+        response = client.post(
+            reverse("notes_api:note_bulk"),
+            data=json.dumps(
+                {"action": "untag", "ids": [note.pk for note in notes], "tag": "work"}
+            ),
+            content_type="application/json",
+        )
+
+        assert response.json() == {"action": "untag", "count": 2}
+        assert not Note.objects.filter(tag_names__contains=["work"]).exists()
+
+    def test_invalid_action_is_rejected(self, confirmed_user):
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {ApiToken.issue(confirmed_user)}")
+
+        response = client.post(
+            reverse("notes_api:note_bulk"),
+            data=json.dumps({"action": "archive", "ids": [1]}),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 400
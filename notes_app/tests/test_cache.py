@@ -0,0 +1,189 @@
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+
+from notes_app.cache import (
+    CSRF_PLACEHOLDER,
+    bump_user_version,
+    get_or_render,
+    get_user_version,
+)
+
+
+class TestGetOrRender:
+    def test_renders_once_per_version(self, mocker):
+        render = mocker.Mock(return_value="html")
+
+        assert get_or_render("key", 1, render) == "html"
+        assert get_or_render("key", 1, render) == "html"
+        render.assert_called_once()
+
+    def test_rerenders_after_version_change(self, mocker):
+        render = mocker.Mock(side_effect=["old", "new"])
+
+        get_or_render("key", 1, render)
+        assert get_or_render("key", 2, render) == "new"
+
+    def test_serves_previous_version_while_another_request_renders(self, mocker):
+        get_or_render("key", 1, lambda: "old")
+        cache.add("key:lock", 1)
+        render = mocker.Mock(return_value="new")
+
+        assert get_or_render("key", 2, render) == "old"
+        render.assert_not_called()
+
+    def test_releases_lock_when_render_fails(self):
+        def failing_render():
+            raise ValueError("Render failed")
+
+        with pytest.raises(ValueError):
+            get_or_render("key", 1, failing_render)
+        assert cache.get("key:lock") is None
+
+
+class TestUserVersion:
+    def test_bump_changes_version(self):
+        version = get_user_version(1)
+        bump_user_version(1)
+        assert get_user_version(1) != version
+
+    def test_bump_of_evicted_version_starts_a_new_one(self):
+        version = get_user_version(1)
+        cache.clear()
+        bump_user_version(1)
+        assert get_user_version(1) > version
+
+
+@pytest.mark.django_db
+class TestDashboardCache:
+    url = reverse("notes_app:note_list")
+
+    def test_unchanged_dashboard_is_served_without_note_queries(
+        self, client: Client, confirmed_user, make_notes, django_assert_num_queries
+    ):
+        make_notes(9)
+        client.force_login(confirmed_user)
+        client.get(self.url)
+
+        # Session, user and stats only.
+        with django_assert_num_queries(3):
+            response = client.get(self.url)
+        assert len(response.context["note_ids"]) == 9
+
+    def test_write_views_invalidate_the_dashboard(
+        self,
+        client: Client,
+        confirmed_user,
+        make_notes,
+        django_capture_on_commit_callbacks,
+    ):
+        note = make_notes(1)[0]
+        client.force_login(confirmed_user)
+        client.get(self.url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("notes_app:note_toggle_status", args=[note.pk]))
+
+        response = client.get(self.url)
+        assert "bg-success" in response.content.decode()
+
+    def test_render_during_a_write_is_not_kept_after_the_commit(
+        self, confirmed_user, make_notes, django_capture_on_commit_callbacks
+    ):
+        note = make_notes(1)[0]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            note.name = "Renamed note"
+            note.save()
+            # Another request renders the committed rows before the write commits.
+            version = get_user_version(confirmed_user.pk)
+            get_or_render("page", version, lambda: "Note 0")
+
+        version = get_user_version(confirmed_user.pk)
+        assert get_or_render("page", version, lambda: "Renamed note") == "Renamed note"
+
+    def test_deleted_note_disappears_from_cached_dashboard(
+        self,
+        client: Client,
+        confirmed_user,
+        make_notes,
+        django_capture_on_commit_callbacks,
+    ):
+        note = make_notes(1)[0]
+        client.force_login(confirmed_user)
+        client.get(self.url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("notes_app:note_delete", args=[note.pk]))
+
+        response = client.get(self.url)
+        assert response.context["note_ids"] == []
+
+    def test_cached_html_contains_current_csrf_token(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        make_notes(1)
+        client.force_login(confirmed_user)
+        client.get(self.url)
+
+        response = client.get(self.url)
+        content = response.content.decode()
+        assert CSRF_PLACEHOLDER not in content
+        assert 'name="csrfmiddlewaretoken"' in content
+
+    def test_cache_is_not_shared_between_users(
+        self, client: Client, confirmed_user, make_notes, django_user_model
+    ):
+        make_notes(1)
+        client.force_login(confirmed_user)
+        client.get(self.url)
+
+        other_user = django_user_model.objects.create_user(
+            username="other", password="Super786"
+        )
+        client.force_login(other_user)
+        response = client.get(self.url)
+        assert response.context["note_ids"] == []
+
+
+@pytest.mark.django_db
+class TestNoteDetailCache:
+    def test_edit_invalidates_cached_detail(
+        self,
+        client: Client,
+        confirmed_user,
+        make_notes,
+        django_capture_on_commit_callbacks,
+    ):
+        note = make_notes(1)[0]
+        url = reverse("notes_app:note_detail", args=[note.pk])
+        client.force_login(confirmed_user)
+        client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(
+                reverse("notes_app:note_edit", args=[note.pk]),
+                data={
+                    "name": "Renamed note",
+                    "description": "New text",
+                    "tags": ["work"],
+                },
+            )
+
+        response = client.get(url)
+        assert "Renamed note" in response.content.decode()
+
+    def test_cached_detail_is_not_shown_to_other_users(
+        self, client: Client, confirmed_user, make_notes, django_user_model
+    ):
+        note = make_notes(1)[0]
+        url = reverse("notes_app:note_detail", args=[note.pk])
+        client.force_login(confirmed_user)
+        client.get(url)
+
+        other_user = django_user_model.objects.create_user(
+            username="other", password="Super786"
+        )
+        client.force_login(other_user)
+        assert client.get(url).status_code == 404
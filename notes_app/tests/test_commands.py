@@ -0,0 +1,58 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from notes_app.models import Note
+
+
+@pytest.mark.django_db
+class TestRebuildSearchIndexCommand:
+    def test_indexes_notes_without_search_vector(self, make_notes):
+        make_notes(5)
+        Note.objects.update(search_vector=None)
+
+        call_command("rebuild_search_index", "--only-missing", "--batch-size", "2")
+
+        assert not Note.objects.filter(search_vector__isnull=True).exists()
+
+    def test_rebuilt_vector_includes_tag_names(self, make_notes):
+        note = make_notes(1)[0]
+        Note.objects.update(search_vector=None)
+
+        call_command("rebuild_search_index")
+
+        assert Note.objects.filter(pk=note.pk, search_vector="ideas").exists()
+
+
+@pytest.mark.django_db
+class TestVerifyTagNamesCommand:
+    def test_reports_drift_without_changing_notes(self, make_notes):
+        note = make_notes(1)[0]
+        Note.objects.update(tag_names=["stale"])
+
+        out = StringIO()
+        call_command("verify_tag_names", stdout=out)
+
+        assert "Found 1 notes out of sync" in out.getvalue()
+        note.refresh_from_db()
+        assert note.tag_names == ["stale"]
+
+    def test_repairs_drifted_notes(self, make_notes):
+        notes = make_notes(3)
+        Note.objects.filter(pk=notes[0].pk).update(tag_names=[])
+
+        out = StringIO()
+        call_command("verify_tag_names", "--repair", "--batch-size", "1", stdout=out)
+
+        assert "Repaired 1 notes" in out.getvalue()
+        notes[0].refresh_from_db()
+        assert notes[0].tag_names == ["home", "ideas", "work"]
+
+    def test_reports_notes_in_sync(self, make_notes):
+        make_notes(2)
+
+        out = StringIO()
+        call_command("verify_tag_names", stdout=out)
+
+        assert "All notes are in sync" in out.getvalue()
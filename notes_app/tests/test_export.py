@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+import zipfile
+
+import pytest
+from celery.exceptions import Retry
+from django.core import mail
+from django.test import Client
+from django.urls import reverse
+
+from notes_app.exporter import build_export_archive, latest_export_archive
+from notes_app.importer import import_notes
+from notes_app.models import Note
+from notes_app.tasks import build_export_archive_task, send_export_ready_email_task
+
+
+@pytest.fixture
+def exports_storage(settings, tmp_path):
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "exports": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": tmp_path},
+        },
+    }
+    return tmp_path
+
+
+def _download(response) -> str:
+    return b"".join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestNoteExportView:
+    url = reverse("notes_app:note_export")
+
+    def test_ndjson_export(self, client: Client, confirmed_user, make_notes):
+        make_notes(3)
+        client.force_login(confirmed_user)
+
+        response = client.get(self.url, {"format": "ndjson"})
+
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+        records = [json.loads(line) for line in _download(response).splitlines()]
+        assert [record["name"] for record in records] == ["Note 0", "Note 1", "Note 2"]
+        assert records[0]["tags"] == ["home", "ideas", "work"]
+
+    def test_csv_export_can_be_imported_back(
+        self, client: Client, confirmed_user, make_notes, django_user_model
+    ):
+        make_notes(2)
+        client.force_login(confirmed_user)
+
+        content = _download(client.get(self.url, {"format": "csv"}))
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert rows[0]["tags"] == "home,ideas,work"
+        other_user = django_user_model.objects.create_user(username="other")
+        report = import_notes(other_user, io.BytesIO(content.encode()), "csv")
+        assert report.created == 2
+        assert Note.objects.filter(user=other_user).first().tag_names == [
+            "home",
+            "ideas",
+            "work",
+        ]
+
+    def test_export_reads_notes_in_chunks(
+        self, client: Client, confirmed_user, make_notes, mocker
+    ):
+        mocker.patch("notes_app.exporter.EXPORT_CHUNK_SIZE", 2)
+        make_notes(5)
+        client.force_login(confirmed_user)
+
+        response = client.get(self.url, {"format": "ndjson"})
+
+        assert len(list(response.streaming_content)) == 3
+
+    def test_large_accounts_are_redirected_to_archive(
+        self, client: Client, confirmed_user, make_notes, mocker
+    ):
+        mocker.patch("notes_app.views.EXPORT_STREAM_LIMIT", 1)
+        make_notes(2)
+        client.force_login(confirmed_user)
+
+        response = client.get(self.url, {"format": "csv"})
+
+        assert response.status_code == 302
+        assert response.headers["Location"] == self.url
+
+    def test_export_page(self, client: Client, confirmed_user, exports_storage):
+        client.force_login(confirmed_user)
+
+        response = client.get(self.url)
+
+        assert response.status_code == 200
+        assert response.context["archive_created_at"] is None
+
+
+@pytest.mark.django_db
+class TestExportArchive:
+    def test_request_schedules_task(self, client: Client, confirmed_user, mocker):
+        delay = mocker.patch("notes_app.views.build_export_archive_task.delay")
+        client.force_login(confirmed_user)
+
+        client.post(reverse("notes_app:note_export_archive"))
+
+        delay.assert_called_once_with(confirmed_user.pk, "testserver")
+
+    def test_task_builds_archive_and_emails_link(
+        self, client: Client, confirmed_user, make_notes, exports_storage, mocker
+    ):
+        make_notes(2)
+        delay = mocker.patch("notes_app.tasks.send_export_ready_email_task.delay")
+
+        build_export_archive_task(confirmed_user.pk, "example.com")
+
+        delay.assert_called_once_with(confirmed_user.pk, "example.com")
+        send_export_ready_email_task(confirmed_user.pk, "example.com")
+        assert len(mail.outbox) == 1
+        download_url = reverse("notes_app:note_export_archive_download")
+        assert f"http://example.com{download_url}" in mail.outbox[0].body
+
+        client.force_login(confirmed_user)
+        response = client.get(download_url)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        assert sorted(archive.namelist()) == [
+            "notes.csv",
+            "notes.ndjson",
+            "tags.ndjson",
+        ]
+        assert len(archive.read("notes.ndjson").splitlines()) == 2
+        assert archive.read("tags.ndjson").splitlines()[0] == b'{"name":"home"}'
+
+    def test_failed_email_is_retried_without_rebuilding(
+        self, confirmed_user, exports_storage, mocker
+    ):
+        build = mocker.patch("notes_app.tasks.build_export_archive")
+        mocker.patch("notes_app.tasks.send_mail", side_effect=OSError("SMTP down"))
+        retry = mocker.patch.object(
+            send_export_ready_email_task, "retry", side_effect=Retry()
+        )
+
+        with pytest.raises(Retry):
+            send_export_ready_email_task(confirmed_user.pk, "example.com")
+
+        retry.assert_called_once()
+        build.assert_not_called()
+
+    def test_rebuild_replaces_the_archive_after_saving_it(
+        self, confirmed_user, make_notes, exports_storage
+    ):
+        make_notes(1)
+        legacy = exports_storage / str(confirmed_user.pk) / "notes.zip"
+        legacy.parent.mkdir()
+        legacy.write_bytes(b"old")
+
+        first = build_export_archive(confirmed_user)
+        assert latest_export_archive(confirmed_user.pk) == first
+        second = build_export_archive(confirmed_user)
+
+        assert second != first
+        assert latest_export_archive(confirmed_user.pk) == second
+        assert [p.name for p in legacy.parent.iterdir()] == [second.split("/")[1]]
+
+    def test_download_without_archive_returns_404(
+        self, client: Client, confirmed_user, exports_storage
+    ):
+        client.force_login(confirmed_user)
+
+        response = client.get(reverse("notes_app:note_export_archive_download"))
+
+        assert response.status_code == 404
@@ -0,0 +1,174 @@
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from notes_app.importer import import_notes
+from notes_app.models import Note, Tag, UserStats
+from notes_app.search import search_notes
+from notes_app.tagging import notes_with_tag_names_drift
+
+CSV_FILE = (
+    "name,description,tags,done,deadline\n"
+    'Buy milk,From the corner shop,"home, errands",false,\n'
+    'Write report,"Quarterly, with ""charts""",work,true,\n'
+    ",Missing name,work,,\n"
+)
+
+
+@pytest.mark.django_db
+class TestImportNotes:
+    def test_csv_import(self, confirmed_user, tags):
+        report = import_notes(confirmed_user, io.BytesIO(CSV_FILE.encode()), "csv")
+
+        assert (report.created, report.skipped) == (2, 1)
+        assert report.errors == ["line 4: name is required"]
+        milk = Note.objects.get(name="Buy milk")
+        assert milk.tag_names == ["errands", "home"]
+        assert sorted(milk.tags.values_list("name", flat=True)) == ["errands", "home"]
+        report_note = Note.objects.get(name="Write report")
+        assert report_note.description == 'Quarterly, with "charts"'
+        assert report_note.done
+
+    def test_creates_only_missing_tags(self, confirmed_user, tags):
+        import_notes(confirmed_user, io.BytesIO(CSV_FILE.encode()), "csv")
+
+        assert sorted(
+            Tag.objects.filter(user=confirmed_user).values_list("name", flat=True)
+        ) == ["errands", "home", "ideas", "work"]
+
+    def test_ndjson_import_with_deadlines(self, confirmed_user):
+        future = timezone.now() + timedelta(days=2)
+        past = timezone.now() - timedelta(days=2)
+        lines = [
+            {
+                "name": "Future",
+                "description": "Due later",
+                "tags": ["later"],
+                "deadline": future.isoformat(),
+            },
+            {
+                "name": "Past",
+                "description": "Already due",
+                "deadline": past.isoformat(),
+            },
+            "not an object",
+            {"name": "Bad deadline", "deadline": "tomorrow"},
+        ]
+        stream = io.BytesIO("\n".join(json.dumps(line) for line in lines).encode())
+
+        report = import_notes(confirmed_user, stream, "ndjson")
+
+        assert (report.created, report.skipped) == (2, 2)
+        assert Note.objects.get(name="Future").is_todo
+        past_note = Note.objects.get(name="Past")
+        assert (past_note.is_todo, past_note.deadline) == (False, None)
+
+    def test_imported_notes_are_searchable_and_counted(self, confirmed_user):
+        import_notes(confirmed_user, io.BytesIO(CSV_FILE.encode()), "csv", chunk_size=1)
+
+        assert search_notes(confirmed_user, "errands").count() == 1
+        stats = UserStats.objects.get(user=confirmed_user)
+        assert (stats.notes_count, stats.completed_count) == (2, 1)
+
+    def test_tag_names_with_quotes_survive_copy(self, confirmed_user):
+        stream = io.BytesIO(
+            json.dumps(
+                {
+                    "name": "Quoted",
+                    "description": "Quotes in tags",
+                    "tags": ['say "hi"', "back\\slash"],
+                }
+            ).encode()
+        )
+
+        import_notes(confirmed_user, stream, "ndjson")
+
+        assert Note.objects.get().tag_names == ["back\\slash", 'say "hi"']
+
+    def test_rows_follow_the_form_rules(self, confirmed_user):
+        lines = [
+            {"name": "Short tag", "description": "Tag too short", "tags": ["ab"]},
+            {"name": "Nop", "description": "Name too short"},
+            {"name": "No description"},
+            {"name": "Valid", "description": "Passes", "tags": ["Zeta", "alpha"]},
+        ]
+        stream = io.BytesIO("\n".join(json.dumps(line) for line in lines).encode())
+
+        report = import_notes(confirmed_user, stream, "ndjson")
+
+        assert (report.created, report.skipped) == (1, 3)
+        assert report.errors == [
+            "line 1: tag: Ensure this value has at least 3 characters (it has 2).",
+            "line 2: name: Ensure this value has at least 4 characters (it has 3).",
+            "line 3: description is required",
+        ]
+        # Tag names are sorted by the database, like tag_names_subquery().
+        assert not notes_with_tag_names_drift(Note.objects.all()).exists()
+
+
+@pytest.mark.django_db
+class TestNoteImportView:
+    url = reverse("notes_app:note_import")
+
+    def test_upload_renders_report(self, client: Client, confirmed_user):
+        client.force_login(confirmed_user)
+
+        response = client.post(
+            self.url,
+            {"file": SimpleUploadedFile("notes.csv", CSV_FILE.encode())},
+        )
+
+        assert response.status_code == 200
+        assert "Imported 2 notes (1 skipped)" in response.content.decode()
+        assert Note.objects.filter(user=confirmed_user).count() == 2
+
+    def test_unknown_format_is_rejected(self, client: Client, confirmed_user):
+        client.force_login(confirmed_user)
+
+        response = client.post(
+            self.url,
+            {"file": SimpleUploadedFile("notes.txt", b"anything")},
+            follow=True,
+        )
+
+        assert "Upload a .csv or .ndjson file." in response.content.decode()
+        assert not Note.objects.exists()
+
+
+@pytest.mark.django_db
+class TestImportNotesCommand:
+    def test_imports_file_for_user(self, tmp_path, confirmed_user):
+        path = tmp_path / "notes.csv"
+        path.write_text(CSV_FILE)
+
+        out = io.StringIO()
+        call_command(
+            "import_notes", str(path), "--user", confirmed_user.username, stdout=out
+        )
+
+        assert "Imported 2 notes (1 skipped)" in out.getvalue()
+        assert Note.objects.filter(user=confirmed_user).count() == 2
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_import_throughput(confirmed_user):
+    rows = 200_000
+    stream = io.BytesIO(
+        "name,description,tags\n".encode()
+        + b"".join(
+            f"Note {i},Description {i},tag-{i % 100}\n".encode() for i in range(rows)
+        )
+    )
+
+    report = import_notes(confirmed_user, stream, "csv")
+
+    print(report)
+    assert report.created == rows
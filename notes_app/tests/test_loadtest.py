@@ -0,0 +1,67 @@
+import pytest
+
+from notes_app.loadtest import (
+    Sample,
+    compare,
+    prepare_users,
+    run_load_test,
+    summarize,
+    url_name,
+)
+from notes_app.models import Note
+
+
+def test_url_name_resolves_paths_with_query_strings():
+    assert url_name("/notes/more/?before=10") == "notes_app:note_list_more"
+    assert url_name("/notes/5/edit/") == "notes_app:note_edit"
+    assert url_name("/missing/") == "unresolved"
+
+
+def test_summarize_per_url_name():
+    samples = [Sample("notes_app:note_list", 200, ms / 1000) for ms in range(1, 101)]
+    samples.append(Sample("users_app:login", 500, 0.2))
+
+    summary = summarize(samples, elapsed=10)
+
+    note_list = summary["views"]["notes_app:note_list"]
+    assert (note_list["requests"], note_list["errors"], note_list["rps"]) == (
+        100,
+        0,
+        10,
+    )
+    assert (note_list["p50_ms"], note_list["p95_ms"], note_list["p99_ms"]) == (
+        50.5,
+        95.0,
+        99.0,
+    )
+    assert summary["views"]["users_app:login"]["errors"] == 1
+    assert summary["views"]["users_app:login"]["p99_ms"] == 200
+
+
+def test_compare_matches_url_names():
+    previous = summarize([Sample("notes_app:note_list", 200, 0.1)], 1)
+    current = summarize(
+        [Sample("notes_app:note_list", 200, 0.2), Sample("notes_app:tag_list", 200, 1)],
+        1,
+    )
+
+    assert compare(previous, current) == [
+        ("notes_app:note_list", "p50_ms", 100, 200),
+        ("notes_app:note_list", "p95_ms", 100, 200),
+        ("notes_app:note_list", "p99_ms", 100, 200),
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_journeys_against_live_server(live_server):
+    usernames = prepare_users(2, notes_per_user=30)
+
+    samples, elapsed = run_load_test(live_server.url, usernames, 2, sessions=1, seed=1)
+
+    assert Note.objects.filter(user__username=usernames[0]).count() >= 30
+    summary = summarize(samples, elapsed)
+    assert {"users_app:login", "users_app:logout", "notes_app:note_list"} <= set(
+        summary["views"]
+    )
+    assert not [name for name, stats in summary["views"].items() if stats["errors"]]
+    assert summary["views"]["notes_app:note_list"]["server_ms"]["sql"] > 0
@@ -0,0 +1,115 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from notes.metrics import (
+    EMAILS,
+    METRICS_BUFFER,
+    REQUEST_LATENCY,
+    Histogram,
+    MetricsStore,
+)
+
+
+@pytest.fixture
+def metrics_db(metrics_db, settings, tmp_path):
+    settings.METRICS_DB = tmp_path / "metrics.sqlite3"
+    return settings.METRICS_DB
+
+
+def test_histogram_buckets_are_cumulative(tmp_path):
+    store = MetricsStore(tmp_path / "metrics.sqlite3")
+    histogram = Histogram("test_seconds", "Test.", (0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        store.add(histogram.samples(value, view="a"))
+
+    lines = list(histogram.expose(store.values()))
+
+    assert lines[2:] == [
+        'test_seconds_bucket{view="a",le="0.1"} 1',
+        'test_seconds_bucket{view="a",le="1"} 3',
+        'test_seconds_bucket{view="a",le="+Inf"} 4',
+        'test_seconds_count{view="a"} 4',
+        'test_seconds_sum{view="a"} 6.05',
+    ]
+
+
+def test_counters_add_up_across_processes(client: Client, admin_user, metrics_db):
+    code = (
+        "import django; django.setup(); from notes.metrics import EMAILS; "
+        "[EMAILS.inc(kind='activation', outcome='sent') for _ in range(5)]"
+    )
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "notes.settings",
+        "METRICS_DB": str(metrics_db),
+    }
+    workers = [
+        subprocess.Popen([sys.executable, "-c", code], env=env) for _ in range(3)
+    ]
+    assert [worker.wait() for worker in workers] == [0, 0, 0]
+    EMAILS.inc(kind="activation", outcome="failed")
+
+    client.force_login(admin_user)
+    content = client.get(reverse("metrics")).content.decode()
+
+    assert 'notes_emails_total{kind="activation",outcome="sent"} 15' in content
+    assert 'notes_emails_total{kind="activation",outcome="failed"} 1' in content
+
+
+@pytest.mark.django_db
+def test_requests_are_recorded_per_url_name(
+    client: Client, confirmed_user, make_notes, metrics_db
+):
+    make_notes(3)
+    client.force_login(confirmed_user)
+    for _ in range(2):
+        client.get(reverse("notes_app:note_list"))
+
+    client.force_login(confirmed_user)
+    confirmed_user.is_staff = True
+    confirmed_user.save()
+    content = client.get(reverse("metrics")).content.decode()
+
+    labels = 'method="GET",status="200",view="notes_app:note_list"'
+    assert f"{REQUEST_LATENCY.name}_count{{{labels}}} 2" in content
+    assert 'notes_request_queries_count{view="notes_app:note_list"} 2' in content
+    assert "notes_db_connections{" in content
+
+
+@pytest.mark.django_db
+def test_requests_dont_write_until_the_flush_interval(
+    mocker, client: Client, confirmed_user, metrics_db, settings
+):
+    settings.METRICS_FLUSH_INTERVAL = 3600
+    client.force_login(confirmed_user)
+    write = mocker.spy(MetricsStore, "add")
+
+    for _ in range(3):
+        client.get(reverse("notes_app:note_list"))
+    assert write.call_count == 0
+
+    METRICS_BUFFER.flush(force=True)
+    assert write.call_count == 1
+    values = MetricsStore(metrics_db).values()
+    assert values[f"{REQUEST_LATENCY.name}_count"] == {
+        'method="GET",status="200",view="notes_app:note_list"': 3
+    }
+
+
+@pytest.mark.django_db
+def test_metrics_are_internal(client: Client, confirmed_user, settings):
+    settings.METRICS_TOKEN = "secret"
+    url = reverse("metrics")
+
+    assert client.get(url).status_code == 404
+    assert client.get(url, headers={"Authorization": "Bearer wrong"}).status_code == 404
+    assert (
+        client.get(url, headers={"Authorization": "Bearer secret"}).status_code == 200
+    )
+    client.force_login(confirmed_user)
+    assert client.get(url).status_code == 404
@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import Client
+from django.urls import reverse
+
+from notes.profiling import Sampler, SamplingProfilerMiddleware
+
+
+def _busy_wait(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler_records_the_running_function():
+    with Sampler(threading.get_ident(), 0.001) as sampler:
+        _busy_wait(0.05)
+
+    assert sampler.samples
+    assert sampler.top_frames()[0]["frame"].startswith("_busy_wait ")
+    profile = sampler.speedscope("test")["profiles"][0]
+    assert len(profile["samples"]) == len(profile["weights"]) == len(sampler.samples)
+
+
+def test_middleware_is_removed_when_disabled(settings):
+    settings.PROFILING_ENABLED = False
+
+    with pytest.raises(MiddlewareNotUsed):
+        SamplingProfilerMiddleware(lambda request: None)
+
+
+@pytest.mark.django_db
+class TestSamplingProfilerMiddleware:
+    url = reverse("notes_app:note_list")
+
+    @pytest.fixture(autouse=True)
+    def profiling_dir(self, settings, tmp_path):
+        settings.PROFILING_DIR = tmp_path
+        return tmp_path
+
+    def test_staff_request_is_profiled(
+        self, client: Client, confirmed_user, make_notes, profiling_dir
+    ):
+        make_notes(3)
+        confirmed_user.is_staff = True
+        confirmed_user.save()
+        client.force_login(confirmed_user)
+
+        response = client.get(self.url, {"profile": "1"})
+
+        profile_id = response.headers["X-Profile"]
+        assert profile_id.endswith("-note_list")
+        summary = json.loads((profiling_dir / f"{profile_id}.summary.json").read_text())
+        assert summary["status"] == 200
+        assert summary["sql"]["queries"] >= 2
+        speedscope = json.loads(
+            (profiling_dir / f"{profile_id}.speedscope.json").read_text()
+        )
+        assert speedscope["profiles"][0]["type"] == "sampled"
+
+    def test_profiling_can_be_requested_by_header(
+        self, client: Client, admin_user, profiling_dir
+    ):
+        client.force_login(admin_user)
+
+        response = client.get(reverse("welcome"), headers={"X-Profile": "1"})
+
+        assert response.headers["X-Profile"]
+        assert len(list(profiling_dir.iterdir())) == 2
+
+    def test_other_users_are_not_profiled(
+        self, client: Client, confirmed_user, profiling_dir
+    ):
+        client.force_login(confirmed_user)
+
+        response = client.get(self.url, {"profile": "1"})
+
+        assert "X-Profile" not in response.headers
+        assert not list(profiling_dir.iterdir())
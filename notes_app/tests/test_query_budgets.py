@@ -0,0 +1,320 @@
+"""
+Query budgets of every notes_app view and the index view, at 1, 10 and 100 notes.
+
+Each test is named after the URL it covers, test_every_view_has_a_budget
+fails when a new URL is added without a budget.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from notes_app.models import Note, Tag
+from notes_app.urls import urlpatterns
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def logged_client(client: Client, confirmed_user) -> Client:
+    client.force_login(confirmed_user)
+    return client
+
+
+@pytest.fixture
+def grow_notes(confirmed_user, make_notes):
+    """Brings the number of the user's notes to the given size, with a cold cache."""
+
+    def grow(size: int) -> list[Note]:
+        make_notes(size - Note.objects.filter(user=confirmed_user).count())
+        cache.clear()
+        return list(Note.objects.filter(user=confirmed_user).order_by("pk"))
+
+    return grow
+
+
+@pytest.fixture
+def grow_tags(confirmed_user, tags):
+    def grow(size: int) -> None:
+        count = Tag.objects.filter(user=confirmed_user).count()
+        Tag.objects.bulk_create(
+            Tag(name=f"tag-{i}", user=confirmed_user) for i in range(count, size)
+        )
+
+    return grow
+
+
+@pytest.fixture
+def grow_target(grow_notes, make_notes):
+    """
+    Like grow_notes, but the newest note is created for the request to change,
+    so every size works on a note in the same state. grow.target() returns it.
+    """
+    targets = []
+
+    def grow(size: int) -> None:
+        grow_notes(size - 1)
+        targets.append(make_notes(1)[0])
+        cache.clear()
+
+    grow.target = lambda: targets[-1]
+    return grow
+
+
+# Session and user lookups of an authenticated request.
+AUTH = 2
+
+
+# TAGS
+
+
+def test_tag_list(logged_client, grow_tags, assert_query_budget):
+    url = reverse("notes_app:tag_list")
+    assert_query_budget(lambda: logged_client.get(url), grow=grow_tags, exact=AUTH + 1)
+
+
+def test_tag_create(logged_client, grow_tags, assert_query_budget):
+    url = reverse("notes_app:tag_create")
+    names = iter(range(1000))
+    # Profile, then the insert.
+    assert_query_budget(lambda: logged_client.get(url), grow=grow_tags, exact=AUTH + 1)
+    assert_query_budget(
+        lambda: logged_client.post(url, {"name": f"new-{next(names)}", "save": "1"}),
+        grow=grow_tags,
+        exact=AUTH + 2,
+    )
+
+
+def test_tag_delete(logged_client, confirmed_user, grow_tags, assert_query_budget):
+    targets = []
+
+    def grow(size: int) -> None:
+        grow_tags(size)
+        targets.append(Tag.objects.create(name=f"unused-{size}", user=confirmed_user))
+
+    assert_query_budget(
+        lambda: logged_client.post(
+            reverse("notes_app:tag_delete", args=[targets[-1].pk])
+        ),
+        grow=grow,
+        exact=AUTH + 5,
+    )
+
+
+def test_tag_options(logged_client, grow_tags, assert_query_budget):
+    url = reverse("notes_app:tag_options")
+    assert_query_budget(
+        lambda: logged_client.get(url, {"q": "tag-"}), grow=grow_tags, exact=AUTH + 1
+    )
+
+
+# NOTES
+
+
+def test_note_list(logged_client, grow_notes, assert_query_budget):
+    url = reverse("notes_app:note_list")
+    # Stats and the notes page.
+    assert_query_budget(lambda: logged_client.get(url), grow=grow_notes, exact=AUTH + 2)
+
+
+def test_note_list_more(logged_client, grow_notes, assert_query_budget):
+    url = reverse("notes_app:note_list_more")
+    assert_query_budget(
+        lambda: logged_client.get(url, {"before": 10**9}),
+        grow=grow_notes,
+        exact=AUTH + 1,
+    )
+
+
+def test_note_search(logged_client, grow_notes, assert_query_budget):
+    url = reverse("notes_app:note_search")
+    assert_query_budget(
+        lambda: logged_client.get(url, {"q": "description"}),
+        grow=grow_notes,
+        exact=AUTH + 1,
+    )
+
+
+def test_note_create(logged_client, grow_notes, assert_query_budget):
+    url = reverse("notes_app:note_create")
+    data = {"name": "New note", "description": "Description", "tags": ["work", "home"]}
+    # Profile and tags check.
+    assert_query_budget(lambda: logged_client.get(url), grow=grow_notes, exact=AUTH + 2)
+    assert_query_budget(
+        lambda: logged_client.post(url, data), grow=grow_notes, maximum=AUTH + 14
+    )
+
+
+def test_note_detail(logged_client, grow_target, assert_query_budget):
+    assert_query_budget(
+        lambda: logged_client.get(
+            reverse("notes_app:note_detail", args=[grow_target.target().pk])
+        ),
+        grow=grow_target,
+        exact=AUTH + 1,
+    )
+
+
+def test_note_toggle_status(logged_client, grow_target, assert_query_budget):
+    assert_query_budget(
+        lambda: logged_client.post(
+            reverse("notes_app:note_toggle_status", args=[grow_target.target().pk])
+        ),
+        grow=grow_target,
+        exact=AUTH + 7,
+    )
+
+
+def test_note_set_deadline(logged_client, grow_target, assert_query_budget):
+    def url():
+        return reverse("notes_app:note_set_deadline", args=[grow_target.target().pk])
+
+    deadline = (timezone.localtime() + timedelta(hours=5)).strftime("%Y-%m-%dT%H:%M")
+    assert_query_budget(
+        lambda: logged_client.get(url()), grow=grow_target, exact=AUTH + 1
+    )
+    assert_query_budget(
+        lambda: logged_client.post(url(), {"deadline": deadline}),
+        grow=grow_target,
+        exact=AUTH + 7,
+    )
+
+
+def test_note_toggle_todo(logged_client, grow_target, assert_query_budget):
+    def grow(size: int) -> None:
+        grow_target(size)
+        Note.objects.filter(pk=grow_target.target().pk).update(
+            is_todo=True, deadline=timezone.now() + timedelta(days=3)
+        )
+
+    assert_query_budget(
+        lambda: logged_client.post(
+            reverse("notes_app:note_toggle_todo", args=[grow_target.target().pk])
+        ),
+        grow=grow,
+        exact=AUTH + 7,
+    )
+
+
+def test_note_edit(logged_client, grow_target, assert_query_budget):
+    def url():
+        return reverse("notes_app:note_edit", args=[grow_target.target().pk])
+
+    data = {"name": "Edited note", "description": "Description", "tags": ["work"]}
+    assert_query_budget(
+        lambda: logged_client.get(url()), grow=grow_target, exact=AUTH + 1
+    )
+    assert_query_budget(
+        lambda: logged_client.post(url(), data), grow=grow_target, exact=AUTH + 9
+    )
+
+
+def test_note_delete(logged_client, grow_target, assert_query_budget):
+    assert_query_budget(
+        lambda: logged_client.post(
+            reverse("notes_app:note_delete", args=[grow_target.target().pk])
+        ),
+        grow=grow_target,
+        exact=AUTH + 6,
+    )
+
+
+def test_note_bulk(logged_client, confirmed_user, grow_notes, assert_query_budget):
+    """Bulk actions over 1, 10 and 100 selected notes run the same statements."""
+    url = reverse("notes_app:note_bulk")
+    note_ids = []
+
+    def grow(size: int) -> None:
+        note_ids[:] = [note.pk for note in grow_notes(size)]
+
+    # Notes are created with "work", so tagging adds a tag they don't have yet.
+    Tag.objects.create(name="travel", user=confirmed_user)
+    # Tag lookup, selected IDs, then the statements of the action.
+    budgets = {
+        "complete": AUTH + 5,
+        "delete": AUTH + 6,
+        "tag": AUTH + 7,
+        "untag": AUTH + 7,
+    }
+    for action, budget in budgets.items():
+        Note.objects.filter(user=confirmed_user).delete()
+        assert_query_budget(
+            lambda: logged_client.post(
+                url,
+                {
+                    "action": action,
+                    "note_ids": note_ids,
+                    "tag": "travel" if action == "tag" else "work",
+                },
+            ),
+            grow=grow,
+            exact=budget,
+        )
+
+
+def test_note_import(logged_client, grow_notes, assert_query_budget):
+    url = reverse("notes_app:note_import")
+    assert_query_budget(lambda: logged_client.get(url), grow=grow_notes, exact=AUTH + 1)
+
+
+def test_note_export(
+    logged_client, grow_notes, assert_query_budget, tmp_path, settings
+):
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "exports": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": tmp_path},
+        },
+    }
+    url = reverse("notes_app:note_export")
+
+    def download():
+        response = logged_client.get(url, {"format": "ndjson"})
+        return b"".join(response.streaming_content)
+
+    assert_query_budget(lambda: logged_client.get(url), grow=grow_notes, exact=AUTH + 1)
+    # Stats and the notes, read through a server-side cursor.
+    assert_query_budget(download, grow=grow_notes, exact=AUTH + 2)
+
+
+def test_note_export_archive(logged_client, grow_notes, assert_query_budget, mocker):
+    mocker.patch("notes_app.views.build_export_archive_task.delay")
+    url = reverse("notes_app:note_export_archive")
+    assert_query_budget(lambda: logged_client.post(url), grow=grow_notes, exact=AUTH)
+
+
+def test_note_export_archive_download(
+    logged_client, grow_notes, assert_query_budget, tmp_path, settings
+):
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "exports": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": tmp_path},
+        },
+    }
+    url = reverse("notes_app:note_export_archive_download")
+    assert_query_budget(lambda: logged_client.get(url), grow=grow_notes, exact=AUTH)
+
+
+# INDEX
+
+
+def test_welcome(client: Client, confirmed_user, grow_notes, assert_query_budget):
+    url = reverse("welcome")
+    assert_query_budget(lambda: client.get(url), grow=grow_notes, exact=0)
+    client.force_login(confirmed_user)
+    assert_query_budget(lambda: client.get(url), grow=grow_notes, exact=AUTH)
+
+
+def test_every_view_has_a_budget():
+    tested = {name for name in globals() if name.startswith("test_")}
+    missing = [
+        pattern.name for pattern in urlpatterns if f"test_{pattern.name}" not in tested
+    ]
+    assert not missing, f"Views without a query budget: {missing}"
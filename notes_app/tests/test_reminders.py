@@ -0,0 +1,469 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.contrib.auth.models import User
+from django.core import mail
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from notes_app.models import Note, ReminderDelivery, UserStats, Watermark
+from notes_app.reminders import (
+    REMINDER_CLAIM_TIMEOUT,
+    REMINDER_MAX_TRANSACTION_AGE,
+    REMINDER_SCAN_LAG,
+    archive_expired_todos,
+    claim_reminders,
+    due_digests,
+    scan_due_reminders,
+    scan_horizon,
+    start_sending,
+)
+from notes_app.stats import recompute_user_stats
+from notes_app.tasks import (
+    check_deadlines_task,
+    scan_reminders_task,
+    schedule_digests_task,
+    send_digests_task,
+    send_notification_task,
+    send_reminders_task,
+)
+from users_app.models import Profile
+
+
+@pytest.fixture
+def scan(django_capture_on_commit_callbacks):
+    """Runs scan_due_reminders(), scheduling its batches once it commits."""
+
+    def _scan(*args, **kwargs) -> int:
+        with django_capture_on_commit_callbacks(execute=True):
+            return scan_due_reminders(*args, **kwargs)
+
+    return _scan
+
+
+def _set_deadlines(notes: list[Note], offsets: list[timedelta]) -> None:
+    now = timezone.now()
+    for note, offset in zip(notes, offsets):
+        Note.objects.filter(pk=note.pk).update(is_todo=True, deadline=now + offset)
+
+
+@pytest.mark.django_db
+class TestDeadlineSweep:
+    def test_expired_todos_are_archived_per_user(self, confirmed_user, make_notes):
+        other = User.objects.create_user(username="other@example.com")
+        mine, theirs = make_notes(3), make_notes(2, user=other)
+        _set_deadlines(
+            mine, [timedelta(hours=-1), timedelta(days=-3), timedelta(hours=1)]
+        )
+        _set_deadlines(theirs, [timedelta(minutes=-1), timedelta(days=2)])
+
+        archived = archive_expired_todos(timezone.now())
+
+        assert archived == {confirmed_user.pk: 2, other.pk: 1}
+        assert Note.objects.filter(is_todo=True).count() == 2
+
+    def test_sweep_queries_dont_grow_with_users(
+        self, make_notes, django_assert_max_num_queries
+    ):
+        for i in range(20):
+            user = User.objects.create_user(username=f"user{i}@example.com")
+            _set_deadlines(
+                make_notes(2, user=user), [timedelta(hours=-1), timedelta(hours=2)]
+            )
+        recompute_user_stats(User.objects.values_list("pk", flat=True))
+
+        with django_assert_max_num_queries(10):
+            check_deadlines_task()
+
+        stats = UserStats.objects.filter(user__username__startswith="user")
+        assert {(s.active_todos_count, s.expired_count) for s in stats} == {(1, 1)}
+
+
+@pytest.mark.django_db
+class TestReminderScan:
+    def _remind(self, note: Note, remind_at, deadline=None) -> None:
+        Note.objects.filter(pk=note.pk).update(
+            is_todo=True,
+            remind_at=remind_at,
+            deadline=deadline or remind_at + timedelta(days=1),
+        )
+
+    def test_setting_a_deadline_schedules_its_reminder(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        far, close = make_notes(2)
+        client.force_login(confirmed_user)
+        now = timezone.localtime()
+        for note, hours in ((far, 72), (close, 5)):
+            client.post(
+                reverse("notes_app:note_set_deadline", args=[note.pk]),
+                data={
+                    "deadline": (now + timedelta(hours=hours)).strftime(
+                        "%Y-%m-%dT%H:%M"
+                    )
+                },
+            )
+
+        far.refresh_from_db()
+        close.refresh_from_db()
+        assert far.remind_at == far.deadline - timedelta(days=1)
+        assert now <= close.remind_at <= timezone.now()
+
+    def test_each_reminder_is_scheduled_once(self, scan, make_notes):
+        now = timezone.now()
+        first, second, removed = make_notes(3)
+        self._remind(first, now - timedelta(minutes=5))
+        self._remind(removed, now - timedelta(minutes=5))
+        Note.objects.filter(pk=removed.pk).update(is_todo=False)
+
+        scheduled = []
+        scan(scheduled.extend, now)
+        scan(scheduled.extend, now + timedelta(seconds=10))
+        assert scheduled == [first.pk]
+
+        later = now + timedelta(minutes=1)
+        self._remind(second, later - REMINDER_SCAN_LAG - timedelta(seconds=1))
+        scan(scheduled.extend, later)
+        assert scheduled == [first.pk, second.pk]
+
+    def test_reminders_of_passed_deadlines_are_skipped(self, scan, make_notes):
+        now = timezone.now()
+        note = make_notes(1)[0]
+        self._remind(note, now - timedelta(hours=2), deadline=now - timedelta(hours=1))
+
+        scheduled = []
+        scan(scheduled.extend, now)
+
+        assert scheduled == []
+
+    def test_due_reminders_are_scheduled_in_batches(self, scan, make_notes):
+        now = timezone.now()
+        notes = make_notes(5)
+        for i, note in enumerate(notes):
+            self._remind(note, now - timedelta(minutes=5 - i))
+
+        batches = []
+        count = scan(batches.append, now, batch_size=2)
+
+        assert count == 5
+        assert batches == [
+            [n.pk for n in notes[:2]],
+            [n.pk for n in notes[2:4]],
+            [notes[4].pk],
+        ]
+
+    @pytest.fixture
+    def other_transaction(self):
+        """Starts a transaction on another connection, returns its start time."""
+        other = connections.create_connection("default")
+        other.set_autocommit(False)
+
+        def start(write: bool):
+            with other.cursor() as cursor:
+                cursor.execute("SELECT transaction_timestamp()")
+                started = cursor.fetchone()[0]
+                if write:
+                    cursor.execute("SELECT txid_current()")
+            return started
+
+        yield start
+        other.close()
+
+    def test_scan_stops_at_the_oldest_writing_transaction(
+        self, other_transaction, caplog
+    ):
+        started = other_transaction(write=True)
+        later = started + timedelta(minutes=5)
+
+        assert scan_horizon(later) == (later, started)
+        assert "Reminder scan is 0:05:00 behind" in caplog.text
+
+    def test_idle_readers_dont_hold_the_scan_back(self, other_transaction):
+        later = other_transaction(write=False) + timedelta(minutes=5)
+
+        assert scan_horizon(later) == (later, later - REMINDER_SCAN_LAG)
+
+    def test_stuck_transactions_dont_hold_the_scan_back(self, other_transaction):
+        started = other_transaction(write=True)
+        later = started + REMINDER_MAX_TRANSACTION_AGE + timedelta(minutes=1)
+
+        assert scan_horizon(later) == (later, later - REMINDER_SCAN_LAG)
+
+    def test_batches_are_scheduled_on_commit(
+        self, django_capture_on_commit_callbacks, make_notes
+    ):
+        note = make_notes(1)[0]
+        self._remind(note, timezone.now() - timedelta(minutes=5))
+
+        scheduled = []
+        with django_capture_on_commit_callbacks() as callbacks:
+            scan_due_reminders(scheduled.extend, timezone.now())
+        assert scheduled == []
+
+        for callback in callbacks:
+            callback()
+        assert scheduled == [note.pk]
+
+    def test_scan_task_sends_due_reminders(
+        self, mocker, django_capture_on_commit_callbacks, make_notes
+    ):
+        delay = mocker.patch("notes_app.tasks.send_reminders_task.delay")
+        note = make_notes(1)[0]
+        self._remind(note, timezone.now() - timedelta(minutes=1))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            scan_reminders_task()
+            scan_reminders_task()
+
+        delay.assert_called_once_with([note.pk])
+
+
+@pytest.mark.django_db
+class TestBatchedReminders:
+    def test_batch_is_sent_over_one_connection(self, mocker, make_notes):
+        notes = make_notes(4)
+        _set_deadlines(notes[:3], [timedelta(hours=5)] * 3)
+        connect = mocker.patch(
+            "notes_app.tasks.get_connection", wraps=mail.get_connection
+        )
+
+        send_reminders_task([note.pk for note in notes])
+
+        connect.assert_called_once()
+        assert [m.to for m in mail.outbox] == [["pradivliany@example.com"]] * 3
+        assert {m.body.split("Title: ")[1].split("\n")[0] for m in mail.outbox} == {
+            note.name for note in notes[:3]
+        }
+
+    def test_failed_message_is_retried_alone(self, mocker, make_notes):
+        notes = make_notes(3)
+        _set_deadlines(notes, [timedelta(hours=5)] * 3)
+        connection = mail.get_connection()
+        send = connection.send_messages
+
+        def send_or_bounce(messages):
+            if failing in messages[0].body:
+                raise OSError("550 mailbox unavailable")
+            return send(messages)
+
+        failing = notes[1].name
+        mocker.patch.object(connection, "send_messages", side_effect=send_or_bounce)
+        mocker.patch("notes_app.tasks.get_connection", return_value=connection)
+        retry = mocker.patch("notes_app.tasks.send_notification_task.apply_async")
+
+        send_reminders_task([note.pk for note in notes])
+
+        assert len(mail.outbox) == 2
+        assert all(failing not in m.body for m in mail.outbox)
+        retry.assert_called_once_with((notes[1].pk,), countdown=120)
+
+        send_notification_task(notes[1].pk)
+        assert len(mail.outbox) == 3
+
+
+@pytest.mark.django_db
+class TestReminderLedger:
+    def test_rescan_skips_claimed_reminders(self, scan, make_notes):
+        now = timezone.now()
+        note = make_notes(1)[0]
+        Note.objects.filter(pk=note.pk).update(
+            is_todo=True,
+            remind_at=now - timedelta(minutes=5),
+            deadline=now + timedelta(hours=5),
+        )
+
+        scheduled = []
+        scan(scheduled.extend, now)
+        Watermark.objects.all().delete()
+        assert scan(scheduled.extend, now) == 0
+
+        assert scheduled == [note.pk]
+
+    def test_lost_claims_are_scheduled_again(self, scan, make_notes):
+        now = timezone.now()
+        note = make_notes(1)[0]
+        Note.objects.filter(pk=note.pk).update(
+            is_todo=True,
+            remind_at=now - timedelta(minutes=5),
+            deadline=now + timedelta(hours=5),
+        )
+
+        scheduled = []
+        scan(scheduled.extend, now)  # The task sending it is lost.
+        scan(scheduled.extend, now + timedelta(minutes=1))
+        later = now + REMINDER_CLAIM_TIMEOUT + timedelta(minutes=1)
+        scan(scheduled.extend, later)
+        assert scheduled == [note.pk, note.pk]
+
+        start_sending([note.pk], ReminderDelivery.Kind.NOTE)
+        scan(scheduled.extend, later + 2 * REMINDER_CLAIM_TIMEOUT)
+        assert scheduled == [note.pk, note.pk]
+
+    def test_lost_digests_are_scheduled_again(
+        self, mocker, django_capture_on_commit_callbacks, make_notes
+    ):
+        notes = make_notes(2)
+        _set_deadlines(notes, [timedelta(hours=5)] * 2)
+        claim_reminders([note.pk for note in notes], ReminderDelivery.Kind.DIGEST)
+        ReminderDelivery.objects.update(
+            claimed_at=timezone.now() - REMINDER_CLAIM_TIMEOUT - timedelta(minutes=1)
+        )
+        mocker.patch("notes_app.tasks.due_digests", return_value={})
+        delay = mocker.patch("notes_app.tasks.send_digests_task.delay")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            schedule_digests_task()
+            schedule_digests_task()
+
+        delay.assert_called_once_with([[note.pk for note in notes]])
+
+    def test_reminder_is_sent_once_per_deadline(self, make_notes):
+        note = make_notes(1)[0]
+        _set_deadlines([note], [timedelta(hours=5)])
+
+        send_reminders_task([note.pk])
+        send_notification_task(note.pk)
+        send_reminders_task([note.pk])
+        assert len(mail.outbox) == 1
+
+        _set_deadlines([note], [timedelta(hours=8)])
+        send_notification_task(note.pk)
+        assert len(mail.outbox) == 2
+        assert (
+            ReminderDelivery.objects.filter(note=note, sent_at__isnull=False).count()
+            == 2
+        )
+
+    def test_digest_is_scheduled_once(
+        self, mocker, django_capture_on_commit_callbacks, make_notes
+    ):
+        notes = make_notes(2)
+        _set_deadlines(notes, [timedelta(hours=5)] * 2)
+        user_id = notes[0].user_id
+        mocker.patch(
+            "notes_app.tasks.due_digests",
+            return_value={user_id: [note.pk for note in notes]},
+        )
+        delay = mocker.patch("notes_app.tasks.send_digests_task.delay")
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            schedule_digests_task()
+            schedule_digests_task()
+        delay.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+        delay.assert_called_once_with([[note.pk for note in notes]])
+
+    def test_sweep_forgets_passed_deadlines(self, make_notes):
+        passed, due = make_notes(2)
+        _set_deadlines([passed, due], [timedelta(hours=5)] * 2)
+        send_reminders_task([passed.pk, due.pk])
+        _set_deadlines([passed], [timedelta(hours=-1)])
+        ReminderDelivery.objects.filter(note=passed).update(
+            deadline=timezone.now() - timedelta(hours=1)
+        )
+
+        check_deadlines_task()
+
+        assert list(ReminderDelivery.objects.values_list("note", flat=True)) == [due.pk]
+
+
+@pytest.mark.django_db
+class TestDigests:
+    def _digest_user(self, username: str, tz: str = "UTC") -> User:
+        user = User.objects.create_user(username=username, email=username)
+        user.profile.reminder_mode = Profile.ReminderMode.DIGEST
+        user.profile.timezone = tz
+        user.profile.save()
+        return user
+
+    def test_due_notes_are_grouped_per_user_in_their_morning(
+        self, confirmed_user, make_notes
+    ):
+        morning = timezone.now().replace(hour=8, minute=0, second=0, microsecond=0)
+        london = self._digest_user("london@example.com")
+        tokyo = self._digest_user("tokyo@example.com", tz="Asia/Tokyo")
+        london_notes = make_notes(3, user=london)
+        tokyo_notes = make_notes(1, user=tokyo)
+        per_note = make_notes(1)
+        for note, hours in zip(
+            london_notes + tokyo_notes + per_note, (10, 2, 30, 5, 5)
+        ):
+            Note.objects.filter(pk=note.pk).update(
+                is_todo=True, deadline=morning + timedelta(hours=hours)
+            )
+
+        assert due_digests(morning) == {
+            london.pk: [london_notes[1].pk, london_notes[0].pk]
+        }
+        assert due_digests(morning - timedelta(hours=9)) == {
+            tokyo.pk: [tokyo_notes[0].pk]
+        }
+
+    def test_per_note_scan_skips_digest_users(self, scan, make_notes):
+        now = datetime(2026, 3, 10, 5, 0, tzinfo=ZoneInfo("Europe/Kyiv"))
+        digest_user = self._digest_user("digest@example.com", tz="Europe/Kyiv")
+        mine, theirs, soon = make_notes(1)[0], *make_notes(2, user=digest_user)
+        # The digest at 08:00 covers `theirs`, `soon` is due before it.
+        for note, deadline in ((mine, 5), (theirs, 5), (soon, 2)):
+            Note.objects.filter(pk=note.pk).update(
+                is_todo=True,
+                remind_at=now - timedelta(minutes=5),
+                deadline=now + timedelta(hours=deadline),
+            )
+
+        scheduled = []
+        scan(scheduled.extend, now)
+
+        assert sorted(scheduled) == sorted([mine.pk, soon.pk])
+        assert due_digests(now + timedelta(hours=3)) == {digest_user.pk: [theirs.pk]}
+
+    def test_deadlines_set_after_the_digest_are_reminded(self, scan, make_notes):
+        now = datetime(2026, 3, 10, 20, 0, tzinfo=ZoneInfo("Asia/Tokyo"))
+        digest_user = self._digest_user("digest@example.com", tz="Asia/Tokyo")
+        early, late = make_notes(2, user=digest_user)
+        for note, deadline in ((early, 11), (late, 13)):
+            Note.objects.filter(pk=note.pk).update(
+                is_todo=True,
+                remind_at=now - timedelta(minutes=5),
+                deadline=now + timedelta(hours=deadline),
+            )
+
+        scheduled = []
+        scan(scheduled.extend, now)
+
+        assert scheduled == [early.pk]
+
+    def test_one_email_per_user_in_their_time_zone(self, make_notes):
+        kyiv = self._digest_user("kyiv@example.com", tz="Europe/Kyiv")
+        other = self._digest_user("other@example.com")
+        notes, other_notes = make_notes(3, user=kyiv), make_notes(1, user=other)
+        _set_deadlines(
+            notes + other_notes,
+            [timedelta(hours=hours) for hours in (3, 1, 2, 4)],
+        )
+
+        send_digests_task(
+            [[note.pk for note in notes], [note.pk for note in other_notes]]
+        )
+
+        assert sorted(m.to[0] for m in mail.outbox) == [
+            "kyiv@example.com",
+            "other@example.com",
+        ]
+        digest = next(m for m in mail.outbox if m.to == ["kyiv@example.com"])
+        assert digest.subject == "Reminder: 3 notes due soon"
+        listed = [line for line in digest.body.splitlines() if line.startswith("- ")]
+        assert [line.split(" (")[0][2:] for line in listed] == [
+            notes[1].name,
+            notes[2].name,
+            notes[0].name,
+        ]
+        deadline = Note.objects.get(pk=notes[1].pk).deadline
+        local = timezone.localtime(deadline, ZoneInfo("Europe/Kyiv"))
+        assert f"{local:%Y-%m-%d %H:%M}" in listed[0]
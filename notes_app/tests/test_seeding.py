@@ -0,0 +1,59 @@
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.utils import timezone
+
+from notes_app.models import Note, Tag, UserStats
+from notes_app.search import search_notes
+from notes_app.seeding import SeedOptions, generate_user, seed_notes
+from users_app.models import Profile
+
+OPTIONS = SeedOptions(seed=7, prefix="test", mean_notes=20, password_hash="hash")
+
+
+def test_generated_users_depend_only_on_seed_and_index():
+    now = timezone.now()
+
+    assert generate_user(OPTIONS, 3, now) == generate_user(OPTIONS, 3, now)
+    assert generate_user(OPTIONS, 3, now) != generate_user(OPTIONS, 4, now)
+
+
+@pytest.mark.django_db
+def test_seeded_data_is_consistent():
+    report = seed_notes(30, OPTIONS, batch_size=7)
+
+    assert report["users"] == User.objects.count() == Profile.objects.count() == 30
+    assert report["notes"] == Note.objects.count()
+    assert report["tags"] == Tag.objects.count()
+    for note in Note.objects.annotate(tag_count=Count("tags"))[:50]:
+        assert len(note.tag_names) == note.tag_count
+        assert not (note.done and note.is_todo)
+    user = User.objects.annotate(notes=Count("note")).order_by("-notes").first()
+    assert UserStats.objects.get(user=user).notes_count == user.notes
+    word = Note.objects.filter(user=user).first().name.split()[0]
+    assert search_notes(user, word).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_seed_matches_serial_seed():
+    seed_notes(12, OPTIONS, batch_size=5)
+    serial = sorted(Note.objects.values_list("user__username", "name", "tag_names"))
+    User.objects.all().delete()
+
+    seed_notes(12, OPTIONS, workers=2, batch_size=5)
+
+    assert (
+        sorted(Note.objects.values_list("user__username", "name", "tag_names"))
+        == serial
+    )
+
+
+@pytest.mark.django_db
+def test_command_refuses_existing_prefix():
+    call_command("seed_notes", "--users", "2", "--workers", "1", stdout=io.StringIO())
+
+    with pytest.raises(CommandError, match="already exist"):
+        call_command("seed_notes", "--users", "2", stdout=io.StringIO())
@@ -0,0 +1,65 @@
+import pytest
+
+from notes_app.models import Note
+
+
+@pytest.mark.django_db
+class TestTagNamesSync:
+    def test_tag_names_follow_tags_set(self, confirmed_user, tags):
+        note = Note.objects.create(
+            name="Note", description="Description", user=confirmed_user
+        )
+
+        note.tags.set(tags[:2])
+        note.refresh_from_db()
+        assert note.tag_names == ["home", "work"]
+
+        note.tags.remove(tags[0])
+        note.refresh_from_db()
+        assert note.tag_names == ["home"]
+
+        note.tags.clear()
+        note.refresh_from_db()
+        assert note.tag_names == []
+
+    def test_tag_names_follow_reverse_relation(self, confirmed_user, make_notes, tags):
+        note = make_notes(1)[0]
+        work = tags[0]
+
+        work.note_set.clear()
+        note.refresh_from_db()
+        assert "work" not in note.tag_names
+
+        work.note_set.add(note)
+        note.refresh_from_db()
+        assert "work" in note.tag_names
+
+    def test_tag_rename_updates_notes(self, make_notes, tags):
+        note = make_notes(1)[0]
+        tags[0].name = "job"
+        tags[0].save()
+
+        note.refresh_from_db()
+        assert note.tag_names == ["home", "ideas", "job"]
+
+    def test_tag_delete_updates_notes(self, make_notes, tags):
+        note = make_notes(1)[0]
+        tags[0].delete()
+
+        note.refresh_from_db()
+        assert note.tag_names == ["home", "ideas"]
+
+    def test_full_save_with_stale_instance_keeps_tag_names(self, make_notes, tags):
+        note = make_notes(1)[0]
+        stale = Note.objects.get(pk=note.pk)
+        note.tags.set(tags[:1])
+
+        stale.done = True
+        stale.save()
+
+        stale.refresh_from_db()
+        assert stale.tag_names == ["work"]
+
+    def test_tag_names_are_searchable(self, make_notes):
+        note = make_notes(1)[0]
+        assert Note.objects.filter(pk=note.pk, search_vector="ideas").exists()
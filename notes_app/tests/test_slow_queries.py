@@ -0,0 +1,102 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client
+from django.urls import reverse
+
+from notes.slow_queries import (
+    SLOW_QUERY_LOG,
+    SlowQueryLog,
+    normalize_sql,
+    record_slow_queries,
+)
+from notes_app.models import Note
+from notes_app.tasks import reconcile_user_stats_task
+
+
+@pytest.fixture
+def log_every_query(settings, tmp_path):
+    settings.METRICS_DB = tmp_path / "metrics.sqlite3"
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    settings.SLOW_QUERY_FLUSH_INTERVAL = 0
+    SLOW_QUERY_LOG.queries.clear()
+
+
+def report(*args) -> list[dict]:
+    stdout = io.StringIO()
+    call_command("slow_queries", "--json", *args, stdout=stdout)
+    return json.loads(stdout.getvalue())
+
+
+def test_fingerprints_ignore_parameters():
+    assert normalize_sql(
+        'SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) AND "name" = %s LIMIT 21'
+    ) == normalize_sql('SELECT * FROM "t" WHERE "id" IN (%s) AND "name" = %s LIMIT 5')
+
+
+def test_log_keeps_the_queries_with_most_time():
+    log = SlowQueryLog(size=2)
+    log.add("SELECT 1 FROM a", (), 50, "view a")
+    log.add("SELECT 1 FROM b", (), 10, "view b")
+    log.add("SELECT 1 FROM c", (), 5, "view c")
+    log.add("SELECT 1 FROM d", (), 30, "view d")
+
+    assert list(log.queries) == ["SELECT ? FROM a", "SELECT ? FROM d"]
+
+
+def test_samples_keep_no_parameters(log_every_query):
+    SLOW_QUERY_LOG.add(
+        'SELECT * FROM "auth_user" WHERE "email" = %s AND "note" = \'secret\'',
+        ("someone@example.com",),
+        120,
+        "view a",
+    )
+    SLOW_QUERY_LOG.flush(force=True)
+
+    (query,) = report()
+
+    assert (
+        query["sample"] == 'SELECT * FROM "auth_user" WHERE "email" = ? AND "note" = ?'
+    )
+
+
+@pytest.mark.django_db
+def test_slow_queries_of_views_are_reported(
+    client: Client, confirmed_user, make_notes, log_every_query
+):
+    make_notes(3)
+    client.force_login(confirmed_user)
+    for _ in range(2):
+        client.get(reverse("notes_app:note_detail", args=[Note.objects.first().pk]))
+
+    sites = [site for query in report() for site, _ in query["sites"]]
+
+    assert any(
+        site.startswith("view notes_app:note_detail | notes_app/views.py:")
+        for site in sites
+    )
+
+
+@pytest.mark.django_db
+def test_slow_queries_of_tasks_and_templates_are_reported(
+    confirmed_user, log_every_query
+):
+    reconcile_user_stats_task.apply()
+    with connection.execute_wrapper(record_slow_queries):
+        Template("{% for note in notes %}{{ note }}{% endfor %}").render(
+            Context({"notes": Note.objects.all()})
+        )
+    SLOW_QUERY_LOG.flush(force=True)
+
+    sites = [site for query in report("--reset") for site, _ in query["sites"]]
+
+    assert any(
+        site.startswith("task notes_app.tasks.reconcile_user_stats_task")
+        for site in sites
+    )
+    assert any(site.endswith("<unknown source>:1") for site in sites)
+    assert report() == []
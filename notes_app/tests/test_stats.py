@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from notes_app.models import Note, UserStats
+from notes_app.stats import get_user_stats, refresh_due_soon_counts
+from notes_app.tasks import (
+    check_deadlines_task,
+    reconcile_user_stats_task,
+    scan_reminders_task,
+)
+
+
+def _stats(user) -> UserStats:
+    return UserStats.objects.get(user=user)
+
+
+@pytest.mark.django_db
+class TestStatsUpdatedByViews:
+    def test_create_and_delete(self, client: Client, confirmed_user, tags):
+        client.force_login(confirmed_user)
+        client.post(
+            reverse("notes_app:note_create"),
+            data={"name": "New note", "description": "Description", "tags": ["work"]},
+        )
+        assert _stats(confirmed_user).notes_count == 1
+
+        note = Note.objects.get(user=confirmed_user)
+        client.post(reverse("notes_app:note_delete", args=[note.pk]))
+        assert _stats(confirmed_user).notes_count == 0
+
+    def test_set_deadline_and_complete(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        note = make_notes(1)[0]
+        client.force_login(confirmed_user)
+        deadline = timezone.localtime() + timedelta(hours=5)
+
+        client.post(
+            reverse("notes_app:note_set_deadline", args=[note.pk]),
+            data={"deadline": deadline.strftime("%Y-%m-%dT%H:%M")},
+        )
+        stats = _stats(confirmed_user)
+        assert (stats.active_todos_count, stats.due_soon_count) == (1, 1)
+
+        client.post(reverse("notes_app:note_toggle_status", args=[note.pk]))
+        stats = _stats(confirmed_user)
+        assert (stats.active_todos_count, stats.due_soon_count) == (0, 0)
+        assert stats.completed_count == 1
+
+    def test_toggle_todo_off(self, client: Client, confirmed_user, make_notes):
+        note = make_notes(1)[0]
+        Note.objects.filter(pk=note.pk).update(
+            is_todo=True, deadline=timezone.now() + timedelta(days=3)
+        )
+        get_user_stats(confirmed_user).delete()
+        client.force_login(confirmed_user)
+
+        client.post(reverse("notes_app:note_toggle_todo", args=[note.pk]))
+        assert _stats(confirmed_user).active_todos_count == 0
+
+
+@pytest.mark.django_db
+class TestStatsMaintenance:
+    def test_deadline_sweep_moves_expired_todos(
+        self, mocker, confirmed_user, make_notes
+    ):
+        mocker.patch("notes_app.tasks.send_notification_task.delay")
+        expired, due = make_notes(2)
+        Note.objects.filter(pk=expired.pk).update(
+            is_todo=True, deadline=timezone.now() - timedelta(hours=1)
+        )
+        Note.objects.filter(pk=due.pk).update(
+            is_todo=True, deadline=timezone.now() + timedelta(hours=1)
+        )
+        reconcile_user_stats_task()
+
+        check_deadlines_task()
+
+        stats = _stats(confirmed_user)
+        assert stats.active_todos_count == 1
+        assert stats.expired_count == 1
+        assert stats.due_soon_count == 1
+
+    def test_due_soon_counters_follow_the_clock(
+        self, mocker, confirmed_user, make_notes
+    ):
+        mocker.patch("notes_app.tasks.scan_due_reminders", return_value=0)
+        soon, later = make_notes(2)
+        Note.objects.filter(pk=soon.pk).update(
+            is_todo=True, deadline=timezone.now() + timedelta(seconds=30)
+        )
+        Note.objects.filter(pk=later.pk).update(
+            is_todo=True, deadline=timezone.now() + timedelta(hours=23, minutes=59)
+        )
+
+        scan_reminders_task()
+        assert _stats(confirmed_user).due_soon_count == 2
+
+        refresh_due_soon_counts(timezone.now() + timedelta(minutes=2))
+        assert _stats(confirmed_user).due_soon_count == 1
+
+    def test_refresh_due_soon_resets_stale_counters(self, confirmed_user, make_notes):
+        make_notes(1)
+        UserStats.objects.filter(user=confirmed_user).update(due_soon_count=4)
+
+        refresh_due_soon_counts()
+
+        assert _stats(confirmed_user).due_soon_count == 0
+
+    def test_reconcile_corrects_drift_but_keeps_expired(
+        self, confirmed_user, make_notes
+    ):
+        make_notes(3)
+        UserStats.objects.filter(user=confirmed_user).update(
+            notes_count=10, completed_count=2, expired_count=5
+        )
+
+        reconcile_user_stats_task(batch_size=1)
+
+        stats = _stats(confirmed_user)
+        assert (stats.notes_count, stats.completed_count) == (3, 0)
+        assert stats.expired_count == 5
+
+    def test_stats_are_created_on_first_access(self, confirmed_user, make_notes):
+        make_notes(2)
+        UserStats.objects.all().delete()
+
+        assert get_user_stats(confirmed_user).notes_count == 2
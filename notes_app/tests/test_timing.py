@@ -0,0 +1,52 @@
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.timing import ServerTimingMiddleware, parse_server_timing
+
+
+def test_parse_server_timing():
+    header = 'sql;dur=1.5;desc="3 queries", cache;desc="1 hits, 0 misses", total;dur=4'
+
+    assert parse_server_timing(header) == {"sql": 1.5, "total": 4.0}
+
+
+def test_middleware_is_removed_when_disabled(settings):
+    settings.SERVER_TIMING_ENABLED = False
+
+    with pytest.raises(MiddlewareNotUsed):
+        ServerTimingMiddleware(lambda request: None)
+
+
+@pytest.mark.django_db
+def test_server_timing_splits_the_request(client: Client, confirmed_user, make_notes):
+    make_notes(5)
+    client.force_login(confirmed_user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("notes_app:note_list"))
+
+    header = response.headers["Server-Timing"]
+    timings = parse_server_timing(header)
+    assert timings["sql"] > 0 and timings["tpl"] > 0
+    assert timings["sql"] + timings["tpl"] + timings["view"] == pytest.approx(
+        timings["total"], abs=0.2
+    )
+    assert f'desc="{len(queries)} queries"' in header
+
+
+@pytest.mark.django_db
+def test_server_timing_counts_cache_lookups(client: Client, confirmed_user, make_notes):
+    make_notes(5)
+    client.force_login(confirmed_user)
+    url = reverse("notes_app:note_list")
+
+    first = client.get(url).headers["Server-Timing"]
+    second = client.get(url).headers["Server-Timing"]
+
+    # The version is cached by make_notes, the page and its 5 cards aren't.
+    assert '"1 hits, 6 misses"' in first
+    assert '"2 hits, 0 misses"' in second
@@ -0,0 +1,328 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes_app.models import Note, Tag
+
+
+@pytest.mark.django_db
+class TestNoteListView:
+    url = reverse("notes_app:note_list")
+
+    def test_anonymous_user_is_redirected(self, client: Client):
+        response = client.get(self.url)
+        assert response.status_code == 302
+        assert response.headers["Location"].startswith(reverse("users_app:login"))
+
+    def test_renders_tags_of_each_note(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        make_notes(2)
+        client.force_login(confirmed_user)
+        response = client.get(self.url)
+        assert response.status_code == 200
+        assert response.content.decode().count(">work</a>") == 2
+
+    def test_query_count_does_not_depend_on_page_size(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        """
+        Tags are read from the denormalized Note.tag_names, so rendering a full page
+        costs as many queries as rendering a single note.
+        """
+        client.force_login(confirmed_user)
+        make_notes(1)
+        with CaptureQueriesContext(connection) as single_note:
+            client.get(self.url)
+
+        make_notes(20)
+        with CaptureQueriesContext(connection) as full_page:
+            client.get(self.url)
+
+        assert len(full_page) == len(single_note)
+
+    def test_full_page_query_budget(
+        self, client: Client, confirmed_user, make_notes, django_assert_num_queries
+    ):
+        """
+        Session, user, stats and the notes page, tags come from Note.tag_names.
+        """
+        client.force_login(confirmed_user)
+        notes = make_notes(30)
+        with django_assert_num_queries(4):
+            client.get(self.url, {"before": notes[25].id})
+
+    def test_first_page_links_to_next_cursor(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        notes = make_notes(10)
+        client.force_login(confirmed_user)
+        response = client.get(self.url)
+
+        shown = response.context["note_ids"]
+        assert shown == sorted((note.id for note in notes), reverse=True)[:9]
+        assert response.context["next_cursor"] == shown[-1]
+
+    def test_last_page_has_no_next_cursor(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        notes = make_notes(10)
+        client.force_login(confirmed_user)
+        oldest = min(note.id for note in notes)
+        response = client.get(self.url, {"before": oldest + 1})
+
+        assert response.context["note_ids"] == [oldest]
+        assert response.context["next_cursor"] is None
+
+    def test_invalid_cursor_shows_first_page(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        make_notes(2)
+        client.force_login(confirmed_user)
+        response = client.get(self.url, {"before": "abc"})
+        assert response.status_code == 200
+        assert len(response.context["note_ids"]) == 2
+
+    @pytest.fixture
+    def tagged_notes(self, confirmed_user, tags):
+        work, home, ideas = tags
+        notes = {}
+        for name, note_tags in {
+            "work_home": [work, home],
+            "work": [work],
+            "ideas": [ideas],
+        }.items():
+            notes[name] = Note.objects.create(
+                name=name, description="Description", user=confirmed_user
+            )
+            notes[name].tags.set(note_tags)
+        return notes
+
+    def test_filter_by_all_tags(self, client: Client, confirmed_user, tagged_notes):
+        client.force_login(confirmed_user)
+        response = client.get(self.url, {"tags": "work,home", "mode": "all"})
+        assert response.context["note_ids"] == [tagged_notes["work_home"].pk]
+
+    def test_filter_by_any_tag(self, client: Client, confirmed_user, tagged_notes):
+        client.force_login(confirmed_user)
+        response = client.get(self.url, {"tags": "home, ideas", "mode": "any"})
+        assert response.context["note_ids"] == [
+            tagged_notes["ideas"].pk,
+            tagged_notes["work_home"].pk,
+        ]
+
+    def test_filter_with_unknown_tag_in_all_mode_matches_nothing(
+        self, client: Client, confirmed_user, tagged_notes
+    ):
+        client.force_login(confirmed_user)
+        response = client.get(self.url, {"tags": "work,missing"})
+        assert response.context["note_ids"] == []
+        assert "No notes match" in response.content.decode()
+
+    def test_filter_ignores_tags_of_other_users(
+        self, client: Client, confirmed_user, tagged_notes
+    ):
+        other_user = User.objects.create_user(username="other", password="Super786")
+        other_tag = Tag.objects.create(name="work", user=other_user)
+        other_note = Note.objects.create(
+            name="Other", description="Description", user=other_user
+        )
+        other_note.tags.set([other_tag])
+        client.force_login(confirmed_user)
+
+        response = client.get(self.url, {"tags": "work", "mode": "any"})
+        assert other_note.pk not in response.context["note_ids"]
+
+    def test_filter_is_kept_in_next_page_links(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        make_notes(10)
+        client.force_login(confirmed_user)
+        response = client.get(self.url, {"tags": "work"})
+        assert "tags=work&amp;before=" in response.content.decode()
+
+    def test_filtered_page_query_budget(
+        self, client: Client, confirmed_user, make_notes, django_assert_num_queries
+    ):
+        client.force_login(confirmed_user)
+        make_notes(10)
+        with django_assert_num_queries(4):
+            client.get(self.url, {"tags": "work,home,ideas", "mode": "all"})
+
+
+@pytest.mark.django_db
+class TestNoteListMoreView:
+    url = reverse("notes_app:note_list_more")
+
+    def test_returns_only_note_cards(self, client: Client, confirmed_user, make_notes):
+        notes = make_notes(12)
+        client.force_login(confirmed_user)
+        cursor = sorted(note.id for note in notes)[3]
+        response = client.get(self.url, {"before": cursor})
+
+        content = response.content.decode()
+        assert response.status_code == 200
+        assert "<html" not in content
+        assert len(response.context["note_ids"]) == 3
+        assert response.context["next_cursor"] is None
+
+    def test_does_not_show_notes_of_other_users(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        other_user = User.objects.create_user(username="other", password="Super786")
+        make_notes(3, user=other_user)
+        client.force_login(confirmed_user)
+        response = client.get(self.url)
+        assert response.context["note_ids"] == []
+
+
+@pytest.mark.django_db
+class TestNoteSearchView:
+    url = reverse("notes_app:note_search")
+
+    def test_empty_query_returns_no_results(self, client: Client, confirmed_user):
+        client.force_login(confirmed_user)
+        response = client.get(self.url)
+        assert response.status_code == 200
+        assert response.context["note_ids"] == []
+
+    def test_finds_notes_by_text_and_tag(self, client: Client, confirmed_user, tags):
+        by_name = Note.objects.create(
+            name="Quarterly report", description="Prepare slides", user=confirmed_user
+        )
+        by_tag = Note.objects.create(
+            name="Groceries", description="Milk and bread", user=confirmed_user
+        )
+        by_tag.tags.set([tag for tag in tags if tag.name == "home"])
+        client.force_login(confirmed_user)
+
+        response = client.get(self.url, {"q": "report"})
+        assert response.context["note_ids"] == [by_name.pk]
+
+        response = client.get(self.url, {"q": "home"})
+        assert response.context["note_ids"] == [by_tag.pk]
+
+    def test_ranks_name_matches_first(self, client: Client, confirmed_user):
+        in_description = Note.objects.create(
+            name="Weekly plan", description="Call the dentist", user=confirmed_user
+        )
+        in_name = Note.objects.create(
+            name="Dentist appointment", description="Tuesday", user=confirmed_user
+        )
+        client.force_login(confirmed_user)
+
+        response = client.get(self.url, {"q": "dentist"})
+        assert response.context["note_ids"] == [in_name.pk, in_description.pk]
+
+    def test_paginates_results(self, client: Client, confirmed_user, make_notes):
+        make_notes(12)
+        client.force_login(confirmed_user)
+
+        response = client.get(self.url, {"q": "description"})
+        assert len(response.context["note_ids"]) == 9
+        assert response.context["has_next"]
+
+        response = client.get(self.url, {"q": "description", "page": 2})
+        assert len(response.context["note_ids"]) == 3
+        assert not response.context["has_next"]
+
+    def test_does_not_show_notes_of_other_users(self, client: Client, confirmed_user):
+        other_user = User.objects.create_user(username="other", password="Super786")
+        Note.objects.create(name="Secret plan", description="Hidden", user=other_user)
+        client.force_login(confirmed_user)
+
+        response = client.get(self.url, {"q": "secret"})
+        assert response.context["note_ids"] == []
+
+
+@pytest.mark.django_db
+class TestNoteFormTagPicker:
+    def test_edit_page_cost_does_not_depend_on_tag_count(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        note = make_notes(1)[0]
+        url = reverse("notes_app:note_edit", args=[note.pk])
+        client.force_login(confirmed_user)
+        with CaptureQueriesContext(connection) as few_tags:
+            response = client.get(url)
+
+        Tag.objects.bulk_create(
+            Tag(name=f"tag-{i}", user=confirmed_user) for i in range(500)
+        )
+        with CaptureQueriesContext(connection) as many_tags:
+            client.get(url)
+
+        assert len(many_tags) == len(few_tags)
+        assert response.context["selected_tags"] == ["home", "ideas", "work"]
+        assert "tag-1" not in response.content.decode()
+
+    def test_create_with_one_value_per_tag(self, client: Client, confirmed_user, tags):
+        Tag.objects.create(name="a, b", user=confirmed_user)
+        client.force_login(confirmed_user)
+
+        client.post(
+            reverse("notes_app:note_create"),
+            data={
+                "name": "New note",
+                "description": "Description",
+                "tags": ["work", "a, b", ""],
+            },
+        )
+
+        assert Note.objects.get(user=confirmed_user).tag_names == ["a, b", "work"]
+
+    def test_unknown_tags_are_rejected(
+        self, client: Client, confirmed_user, make_notes
+    ):
+        note = make_notes(1)[0]
+        client.force_login(confirmed_user)
+
+        response = client.post(
+            reverse("notes_app:note_edit", args=[note.pk]),
+            data={
+                "name": "Renamed",
+                "description": "Description",
+                "tags": ["work", "nope"],
+            },
+        )
+
+        assert "Unknown tags: nope" in response.content.decode()
+        assert response.context["selected_tags"] == ["nope", "work"]
+        note.refresh_from_db()
+        assert note.name == "Note 0"
+
+
+@pytest.mark.django_db
+class TestTagOptionsView:
+    url = reverse("notes_app:tag_options")
+
+    @pytest.fixture
+    def many_tags(self, confirmed_user):
+        Tag.objects.bulk_create(
+            Tag(name=name, user=confirmed_user)
+            for name in ("wood", "work", "world", "worm", "zebra", "apple")
+        )
+
+    def test_prefix_search_is_paginated(
+        self, client: Client, confirmed_user, many_tags, mocker
+    ):
+        mocker.patch("notes_app.views.TAG_OPTIONS_PER_PAGE", 2)
+        client.force_login(confirmed_user)
+
+        first = client.get(self.url, {"q": "wo"}).json()
+        second = client.get(self.url, {"q": "wo", "after": first["next"]}).json()
+
+        assert first == {"results": ["wood", "work"], "next": "work"}
+        assert second == {"results": ["world", "worm"], "next": None}
+
+    def test_does_not_return_tags_of_other_users(
+        self, client: Client, confirmed_user, many_tags
+    ):
+        other_user = User.objects.create_user(username="other", password="Super786")
+        Tag.objects.create(name="workshop", user=other_user)
+        client.force_login(other_user)
+
+        assert client.get(self.url, {"q": "wo"}).json()["results"] == ["workshop"]
@@ -6,7 +6,18 @@ app_name = "notes_app"
 
 urlpatterns = [
     path("", views.note_list, name="note_list"),
+    path("more/", views.note_list_more, name="note_list_more"),
+    path("search/", views.note_search, name="note_search"),
     path("create/", views.note_create, name="note_create"),
+    path("bulk/", views.note_bulk, name="note_bulk"),
+    path("import/", views.note_import, name="note_import"),
+    path("export/", views.note_export, name="note_export"),
+    path("export/archive/", views.note_export_archive, name="note_export_archive"),
+    path(
+        "export/archive/download/",
+        views.note_export_archive_download,
+        name="note_export_archive_download",
+    ),
     path("<int:note_id>/", views.note_detail, name="note_detail"),
     path(
         "<int:note_id>/toggle_status/",
@@ -21,5 +32,6 @@ urlpatterns = [
     path("<int:note_id>/delete/", views.note_delete, name="note_delete"),
     path("tags/", views.tag_list, name="tag_list"),
     path("tags/create/", views.tag_create, name="tag_create"),
+    path("tags/options/", views.tag_options, name="tag_options"),
     path("tags/<int:tag_id>/delete/", views.tag_delete, name="tag_delete"),
 ]
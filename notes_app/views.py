@@ -1,14 +1,48 @@
+import hashlib
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db import IntegrityError
-from django.http import HttpRequest, HttpResponse
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.files.storage import storages
+from django.db import IntegrityError, transaction
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.utils import timezone
-
+from django.utils.safestring import mark_safe
+
+from .bulk import bulk_update_notes, parse_bulk_request
+from .cache import (
+    CSRF_PLACEHOLDER,
+    get_or_render,
+    get_user_version,
+    insert_csrf_token,
+    render_note_cards,
+)
 from .decorators import profile_confirmed_required
+from .exporter import (
+    EXPORT_FORMATS,
+    EXPORT_STREAM_LIMIT,
+    export_notes,
+    latest_export_archive,
+)
+from .filters import TAG_FILTER_MODES, filter_notes_by_tags, parse_tag_names
 from .forms import NoteForm, NoteTodoForm, TagForm
+from .importer import detect_format, import_notes
 from .models import Note, Tag
+from .pagination import paginate_by_cursor, parse_cursor
+from .reminders import reminder_time
+from .search import search_notes
+from .stats import apply_stats_delta, get_user_stats, note_counters
+from .tagging import tag_names_page
+from .tasks import build_export_archive_task
 
 # TAGS
 
@@ -86,24 +120,135 @@ def tag_delete(request: HttpRequest, tag_id: int) -> HttpResponse:
     return redirect(to="notes_app:tag_list")
 
 
+TAG_OPTIONS_PER_PAGE = 20
+
+
+@login_required
+def tag_options(request: HttpRequest) -> JsonResponse:
+    """
+    Returns the current user's tag names for the tag picker as JSON.
+
+    Supports prefix search ('?q=wo') and pagination by the last name shown
+    ('?after=work'): {"results": [...], "next": name or null}.
+    """
+    names, next_name = tag_names_page(
+        request.user,
+        prefix=request.GET.get("q", "").strip(),
+        after=request.GET.get("after") or None,
+        limit=TAG_OPTIONS_PER_PAGE,
+    )
+    return JsonResponse({"results": names, "next": next_name})
+
+
 # NOTES
 
 
+NOTES_PER_PAGE = 9
+
+
+def _get_notes_page(request: HttpRequest) -> dict:
+    """
+    Builds the template context for one page of the current user's notes.
+
+    Pages are addressed by the 'before' cursor (ID of the last note already shown),
+    tags are read from the denormalized Note.tag_names, so a page is one query.
+    Notes can be narrowed with '?tags=a,b&mode=all|any'.
+
+    The rendered cards of a page are cached under the user's cache version,
+    so repeated views of an unchanged dashboard don't query notes at all.
+    """
+    cursor = parse_cursor(request.GET.get("before"))
+    tag_names = parse_tag_names(request.GET.get("tags"))
+    mode = request.GET.get("mode")
+    if mode not in TAG_FILTER_MODES:
+        mode = "all"
+
+    def render_page() -> dict:
+        all_notes = Note.objects.filter(user=request.user).defer("search_vector")
+        all_notes = filter_notes_by_tags(all_notes, tag_names, mode)
+        notes, next_cursor = paginate_by_cursor(all_notes, cursor, NOTES_PER_PAGE)
+        return {
+            "note_ids": [note.pk for note in notes],
+            "cards_html": render_note_cards(notes),
+            "next_cursor": next_cursor,
+        }
+
+    params = hashlib.md5(repr((cursor, tag_names, mode)).encode()).hexdigest()
+    page = get_or_render(
+        key=f"notes:list:{request.user.pk}:{params}",
+        version=get_user_version(request.user.pk),
+        render=render_page,
+    )
+    return {
+        **page,
+        "cards_html": mark_safe(insert_csrf_token(page["cards_html"], request)),
+        "cursor": cursor,
+        "tag_filter": ", ".join(tag_names),
+        "tag_filter_mode": mode,
+    }
+
+
 @login_required
 def note_list(request: HttpRequest) -> HttpResponse:
     """
     Renders the list of notes for the authenticated user, including pagination.
 
-    Fetches all notes owned by the current user, orders them by ID (newest first),
-    and paginates the results, showing 9 notes per page.
+    Fetches the notes owned by the current user, ordered by ID (newest first),
+    showing 9 notes per page. Uses keyset pagination, so deep pages cost the same
+    as the first one and the page renders in a constant number of queries.
+    Supports filtering by tags: '?tags=a,b&mode=all' (every tag) or 'mode=any'.
+    Per-user totals are read from the precomputed UserStats row.
     """
-    all_notes = Note.objects.filter(user=request.user).order_by("-id")
+    context = _get_notes_page(request)
+    context["stats"] = get_user_stats(request.user)
+    return render(request, "notes_app/note_list.html", context)
 
-    paginator = Paginator(all_notes, 9)
-    page_number = request.GET.get("page", 1)
-    notes = paginator.get_page(page_number)
 
-    return render(request, "notes_app/note_list.html", {"notes": notes})
+@login_required
+def note_list_more(request: HttpRequest) -> HttpResponse:
+    """
+    Renders the next batch of note cards as an HTML fragment.
+
+    Used by the dashboard's infinite scroll. The fragment ends with a link
+    to the following batch, if there is one.
+    """
+    return render(request, "notes_app/note_cards.html", _get_notes_page(request))
+
+
+@login_required
+def note_search(request: HttpRequest) -> HttpResponse:
+    """
+    Full-text search over the current user's notes (name, description and tag names).
+
+    Results are ranked by relevance and paginated by page number, 9 per page.
+    One extra row is fetched to detect the next page, so no COUNT(*) is needed.
+    """
+    query_text = request.GET.get("q", "").strip()
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+
+    notes, has_next = [], False
+    if query_text:
+        offset = (page - 1) * NOTES_PER_PAGE
+        results = search_notes(request.user, query_text).defer("search_vector")
+        notes = list(results[offset : offset + NOTES_PER_PAGE + 1])
+        has_next = len(notes) > NOTES_PER_PAGE
+        notes = notes[:NOTES_PER_PAGE]
+
+    cards_html = insert_csrf_token(render_note_cards(notes), request)
+    return render(
+        request,
+        "notes_app/note_search.html",
+        {
+            "note_ids": [note.pk for note in notes],
+            "cards_html": mark_safe(cards_html),
+            "q": query_text,
+            "page": page,
+            "has_next": has_next,
+        },
+    )
 
 
 @login_required
@@ -114,9 +259,28 @@ def note_detail(request: HttpRequest, note_id: int) -> HttpResponse:
     Fetches the Note object by its ID, ensuring it belongs to the currently
     authenticated user. Raises Http404 if the note is not found or does not
     belong to the user.
+
+    The rendered note is cached under the user's cache version, the cache key
+    contains the user's ID, so a cached note is only ever shown to its owner.
     """
-    note = get_object_or_404(Note, pk=note_id, user=request.user)
-    return render(request, "notes_app/note_detail.html", {"note": note})
+
+    def render_detail() -> str:
+        note = get_object_or_404(Note, pk=note_id, user=request.user)
+        return render_to_string(
+            "notes_app/note_detail_body.html",
+            {"note": note, "csrf_token": CSRF_PLACEHOLDER},
+        )
+
+    detail_html = get_or_render(
+        key=f"notes:detail:{request.user.pk}:{note_id}",
+        version=get_user_version(request.user.pk),
+        render=render_detail,
+    )
+    return render(
+        request,
+        "notes_app/note_detail.html",
+        {"detail_html": mark_safe(insert_csrf_token(detail_html, request))},
+    )
 
 
 @login_required
@@ -136,11 +300,14 @@ def note_toggle_status(request: HttpRequest, note_id: int) -> HttpResponse:
     note = get_object_or_404(Note, pk=note_id, user=request.user)
 
     if request.method == "POST":
+        before = note_counters(note)
         note.done = not note.done
         if note.is_todo:
             note.is_todo = False
             note.deadline = None
-        note.save()
+        with transaction.atomic():
+            note.save()
+            apply_stats_delta(request.user.pk, before, note_counters(note))
         messages.success(request, "Note status was changed")
         return redirect(to="notes_app:note_list")
 
@@ -148,6 +315,37 @@ def note_toggle_status(request: HttpRequest, note_id: int) -> HttpResponse:
     return redirect(to="notes_app:note_detail", note_id=note.pk)
 
 
+def _get_selected_tags(request: HttpRequest) -> tuple[list[str], list[Tag], list[str]]:
+    """
+    Reads the tag names submitted by the tag picker (one 'tags' value per tag,
+    names may contain commas) and looks them up among the user's tags in one query.
+
+    Returns the submitted names, the matching tags and the unknown names.
+    """
+    names = sorted({name.strip() for name in request.POST.getlist("tags")} - {""})
+    tags = list(Tag.objects.filter(user=request.user, name__in=names))
+    unknown = sorted(set(names) - {tag.name for tag in tags})
+    return names, tags, unknown
+
+
+def _render_note_form(
+    request: HttpRequest, form: NoteForm, selected_tags: list[str], is_edit: bool
+) -> HttpResponse:
+    """
+    Renders the note form. Only the selected tag names are rendered,
+    other tags are fetched by the picker from tag_options on demand.
+    """
+    return render(
+        request,
+        "notes_app/note_form.html",
+        {
+            "form": form,
+            "selected_tags": selected_tags,
+            "is_edit": is_edit,
+        },
+    )
+
+
 @login_required
 @profile_confirmed_required
 def note_create(request: HttpRequest) -> HttpResponse:
@@ -159,16 +357,16 @@ def note_create(request: HttpRequest) -> HttpResponse:
     to the tag creation page with a warning message.
 
     On POST:
-    1. Validates the input data using NoteForm.
+    1. Validates the input data using NoteForm and the submitted tag names,
+       all of which must be the user's tags.
     2. Associates the new Note with the current user and selected Tags.
     3. Redirects to the notes list with a success message.
 
     On GET:
-    Renders the Note creation form.
+    Renders the Note creation form. The user's tags aren't loaded,
+    the tag picker searches them through tag_options.
     """
-    tags = Tag.objects.filter(user=request.user)
-
-    if not tags.exists():
+    if not Tag.objects.filter(user=request.user).exists():
         messages.warning(
             request,
             "You must create at least one tag before creating a note. Please create a tag now.",
@@ -176,28 +374,29 @@ def note_create(request: HttpRequest) -> HttpResponse:
         return redirect(to="notes_app:tag_create")
 
     form: NoteForm
+    selected_tags: list[str] = []
 
     if request.method == "POST":
         form = NoteForm(request.POST)
-        if form.is_valid():
+        selected_tags, choice_tags, unknown = _get_selected_tags(request)
+        if unknown:
+            messages.error(request, f"Unknown tags: {', '.join(unknown)}")
+        elif form.is_valid():
             new_note = form.save(commit=False)
-            choice_tags = Tag.objects.filter(
-                name__in=request.POST.getlist("tags"), user=request.user
-            )
             new_note.user = request.user
-            new_note.save()
-            new_note.tags.set(choice_tags)
+            with transaction.atomic():
+                new_note.save()
+                new_note.tags.set(choice_tags)
+                apply_stats_delta(
+                    request.user.pk, note_counters(None), note_counters(new_note)
+                )
 
             messages.success(request, "Note was created!")
             return redirect(to="notes_app:note_list")
     else:
         form = NoteForm()
 
-    return render(
-        request,
-        "notes_app/note_form.html",
-        {"form": form, "tags": tags, "is_edit": False},
-    )
+    return _render_note_form(request, form, selected_tags, is_edit=False)
 
 
 @login_required
@@ -208,37 +407,36 @@ def note_edit(request: HttpRequest, note_id: int) -> HttpResponse:
     Fetches the Note instance by ID, ensuring it belongs to the current user (security).
 
     On POST:
-    1. Validates input data using NoteForm, bound to the existing Note instance.
+    1. Validates input data using NoteForm, bound to the existing Note instance,
+       and the submitted tag names, all of which must be the user's tags.
     2. Saves the Note changes.
     3. Updates the Note's associated Tags. ( + Tags are filtered by ownership).
     4. Redirects to the notes list with a success message.
 
     On GET:
     Renders the Note edit form, pre-filled with the Note's current data.
+    The selected tags come from Note.tag_names, so the page costs the same
+    number of queries however many tags the user has.
     """
     note = get_object_or_404(Note, pk=note_id, user=request.user)
-    tags = Tag.objects.filter(user=request.user)
 
     form: NoteForm
+    selected_tags = note.tag_names
 
     if request.method == "POST":
         form = NoteForm(request.POST, instance=note)
-        if form.is_valid():
+        selected_tags, choice_tags, unknown = _get_selected_tags(request)
+        if unknown:
+            messages.error(request, f"Unknown tags: {', '.join(unknown)}")
+        elif form.is_valid():
             form.save()
-            choice_tags = Tag.objects.filter(
-                name__in=request.POST.getlist("tags"), user=request.user
-            )
             note.tags.set(choice_tags)
             messages.success(request, "Note was edited!")
             return redirect(to="notes_app:note_list")
     else:
         form = NoteForm(instance=note)
 
-    return render(
-        request,
-        "notes_app/note_form.html",
-        {"form": form, "tags": tags, "is_edit": True},
-    )
+    return _render_note_form(request, form, selected_tags, is_edit=True)
 
 
 @login_required
@@ -251,7 +449,9 @@ def note_delete(request: HttpRequest, note_id: int) -> HttpResponse:
     """
     if request.method == "POST":
         note = get_object_or_404(Note, pk=note_id, user=request.user)
-        note.delete()
+        with transaction.atomic():
+            note.delete()
+            apply_stats_delta(request.user.pk, note_counters(note), note_counters(None))
         messages.success(request, "Note was deleted!")
         return redirect(to="notes_app:note_list")
 
@@ -272,9 +472,12 @@ def note_toggle_todo(request: HttpRequest, note_id: int) -> HttpResponse:
         return redirect(to="notes_app:note_set_deadline", note_id=note.pk)
 
     if request.method == "POST":
+        before = note_counters(note)
         note.deadline = None
         note.is_todo = False
-        note.save()
+        with transaction.atomic():
+            note.save()
+            apply_stats_delta(request.user.pk, before, note_counters(note))
         messages.success(request, "Note is no longer in To-Do mode")
 
     else:
@@ -297,6 +500,7 @@ def note_set_deadline(request: HttpRequest, note_id: int) -> HttpResponse:
           - Redirects to the note list.
     """
     note = get_object_or_404(Note, pk=note_id, user=request.user)
+    before = note_counters(note)
     curr_time = timezone.localtime()
 
     form: NoteTodoForm
@@ -310,7 +514,10 @@ def note_set_deadline(request: HttpRequest, note_id: int) -> HttpResponse:
             note = form.save(commit=False)
             note.is_todo = True
             note.done = False
-            note.save()
+            note.remind_at = reminder_time(note.deadline)
+            with transaction.atomic():
+                note.save()
+                apply_stats_delta(request.user.pk, before, note_counters(note))
             messages.success(
                 request, f'"{note.name}" is now a To-Do with deadline set!'
             )
@@ -320,3 +527,162 @@ def note_set_deadline(request: HttpRequest, note_id: int) -> HttpResponse:
     else:
         form = NoteTodoForm(instance=note)
     return render(request, "notes_app/set_deadline.html", {"form": form, "note": note})
+
+
+BULK_ACTION_MESSAGES = {
+    "delete": "deleted",
+    "complete": "marked as completed",
+    "tag": "tagged",
+    "untag": "untagged",
+}
+
+
+@login_required
+def note_bulk(request: HttpRequest) -> HttpResponse:
+    """
+    Applies one action to all notes selected on the dashboard. Only accepts POST requests.
+
+    On POST:
+    1. Validates the action ('delete', 'complete', 'tag', 'untag'), the selected
+       note IDs and, for tagging, the name of one of the user's tags.
+    2. Applies the action to all selected notes in a few set-based statements.
+    3. Redirects to the note list with a message about how many notes were changed.
+
+    Any other methods are safely redirected to the note list.
+    """
+    if request.method == "POST":
+        action = request.POST.get("action")
+        try:
+            note_ids, tag = parse_bulk_request(
+                request.user,
+                action,
+                request.POST.getlist("note_ids"),
+                request.POST.get("tag"),
+            )
+        except ValueError as error:
+            messages.error(request, str(error))
+            return redirect(to="notes_app:note_list")
+
+        count = bulk_update_notes(request.user, note_ids, action, tag)
+        messages.success(request, f"{count} note(s) {BULK_ACTION_MESSAGES[action]}.")
+
+    return redirect(to="notes_app:note_list")
+
+
+@login_required
+@profile_confirmed_required
+def note_import(request: HttpRequest) -> HttpResponse:
+    """
+    Imports notes from an uploaded CSV or NDJSON file.
+
+    On POST:
+    1. Detects the format from the file extension.
+    2. Streams the file into the database in chunks (see notes_app.importer),
+       missing tags are created on the fly.
+    3. Renders the import report: number of imported and skipped rows,
+       throughput and the first errors.
+
+    On GET:
+    Renders the upload form.
+    """
+    report = None
+
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        fmt = detect_format(upload.name) if upload else None
+        if fmt is None:
+            messages.error(request, "Upload a .csv or .ndjson file.")
+            return redirect(to="notes_app:note_import")
+
+        report = import_notes(request.user, upload.file, fmt)
+        if report.created:
+            messages.success(request, f"{report.created} note(s) were imported!")
+
+    return render(request, "notes_app/note_import.html", {"report": report})
+
+
+@login_required
+def note_export(request: HttpRequest) -> HttpResponse:
+    """
+    Exports all notes of the current user.
+
+    With '?format=ndjson' or '?format=csv': streams the notes as a file download.
+    Notes are read through a server-side cursor and written in chunks,
+    so memory use stays constant whatever the account size. Accounts larger
+    than EXPORT_STREAM_LIMIT are redirected to the background ZIP export.
+
+    Otherwise: renders the export page with the available formats
+    and the status of the user's ZIP archive.
+    """
+    stats = get_user_stats(request.user)
+    fmt = request.GET.get("format")
+
+    if fmt in EXPORT_FORMATS:
+        if stats.notes_count > EXPORT_STREAM_LIMIT:
+            messages.warning(
+                request,
+                "Your account is too large for a direct download, "
+                "request a ZIP archive instead.",
+            )
+            return redirect(to="notes_app:note_export")
+
+        filename = f"notes-{timezone.localdate():%Y%m%d}.{fmt}"
+        return StreamingHttpResponse(
+            export_notes(request.user, fmt),
+            content_type=EXPORT_FORMATS[fmt],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    storage = storages["exports"]
+    archive_name = latest_export_archive(request.user.pk)
+    archive_created_at = (
+        storage.get_modified_time(archive_name) if archive_name else None
+    )
+    return render(
+        request,
+        "notes_app/note_export.html",
+        {
+            "formats": EXPORT_FORMATS,
+            "can_stream": stats.notes_count <= EXPORT_STREAM_LIMIT,
+            "archive_created_at": archive_created_at,
+        },
+    )
+
+
+@login_required
+def note_export_archive(request: HttpRequest) -> HttpResponse:
+    """
+    Schedules a background ZIP export of the user's notes. Only accepts POST requests.
+
+    The archive is built by Celery and the user gets an email when it's ready.
+    """
+    if request.method == "POST":
+        build_export_archive_task.delay(
+            request.user.pk, get_current_site(request).domain
+        )
+        messages.success(
+            request, "Your export is being prepared. We'll email you when it's ready."
+        )
+
+    return redirect(to="notes_app:note_export")
+
+
+@login_required
+def note_export_archive_download(request: HttpRequest) -> FileResponse:
+    """
+    Serves the latest ZIP export of the current user, raises Http404 if there is none.
+    """
+    storage = storages["exports"]
+    archive_name = latest_export_archive(request.user.pk)
+    if archive_name is None:
+        raise Http404("No export archive found.")
+    try:
+        created_at = storage.get_modified_time(archive_name)
+        archive = storage.open(archive_name, "rb")
+    except FileNotFoundError:
+        # Replaced by a newer archive meanwhile.
+        raise Http404("No export archive found.")
+
+    return FileResponse(
+        archive, as_attachment=True, filename=f"notes-{created_at:%Y%m%d}.zip"
+    )
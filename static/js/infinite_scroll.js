@@ -0,0 +1,47 @@
+// Replaces the "Load more" link with the next batch of note cards when it scrolls into view.
+// Without JavaScript the link still works and opens the next page of the dashboard.
+(function () {
+    "use strict";
+
+    function loadMore(container, observer) {
+        const link = container.querySelector("a[data-fragment-url]");
+        observer.unobserve(container);
+
+        fetch(link.dataset.fragmentUrl, {credentials: "same-origin"})
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error(response.statusText);
+                }
+                return response.text();
+            })
+            .then(function (html) {
+                const grid = container.parentElement;
+                container.remove();
+                grid.insertAdjacentHTML("beforeend", html);
+                const next = grid.querySelector("[data-load-more]");
+                if (next) {
+                    observer.observe(next);
+                }
+            })
+            .catch(function () {
+                // Leave the plain link in place as a fallback.
+            });
+    }
+
+    document.addEventListener("DOMContentLoaded", function () {
+        const container = document.querySelector("[data-load-more]");
+        if (!container || !("IntersectionObserver" in window)) {
+            return;
+        }
+
+        const observer = new IntersectionObserver(function (entries) {
+            entries.forEach(function (entry) {
+                if (entry.isIntersecting) {
+                    loadMore(entry.target, observer);
+                }
+            });
+        }, {rootMargin: "200px"});
+
+        observer.observe(container);
+    });
+})();
@@ -0,0 +1,121 @@
+// Suggests the user's tags while typing into the tag search input.
+// Suggestions are fetched page by page from the tag options endpoint, so the form
+// never has to render all of the user's tags. A chosen tag becomes a checked
+// "tags" checkbox, every tag is submitted as a value of its own.
+// Without JavaScript the input still accepts one tag name typed by hand.
+(function () {
+    "use strict";
+
+    const DEBOUNCE_MS = 200;
+
+    function updateRequired(picker, input) {
+        // The search input is only required while no tag is checked.
+        input.required = !picker.querySelector("[data-selected-tags] input:checked");
+    }
+
+    function chooseTag(picker, input, name) {
+        const selected = picker.querySelector("[data-selected-tags]");
+        let checkbox = Array.from(selected.querySelectorAll("input")).find(function (box) {
+            return box.value === name;
+        });
+        if (!checkbox) {
+            const chip = document.createElement("label");
+            chip.className = "badge text-bg-primary d-inline-flex align-items-center gap-1";
+            checkbox = document.createElement("input");
+            checkbox.type = "checkbox";
+            checkbox.className = "form-check-input m-0";
+            checkbox.name = "tags";
+            checkbox.value = name;
+            chip.append(checkbox, name);
+            selected.appendChild(chip);
+        }
+        checkbox.checked = true;
+        input.value = "";
+        updateRequired(picker, input);
+        input.focus();
+    }
+
+    function renderOptions(picker, input, data, append) {
+        const list = picker.querySelector("[data-tag-options]");
+        if (!append) {
+            list.replaceChildren();
+        }
+        const more = list.querySelector("[data-more]");
+        if (more) {
+            more.remove();
+        }
+
+        data.results.forEach(function (name) {
+            const option = document.createElement("button");
+            option.type = "button";
+            option.className = "list-group-item list-group-item-action";
+            option.textContent = name;
+            option.addEventListener("click", function () {
+                chooseTag(picker, input, name);
+                list.classList.add("d-none");
+            });
+            list.appendChild(option);
+        });
+
+        if (data.next) {
+            const loadMore = document.createElement("button");
+            loadMore.type = "button";
+            loadMore.className = "list-group-item list-group-item-action text-muted";
+            loadMore.textContent = "More…";
+            loadMore.dataset.more = "";
+            loadMore.addEventListener("click", function () {
+                fetchOptions(picker, input, data.next);
+            });
+            list.appendChild(loadMore);
+        }
+
+        list.classList.toggle("d-none", list.children.length === 0);
+    }
+
+    function fetchOptions(picker, input, after) {
+        const url = new URL(input.dataset.optionsUrl, window.location.origin);
+        url.searchParams.set("q", input.value.trim());
+        if (after) {
+            url.searchParams.set("after", after);
+        }
+
+        fetch(url, {credentials: "same-origin"})
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error(response.statusText);
+                }
+                return response.json();
+            })
+            .then(function (data) {
+                renderOptions(picker, input, data, Boolean(after));
+            })
+            .catch(function () {
+                // Typing tag names by hand keeps working.
+            });
+    }
+
+    document.addEventListener("DOMContentLoaded", function () {
+        document.querySelectorAll("[data-tag-picker]").forEach(function (picker) {
+            const input = picker.querySelector("input[data-options-url]");
+            let timer = null;
+
+            input.addEventListener("input", function () {
+                clearTimeout(timer);
+                timer = setTimeout(function () {
+                    fetchOptions(picker, input, null);
+                }, DEBOUNCE_MS);
+            });
+            input.addEventListener("focus", function () {
+                fetchOptions(picker, input, null);
+            });
+            picker.querySelector("[data-selected-tags]").addEventListener("change", function () {
+                updateRequired(picker, input);
+            });
+            document.addEventListener("click", function (event) {
+                if (!picker.contains(event.target)) {
+                    picker.querySelector("[data-tag-options]").classList.add("d-none");
+                }
+            });
+        });
+    });
+})();
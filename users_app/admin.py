@@ -1,5 +1,6 @@
 from django.contrib import admin
 
-from .models import Profile
+from .models import ApiToken, Profile
 
 admin.site.register(Profile)
+admin.site.register(ApiToken)
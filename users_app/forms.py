@@ -4,15 +4,17 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.forms import (
     CharField,
+    ChoiceField,
     EmailField,
     EmailInput,
     ImageField,
     PasswordInput,
+    Select,
     TextInput,
 )
 from django.forms.widgets import Textarea
 
-from .models import Profile
+from .models import Profile, supported_timezones
 
 
 class SignUpForm(UserCreationForm):
@@ -86,10 +88,28 @@ class ProfileForm(forms.ModelForm):
         required=False,
         widget=Textarea(attrs={"class": "form-control", "placeholder": "Your bio"}),
     )
+    reminder_mode = ChoiceField(
+        choices=Profile.ReminderMode.choices,
+        required=False,
+        widget=Select(attrs={"class": "form-select"}),
+    )
+    timezone = ChoiceField(
+        choices=lambda: [(name, name) for name in sorted(supported_timezones())],
+        required=False,
+        widget=Select(attrs={"class": "form-select"}),
+    )
 
     class Meta:
         model = Profile
-        fields = ["avatar", "bio"]
+        fields = ["avatar", "bio", "reminder_mode", "timezone"]
+
+    def clean_reminder_mode(self):
+        """Keeps the current mode when the field isn't submitted."""
+        return self.cleaned_data["reminder_mode"] or self.instance.reminder_mode
+
+    def clean_timezone(self):
+        """Keeps the current time zone when the field isn't submitted."""
+        return self.cleaned_data["timezone"] or self.instance.timezone
 
 
 class EmailForm(forms.Form):
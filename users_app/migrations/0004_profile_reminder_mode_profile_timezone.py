@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:20
+
+from django.db import migrations, models
+
+import users_app.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users_app", "0003_apitoken"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="reminder_mode",
+            field=models.CharField(
+                choices=[
+                    ("per_note", "One email per note"),
+                    ("digest", "A morning digest"),
+                ],
+                default="per_note",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="timezone",
+            field=models.CharField(
+                default="UTC",
+                max_length=63,
+                validators=[users_app.models.validate_timezone],
+            ),
+        ),
+    ]
@@ -1,13 +1,39 @@
+import hashlib
 import logging
+import secrets
+import zoneinfo
+from functools import cache
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import connection, models
 from PIL import Image
 
 logger = logging.getLogger("models_errors")
 
 
+@cache
+def supported_timezones() -> frozenset[str]:
+    """
+    The IANA time zones known to both Python and PostgreSQL, the digests are
+    scheduled in SQL and rendered in Python. Read once per process.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM pg_timezone_names")
+        names = {row[0] for row in cursor.fetchall()}
+    return frozenset(zoneinfo.available_timezones() & names)
+
+
+def validate_timezone(value: str) -> None:
+    if value not in supported_timezones():
+        raise ValidationError(f"Unknown time zone: {value}")
+
+
 class Profile(models.Model):
+    class ReminderMode(models.TextChoices):
+        PER_NOTE = "per_note", "One email per note"
+        DIGEST = "digest", "A morning digest"
+
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     avatar = models.ImageField(
         default="avatars/default_avatar.png", upload_to="avatars/"
@@ -15,6 +41,14 @@ class Profile(models.Model):
     bio = models.CharField(max_length=500, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_confirmed = models.BooleanField(default=False)
+    # How deadline reminders are delivered, see notes_app.reminders.
+    reminder_mode = models.CharField(
+        max_length=10, choices=ReminderMode.choices, default=ReminderMode.PER_NOTE
+    )
+    # IANA name, the digest is sent in the morning of this time zone.
+    timezone = models.CharField(
+        max_length=63, default="UTC", validators=[validate_timezone]
+    )
 
     def __str__(self):
         return self.user.username
@@ -31,3 +65,28 @@ class Profile(models.Model):
                     img.save(self.avatar.path)
         except Exception as e:
             logger.error(f"Error manipulating avatar image: {e}")
+
+
+class ApiToken(models.Model):
+    """
+    Bearer token for the JSON API. Only a SHA-256 hash of the key is stored,
+    the key itself is shown once when the token is issued.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="api_tokens")
+    key_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"API token of {self.user.username}"
+
+    @staticmethod
+    def hash_key(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, user: User) -> str:
+        """Creates a new token for the user and returns its key."""
+        key = secrets.token_urlsafe(32)
+        cls.objects.create(user=user, key_hash=cls.hash_key(key))
+        return key
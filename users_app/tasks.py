@@ -6,6 +6,8 @@ from django.core.mail import send_mail
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
+from notes.metrics import EMAILS
+
 from .models import User
 from .tokens import password_reset_token, profile_activation_token
 
@@ -49,8 +51,10 @@ def send_activation_email_task(self, user_id: int, domain: str) -> None:
             ],
             fail_silently=False,
         )
+        EMAILS.inc(kind="activation", outcome="sent")
         logger.info(f"Activation email successfully sent to user {recipient}.")
     except Exception as e:
+        EMAILS.inc(kind="activation", outcome="failed")
         logger.error(f"Failed to send activation email to user {user_id}. Retrying...")
         raise self.retry(exc=e)
 
@@ -92,7 +96,9 @@ def send_reset_password_email_task(self, user_id: int, domain: str) -> None:
             ],
             fail_silently=False,
         )
+        EMAILS.inc(kind="password_reset", outcome="sent")
         logger.info(f"Password reset email successfully sent to user {recipient}.")
     except Exception as e:
+        EMAILS.inc(kind="password_reset", outcome="failed")
         logger.error(f"Failed to send reset email to user {user_id}. Retrying...")
         raise self.retry(exc=e)
@@ -143,3 +143,27 @@ class TestProfileForm:
             data={"bio": bio}, files=MultiValueDict({"avatar": [img_to_use]})
         )
         assert form.is_valid() == expected
+
+    @pytest.mark.parametrize(
+        "reminder_mode, tz, expected",
+        [
+            ("digest", "Europe/Kyiv", True),
+            ("", "", True),
+            ("weekly", "UTC", False),
+            ("digest", "Mars/Olympus", False),
+            ("digest", "localtime", False),
+        ],
+    )
+    def test_reminder_preferences(self, fake_img_file, reminder_mode, tz, expected):
+        """
+        Verifies the reminder mode and time zone choices, and that the current
+        values are kept when they aren't submitted.
+        """
+        form = ProfileForm(
+            data={"bio": "", "reminder_mode": reminder_mode, "timezone": tz},
+            files=MultiValueDict({"avatar": [fake_img_file]}),
+        )
+        assert form.is_valid() == expected
+        if expected:
+            assert form.cleaned_data["reminder_mode"] == (reminder_mode or "per_note")
+            assert form.cleaned_data["timezone"] == (tz or "UTC")
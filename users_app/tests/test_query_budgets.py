@@ -0,0 +1,173 @@
+"""
+Query budgets of every users_app view, with 1, 10 and 100 notes of the user.
+
+Each test is named after the URL it covers, test_every_view_has_a_budget
+fails when a new URL is added without a budget.
+"""
+
+from itertools import count
+
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from notes_app.models import Note
+from notes_app.stats import recompute_user_stats
+from users_app.models import Profile, supported_timezones
+from users_app.tokens import password_reset_token, profile_activation_token
+from users_app.urls import urlpatterns
+
+pytestmark = pytest.mark.django_db
+
+PASSWORD = "Super786"
+
+# Session and user lookups of an authenticated request.
+AUTH = 2
+
+
+@pytest.fixture
+def user(user_with_profile):
+    return user_with_profile[0]
+
+
+@pytest.fixture
+def logged_client(client: Client, user) -> Client:
+    client.force_login(user)
+    return client
+
+
+@pytest.fixture
+def grow_notes(user):
+    """Brings the number of the user's notes to the given size, with a cold cache."""
+
+    def grow(size: int) -> None:
+        existing = Note.objects.filter(user=user).count()
+        Note.objects.bulk_create(
+            Note(name=f"Note {i}", description=f"Description {i}", user=user)
+            for i in range(existing, size)
+        )
+        recompute_user_stats([user.pk])
+        cache.clear()
+
+    return grow
+
+
+def _uidb64(user) -> str:
+    return urlsafe_base64_encode(force_bytes(user.pk))
+
+
+def test_signup(client: Client, grow_notes, assert_query_budget):
+    url = reverse("users_app:signup")
+    emails = (f"yaroslav.{i}@example.com" for i in count())
+
+    def signup():
+        return client.post(
+            url,
+            {
+                "first_name": "Yaroslav",
+                "last_name": "Pradyvlianyi",
+                "email": next(emails),
+                "password1": "Super187",
+                "password2": "Super187",
+            },
+        )
+
+    assert_query_budget(lambda: client.get(url), grow=grow_notes, exact=0)
+    # Email check, the user and its profile.
+    assert_query_budget(signup, grow=grow_notes, exact=3)
+
+
+def test_activate(client: Client, user, grow_notes, assert_query_budget):
+    urls = []
+
+    def grow(size: int) -> None:
+        grow_notes(size)
+        # The token is valid until the profile is confirmed.
+        Profile.objects.filter(user=user).update(is_confirmed=False)
+        urls.append(
+            reverse(
+                "users_app:activate",
+                args=[_uidb64(user), profile_activation_token.make_token(user)],
+            )
+        )
+
+    assert_query_budget(lambda: client.get(urls[-1]), grow=grow, exact=4)
+
+
+def test_login(user, grow_notes, assert_query_budget):
+    url = reverse("users_app:login")
+    data = {"username": user.username, "password": PASSWORD}
+    assert_query_budget(lambda: Client().get(url), grow=grow_notes, exact=0)
+    # The session and last_login writes save the profile again through
+    # the User post_save signal.
+    assert_query_budget(lambda: Client().post(url, data), grow=grow_notes, exact=12)
+
+
+def test_logout(client: Client, user, grow_notes, assert_query_budget):
+    def grow(size: int) -> None:
+        grow_notes(size)
+        client.force_login(user)
+
+    assert_query_budget(
+        lambda: client.post(reverse("users_app:logout")), grow=grow, exact=AUTH + 2
+    )
+
+
+def test_profile(logged_client, grow_notes, assert_query_budget):
+    url = reverse("users_app:profile")
+    # Profile and the stats.
+    assert_query_budget(lambda: logged_client.get(url), grow=grow_notes, exact=AUTH + 2)
+
+
+def test_edit_profile(logged_client, grow_notes, assert_query_budget):
+    url = reverse("users_app:edit_profile")
+    data = {"first_name": "Yaroslav", "last_name": "Pradyvlianyi"}
+    supported_timezones()  # read once per process
+    assert_query_budget(lambda: logged_client.get(url), grow=grow_notes, exact=AUTH + 2)
+    assert_query_budget(
+        lambda: logged_client.post(url, data), grow=grow_notes, exact=AUTH + 2
+    )
+
+
+def test_reset_password(client: Client, user, grow_notes, assert_query_budget, mocker):
+    mocker.patch("users_app.views.send_reset_password_email_task.delay")
+    url = reverse("users_app:reset_password")
+    assert_query_budget(lambda: client.get(url), grow=grow_notes, exact=0)
+    assert_query_budget(
+        lambda: client.post(url, {"email": user.email}), grow=grow_notes, exact=1
+    )
+
+
+def test_reset_password_done(client: Client, grow_notes, assert_query_budget):
+    url = reverse("users_app:reset_password_done")
+    assert_query_budget(lambda: client.get(url), grow=grow_notes, exact=0)
+
+
+def test_reset_password_confirm(client: Client, user, grow_notes, assert_query_budget):
+    urls = []
+
+    def grow(size: int) -> None:
+        grow_notes(size)
+        # The token changes with the password.
+        user.refresh_from_db()
+        urls.append(
+            reverse(
+                "users_app:reset_password_confirm",
+                args=[_uidb64(user), password_reset_token.make_token(user)],
+            )
+        )
+
+    data = {"password1": "Super187", "password2": "Super187"}
+    assert_query_budget(lambda: client.get(urls[-1]), grow=grow, exact=1)
+    assert_query_budget(lambda: client.post(urls[-1], data), grow=grow, exact=4)
+
+
+def test_every_view_has_a_budget():
+    tested = {name for name in globals() if name.startswith("test_")}
+    missing = [
+        pattern.name for pattern in urlpatterns if f"test_{pattern.name}" not in tested
+    ]
+    assert not missing, f"Views without a query budget: {missing}"
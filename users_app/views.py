@@ -8,6 +8,8 @@ from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect, render
 from django.utils.http import urlsafe_base64_decode
 
+from notes_app.stats import get_user_stats
+
 from .forms import EmailForm, LoginForm, PasswordConfirmForm, ProfileForm, SignUpForm
 from .models import Profile
 from .tasks import send_activation_email_task, send_reset_password_email_task
@@ -129,9 +131,13 @@ def logout_user(request: HttpRequest) -> HttpResponse:
 
 @login_required
 def profile(request: HttpRequest) -> HttpResponse:
-    """Displays the current user's profile page."""
+    """Displays the current user's profile page with their note statistics."""
     curr_profile = Profile.objects.get(user=request.user)
-    return render(request, "users_app/profile.html", {"curr_profile": curr_profile})
+    return render(
+        request,
+        "users_app/profile.html",
+        {"curr_profile": curr_profile, "stats": get_user_stats(request.user)},
+    )
 
 
 @login_required